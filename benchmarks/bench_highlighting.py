@@ -0,0 +1,53 @@
+# Copyright 2021 Robin Maasjosthusmann. All rights reserved.
+# Use of this source code is governed by a BSD-style
+# license that can be found in the LICENSE file.
+"""
+Benchmark for the keyword highlighting
+
+Compiles 10 up to 10k random keywords (every tenth one is a two word phrase) and
+highlights a typical transaction text with them. The highlighting time should stay
+flat while the number of keywords grows.
+
+Usage: poetry run python -m benchmarks.bench_highlighting
+"""
+
+import random
+import string
+import timeit
+
+from csv_labeler.highlighting import KeywordHighlighter
+
+TEXT = (
+    "Lastschrift AMAZON MARKETPLACE EU-DE 302-1234567-7654321 Amazon.de"
+    " Netflix International B.V. Uber BV Microsoft Ireland Stadia MyCard"
+)
+
+
+def random_keywords(count: int, seed: int = 42) -> list:
+    """Creates {count} random keywords plus the keywords that occur inside of TEXT"""
+    rng = random.Random(seed)
+    keywords = ["Amazon Marketplace", "Netflix", "Uber", "Microsoft", "Stadia"]
+    while len(keywords) < count:
+        word = "".join(rng.choices(string.ascii_letters, k=rng.randint(4, 12)))
+        if len(keywords) % 10 == 0:
+            word += " " + "".join(rng.choices(string.ascii_letters, k=6))
+        keywords.append(word)
+    return keywords
+
+
+def main() -> None:
+    """Prints compile and highlight time per keyword count"""
+    print(f"{'keywords':>10} {'compile [ms]':>14} {'highlight [us]':>16}")
+    for count in (10, 100, 1_000, 10_000):
+        keywords = random_keywords(count)
+        compile_time = timeit.timeit(lambda: KeywordHighlighter(keywords), number=3) / 3
+        highlighter = KeywordHighlighter(keywords)
+        runs = 2_000
+        highlight_time = timeit.timeit(lambda: highlighter.highlight(TEXT), number=runs)
+        print(
+            f"{count:>10} {compile_time * 1e3:>14.2f} {highlight_time / runs * 1e6:>16.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
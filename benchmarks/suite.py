@@ -0,0 +1,291 @@
+# Copyright 2021 Robin Maasjosthusmann. All rights reserved.
+# Use of this source code is governed by a BSD-style
+# license that can be found in the LICENSE file.
+"""
+Benchmark suite
+
+Times the startup (fresh interpreter) and the hot paths of csv_labeler on a synthetic
+transaction csv file (see synthetic.py): csv load, rendering of the relevant columns, keyword highlighting,
+tab completion of the categories, label suggestions, label assignment and save. The results are written
+as JSON, so runs of different commits can be compared with --compare.
+
+Usage: poetry run python -m benchmarks.suite --rows 10000 --output bench.json
+"""
+
+import argparse
+import contextlib
+import io
+import itertools
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+from unittest import mock
+
+import pandas as pd
+
+from benchmarks.synthetic import generate_csv, make_settings
+from csv_labeler import main as labeler
+from csv_labeler.suggest import LabelSuggester
+from csv_labeler.tab_completer import TabCompleter
+
+# Dependencies that must not be imported before the first prompt
+HEAVY_MODULES = ("pandas", "numpy", "loguru", "fast_autocomplete", "pkg_resources")
+
+_STARTUP_SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+from csv_labeler import main
+main.parse_args([])
+main.load_settings("config.ini")
+seconds = time.perf_counter() - start
+print(json.dumps({"seconds": seconds, "modules": sorted(sys.modules)}))
+"""
+
+
+def measure(func: Callable[[], Any], repeat: int, operations: int = 1) -> Dict:
+    """
+    Runs the function {repeat} times.
+
+    Parameters
+    ----------
+    func : Callable[[], Any]
+        Function to time
+    repeat : int
+        Number of runs
+    operations : int
+        Number of operations (rows, calls...) of a single run
+
+    Returns
+    -------
+    Dict
+        Min, median and mean time of a run and the median time per operation in
+        seconds
+    """
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    median = statistics.median(timings)
+    return {
+        "min": min(timings),
+        "median": median,
+        "mean": statistics.mean(timings),
+        "operations": operations,
+        "per_operation": median / operations,
+    }
+
+
+def startup_probe() -> Dict:
+    """
+    Imports csv_labeler, parses the arguments and loads the config.ini in a fresh
+    interpreter (everything that happens before the first prompt).
+
+    Returns
+    -------
+    Dict
+        Time of the startup in seconds and the heavy dependencies that were imported
+    """
+    result = subprocess.run(
+        [sys.executable, "-c", _STARTUP_SCRIPT],
+        capture_output=True,
+        check=True,
+        cwd=Path(__file__).resolve().parents[1],
+        text=True,
+    )
+    probe = json.loads(result.stdout.splitlines()[-1])
+    return {
+        "seconds": probe["seconds"],
+        "modules": [x for x in HEAVY_MODULES if x in probe["modules"]],
+    }
+
+
+def run_suite(args: argparse.Namespace) -> Dict:
+    """
+    Runs all benchmarks.
+
+    Parameters
+    ----------
+    args : argparse.Namespace
+        Parsed command line arguments
+
+    Returns
+    -------
+    Dict
+        Metadata and results (see measure) per benchmark
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        data = generate_csv(
+            Path(directory) / "transactions.csv",
+            rows=args.rows,
+            extra_columns=args.columns,
+            text_length=args.text_length,
+            keyword_count=args.keywords,
+            label_count=args.labels,
+            seed=args.seed,
+        )
+        settings = make_settings(
+            data,
+            general={"prefetch_depth": "0"},
+            grouping={"mode": "off"},
+        )
+        results: Dict[str, Dict] = {}
+        results["startup"] = measure(startup_probe, args.repeat)
+
+        def load() -> pd.DataFrame:
+            return pd.read_csv(data.path, sep=settings.sep)
+
+        results["csv_load"] = measure(load, args.repeat, args.rows)
+        df = load()
+        sample = [row for _, row in df.head(args.sample).iterrows()]
+        texts = df["memo"].head(args.sample).tolist()
+
+        def render() -> None:
+            for row in sample:
+                labeler.print_relevant_columns(row, settings)
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            results["render"] = measure(render, args.repeat, len(sample))
+
+        results["highlight_keywords"] = measure(
+            lambda: [labeler.highlight_keywords(text, data.keywords) for text in texts],
+            args.repeat,
+            len(texts),
+        )
+        results["highlighter"] = measure(
+            lambda: [settings.highlighter.highlight(text) for text in texts],
+            args.repeat,
+            len(texts),
+        )
+
+        prefixes = [label[:length] for label in data.labels for length in (1, 3, 5)]
+
+        def complete() -> None:
+            completer = TabCompleter(settings)
+            completer.create_list_completer(list(settings.labels))
+            for prefix in prefixes:
+                state = 0
+                while completer.list_completer(prefix, state) is not None:
+                    state += 1
+
+        results["tab_completion"] = measure(complete, args.repeat, len(prefixes))
+
+        suggester = LabelSuggester(data.labels)
+        suggester.learn_rows(([text] for text in texts), itertools.cycle(data.labels))
+        tokens = [suggester.tokenize([text]) for text in texts]
+        results["suggest"] = measure(
+            lambda: [suggester.suggest(x) for x in tokens], args.repeat, len(tokens)
+        )
+
+        def assign() -> None:
+            labels = itertools.cycle(settings.labels)
+            with mock.patch.object(
+                labeler, "get_classification", lambda *_args, **_kwargs: next(labels)
+            ):
+                labeler.label_dataframe(df.copy(), False, settings)
+
+        results["label_assignment"] = measure(assign, args.repeat, args.rows)
+
+        target = Path(directory) / "labeled.csv"
+        results["save"] = measure(
+            lambda: df.to_csv(target, sep=settings.sep, index=False),
+            args.repeat,
+            args.rows,
+        )
+
+    return {"meta": _metadata(args), "results": results}
+
+
+def compare(current: Dict, previous: Dict) -> List[str]:
+    """
+    Compares the median times of two runs.
+
+    Parameters
+    ----------
+    current : Dict
+        Result of run_suite
+    previous : Dict
+        Result of an earlier run (e.g. another commit)
+
+    Returns
+    -------
+    List[str]
+        Lines of the comparison table
+    """
+    lines = [f"{'benchmark':<20} {'previous [ms]':>14} {'current [ms]':>14} {'ratio':>8}"]
+    for name, result in current["results"].items():
+        old = previous.get("results", {}).get(name)
+        if old is None:
+            continue
+        ratio = result["median"] / old["median"] if old["median"] else float("inf")
+        lines.append(
+            f"{name:<20} {old['median'] * 1e3:>14.2f}"
+            f" {result['median'] * 1e3:>14.2f} {ratio:>8.2f}"
+        )
+    return lines
+
+
+def _metadata(args: argparse.Namespace) -> Dict:
+    return {
+        "commit": _git_commit(),
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "platform": platform.platform(),
+        "parameters": vars(args).copy(),
+    }
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            capture_output=True,
+            check=True,
+            text=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """Parses the command line arguments"""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--columns", type=int, default=2, help="extra text columns")
+    parser.add_argument("--text-length", type=int, default=80)
+    parser.add_argument("--keywords", type=int, default=10)
+    parser.add_argument("--labels", type=int, default=8)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument(
+        "--sample", type=int, default=500, help="rows used for rendering/highlighting"
+    )
+    parser.add_argument("--output", help="JSON file for the results (default stdout)")
+    parser.add_argument("--compare", help="JSON file of an earlier run")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Runs the suite and writes the results"""
+    args = parse_args(argv)
+    results = run_suite(args)
+    report = json.dumps(results, indent=2)
+    if args.output:
+        Path(args.output).write_text(report + "\n", encoding="utf-8")
+    else:
+        print(report)
+    if args.compare:
+        previous = json.loads(Path(args.compare).read_text(encoding="utf-8"))
+        print("\n".join(compare(results, previous)), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
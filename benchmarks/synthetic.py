@@ -0,0 +1,158 @@
+# Copyright 2021 Robin Maasjosthusmann. All rights reserved.
+# Use of this source code is governed by a BSD-style
+# license that can be found in the LICENSE file.
+"""
+Synthetic transaction csv files
+
+Seeded generator for bank exports like the ones csv_labeler is used for: date, payee,
+memo, amount, additional text columns and an (empty) category column. The same seed
+and parameters always produce the same file.
+"""
+
+import configparser
+import csv
+import random
+import string
+from pathlib import Path
+from typing import List, NamedTuple, Union
+
+from csv_labeler.settings import Settings
+
+PAYEES = (
+    "Amazon Marketplace",
+    "Netflix International B.V.",
+    "Uber BV",
+    "Microsoft Ireland",
+    "REWE Markt",
+    "Shell Station",
+    "Deutsche Bahn",
+    "Spotify AB",
+)
+
+
+class SyntheticCsv(NamedTuple):
+    """
+    Generated csv file with the keywords and labels for its config
+    """
+
+    path: Path
+    columns: List[str]
+    keywords: List[str]
+    labels: List[str]
+
+
+def generate_csv(
+    path: Union[str, Path],
+    rows: int = 10_000,
+    extra_columns: int = 2,
+    text_length: int = 80,
+    keyword_count: int = 10,
+    label_count: int = 8,
+    seed: int = 42,
+) -> SyntheticCsv:
+    """
+    Writes a synthetic transaction csv file (";" separated).
+
+    Parameters
+    ----------
+    path : Union[str, Path]
+        Target file
+    rows : int
+        Number of transactions
+    extra_columns : int
+        Number of additional free text columns (info_1, info_2...)
+    text_length : int
+        Approximate number of characters of the memo and the free text columns
+    keyword_count : int
+        Number of keywords, some of them occur inside of the memo texts
+    label_count : int
+        Number of labels
+    seed : int
+        Seed of the random generator
+
+    Returns
+    -------
+    SyntheticCsv
+        Path, columns, keywords and labels of the file
+    """
+    rng = random.Random(seed)
+    keywords = [payee.split()[0] for payee in PAYEES][:keyword_count]
+    while len(keywords) < keyword_count:
+        keywords.append(_word(rng, 5, 10))
+    labels = [f"Label {i + 1}" for i in range(label_count)]
+    columns = ["date", "payee", "memo", "amount"]
+    columns += [f"info_{i + 1}" for i in range(extra_columns)]
+    columns.append("category")
+
+    path = Path(path)
+    with open(path, "w", newline="", encoding="utf-8") as file:
+        writer = csv.writer(file, delimiter=";")
+        writer.writerow(columns)
+        for _ in range(rows):
+            memo = _text(rng, text_length, keywords)
+            writer.writerow(
+                [
+                    f"{rng.randint(1, 28):02}.{rng.randint(1, 12):02}.2021",
+                    rng.choice(PAYEES),
+                    memo,
+                    f"{rng.uniform(-500, 100):.2f}".replace(".", ","),
+                    *(_text(rng, text_length, ()) for _ in range(extra_columns)),
+                    "",
+                ]
+            )
+    return SyntheticCsv(path, columns, keywords, labels)
+
+
+def make_settings(data: SyntheticCsv, **sections: dict) -> Settings:
+    """
+    Creates the settings for a generated file, the passed sections are merged into
+    the config.
+
+    Parameters
+    ----------
+    data : SyntheticCsv
+        Generated file
+    **sections : dict
+        Additional config sections
+
+    Returns
+    -------
+    Settings
+        Settings with all columns except of the category as relevant columns
+    """
+    config = configparser.ConfigParser()
+    config.read_dict(
+        {
+            "general": {"line_length": "120", "name_value_seperator_width": "4"},
+            "csv": {
+                "sep": ";",
+                "relevant_columns": repr(data.columns[:-1]),
+                "label_column": "category",
+            },
+            "classification": {
+                "keywords": repr(data.keywords),
+                "labels": repr(data.labels),
+            },
+            "highlighting": {"foreground": "BLACK", "background": "YELLOW"},
+            "journal": {"enabled": "False"},
+        }
+    )
+    config.read_dict(sections)
+    return Settings.from_config(config)
+
+
+def _word(rng: random.Random, minimum: int, maximum: int) -> str:
+    return "".join(rng.choices(string.ascii_lowercase, k=rng.randint(minimum, maximum)))
+
+
+def _text(rng: random.Random, length: int, keywords) -> str:
+    words: List[str] = []
+    size = 0
+    while size < length:
+        if keywords and rng.random() < 0.1:
+            word = rng.choice(keywords)
+        else:
+            word = _word(rng, 2, 10)
+        words.append(word)
+        size += len(word) + 1
+    return " ".join(words)
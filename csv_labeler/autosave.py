@@ -0,0 +1,166 @@
+# Copyright 2021 Robin Maasjosthusmann. All rights reserved.
+# Use of this source code is governed by a BSD-style
+# license that can be found in the LICENSE file.
+"""
+Autosave
+
+Writes the labels of the current session into the csv file while the user is still
+labeling. The labeling loop only copies the label column (a snapshot) once a row or
+time interval is due, a background task streams the snapshot into the csv file
+(see pruned.write_labels), so the input prompt is never blocked by a save.
+"""
+
+from __future__ import annotations
+
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING, Optional, Sequence, Union
+
+from csv_labeler import pruned
+from csv_labeler.lazy import lazy_import, logger
+from csv_labeler.tasks import TaskRunner
+
+if TYPE_CHECKING:
+    from concurrent.futures import Future
+
+    import numpy as np
+    import pandas as pd
+else:
+    np = lazy_import("numpy")
+    pd = lazy_import("pandas")
+
+
+class Autosaver:
+    """
+    Background autosave of the label column, at most one snapshot is pending (a newer
+    snapshot replaces it if its save did not start yet).
+    """
+
+    def __init__(
+        self,
+        csv_filepath: Union[str, Path],
+        sep: str,
+        label_column: str,
+        labels: Sequence,
+        interval: float = 60.0,
+        rows: int = 500,
+        tasks: Optional[TaskRunner] = None,
+    ) -> None:
+        """
+        Parameters
+        ----------
+        csv_filepath : Union[str, Path]
+            Path to the csv file
+        sep : str
+            Separator used inside of the csv file
+        label_column : str
+            Name of the column which contains the labels
+        labels : Sequence
+            Label column (Series or list) as it is stored in the csv file (before
+            labeling)
+        interval : float
+            Seconds after which labeled rows are saved, 0 disables the time interval
+        rows : int
+            Number of labeled rows after which they are saved, 0 disables it
+        tasks : Optional[TaskRunner]
+            Runs the saves, an own runner is used if none is passed
+        """
+        self.csv_filepath = Path(csv_filepath)
+        self.sep = sep
+        self.label_column = label_column
+        self.interval = interval
+        self.rows = rows
+        self.saves = 0
+        self._original = np.array(labels, dtype=object)
+        self._written: Optional[np.ndarray] = None
+        self._unsaved = 0
+        self._last_save = time.monotonic()
+        self._owns_tasks = tasks is None
+        self.tasks = tasks if tasks is not None else TaskRunner("csv_labeler-autosave")
+        self._pending: Optional[Future] = None
+
+    def __enter__(self) -> "Autosaver":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def row_labeled(self, labels: Sequence, count: int = 1) -> None:
+        """
+        Counts labeled rows and schedules the save of a snapshot of the labels if the
+        row or time interval is due.
+
+        Parameters
+        ----------
+        labels : Sequence
+            Current label column
+        count : int
+            Number of rows that were labeled
+        """
+        self._unsaved += count
+        if not self._unsaved:
+            return
+        due_rows = self.rows > 0 and self._unsaved >= self.rows
+        due_time = (
+            self.interval > 0 and time.monotonic() - self._last_save >= self.interval
+        )
+        if due_rows or due_time:
+            self.flush(labels)
+
+    def flush(self, labels: Sequence) -> None:
+        """
+        Schedules the save of a snapshot of the labels.
+
+        Parameters
+        ----------
+        labels : Sequence
+            Current label column
+        """
+        snapshot = np.array(labels, dtype=object)
+        if self._pending is not None:
+            self._pending.cancel()
+        self._pending = self.tasks.run_blocking(self._write, snapshot)
+        self._unsaved = 0
+        self._last_save = time.monotonic()
+
+    def close(self) -> None:
+        """
+        Waits for the pending save.
+        """
+        if self._pending is not None:
+            # Also covers a replaced save that was already running
+            self.tasks.wait_blocking()
+            self._pending = None
+        if self._owns_tasks:
+            self.tasks.close()
+
+    def discard(self) -> None:
+        """
+        Restores the labels the csv file had before the session (the user does not
+        want to save). Only rows changed by an autosave are rewritten.
+        """
+        if self._pending is not None:
+            self._pending.cancel()
+        self.close()
+        if self._written is None:
+            return
+        changed = self._written != self._original
+        changed &= ~(pd.isna(self._written) & pd.isna(self._original))
+        restore = np.full(len(self._original), np.nan, dtype=object)
+        # An empty string clears the label field of rows that had no label
+        restore[changed] = np.where(
+            pd.isna(self._original[changed]), "", self._original[changed]
+        )
+        pruned.write_labels(self.csv_filepath, self.sep, self.label_column, restore)
+
+    def _write(self, snapshot: np.ndarray) -> None:
+        try:
+            pruned.write_labels(
+                self.csv_filepath, self.sep, self.label_column, snapshot
+            )
+        except (OSError, ValueError) as error:
+            logger.warning(f"Autosave of {self.csv_filepath} failed: {error}")
+            return
+        self._written = snapshot
+        self.saves += 1
+        logger.debug(f"Autosaved the labels to {self.csv_filepath}")
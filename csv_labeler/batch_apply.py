@@ -0,0 +1,233 @@
+# Copyright 2021 Robin Maasjosthusmann. All rights reserved.
+# Use of this source code is governed by a BSD-style
+# license that can be found in the LICENSE file.
+"""
+Batch apply
+
+Non-interactive entry point that applies labels produced by another system. The
+mapping file contains a key and a label per line, the labels are joined onto the csv
+file with a vectorized lookup on the key column and the result is written once.
+
+Usage: csv_labeler_batch export.csv labels.csv --key-column iban
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+from pathlib import Path
+from typing import TYPE_CHECKING, Iterator, Optional, Sequence, Union
+
+from csv_labeler import streaming
+from csv_labeler.lazy import lazy_import, logger
+from csv_labeler.settings import load_settings
+
+if TYPE_CHECKING:
+    import pandas as pd
+else:
+    pd = lazy_import("pandas")
+
+
+def load_mapping(mapping_filepath: Union[str, Path], sep: str = ",") -> pd.Series:
+    """
+    Reads the key -> label mapping. Csv files must contain the key in the first and
+    the label in the second column (with a header), json files must contain an object.
+    Keys are compared as strings, the last label of a duplicated key wins.
+
+    Parameters
+    ----------
+    mapping_filepath : Union[str, Path]
+        Path to the mapping file (.csv or .json)
+    sep : str
+        Separator of the mapping csv file
+
+    Returns
+    -------
+    pd.Series
+        Labels indexed by key
+    """
+    mapping_filepath = Path(mapping_filepath)
+    if mapping_filepath.suffix.casefold() == ".json":
+        with open(mapping_filepath, encoding="utf-8") as file:
+            data = json.load(file)
+        if not isinstance(data, dict):
+            raise ValueError("The json mapping must be an object (key -> label)")
+        mapping = pd.Series(data, dtype=object)
+    else:
+        table = pd.read_csv(mapping_filepath, sep=sep, dtype=str, keep_default_na=False)
+        if table.shape[1] < 2:
+            raise ValueError("The mapping file needs a key and a label column")
+        mapping = pd.Series(table.iloc[:, 1].to_numpy(), index=table.iloc[:, 0])
+    mapping.index = mapping.index.astype(str)
+    mapping = mapping[mapping.astype(str).str.len() > 0]
+    return mapping[~mapping.index.duplicated(keep="last")]
+
+
+def apply_mapping(
+    df: pd.DataFrame,
+    mapping: pd.Series,
+    key_column: str,
+    label_column: str,
+    keep_label: bool,
+) -> int:
+    """
+    Sets the label of every row whose key is part of the mapping (in place).
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        DataFrame (or chunk of the csv file) with the key and the label column
+    mapping : pd.Series
+        Labels indexed by key, see load_mapping
+    key_column : str
+        Column with the keys of the mapping
+    label_column : str
+        Name of the column which contains the labels
+    keep_label : bool
+        Should existing labels be retained (same as handle_existing_labels)
+
+    Returns
+    -------
+    int
+        Number of labeled rows
+    """
+    if key_column not in df.columns:
+        raise ValueError(f"Key column {key_column} does not exist")
+    keys = df[key_column]
+    if not pd.api.types.is_string_dtype(keys):
+        keys = keys.astype(str)
+    labels = keys.map(mapping)
+    mask = labels.notna().to_numpy()
+    if keep_label:
+        mask = mask & df[label_column].isna().to_numpy()
+    df[label_column] = df[label_column].astype(object).mask(mask, labels)
+    return int(mask.sum())
+
+
+def apply_mapping_to_csv(
+    csv_filepath: Union[str, Path],
+    mapping: pd.Series,
+    key_column: str,
+    label_column: str,
+    keep_label: bool,
+    sep: str,
+    chunksize: int = 0,
+    output_filepath: Union[str, Path, None] = None,
+) -> int:
+    """
+    Applies the mapping to the csv file and writes the result once. The csv file is
+    replaced (atomically) if no output file is passed.
+
+    Parameters
+    ----------
+    csv_filepath : Union[str, Path]
+        Path to the csv file
+    mapping : pd.Series
+        Labels indexed by key, see load_mapping
+    key_column : str
+        Column with the keys of the mapping
+    label_column : str
+        Name of the column which contains the labels
+    keep_label : bool
+        Should existing labels be retained
+    sep : str
+        Separator used inside of the csv file
+    chunksize : int
+        Number of rows per chunk, 0 reads the whole file at once
+    output_filepath : Union[str, Path, None]
+        Target file, defaults to the csv file
+
+    Returns
+    -------
+    int
+        Number of labeled rows
+    """
+    writer = streaming.ChunkWriter(Path(output_filepath or csv_filepath), sep)
+    labeled = 0
+    try:
+        for chunk in _read(csv_filepath, sep, key_column, chunksize):
+            labeled += apply_mapping(chunk, mapping, key_column, label_column, keep_label)
+            writer.write(chunk)
+    except BaseException:
+        writer.discard()
+        raise
+    writer.commit()
+    return labeled
+
+
+def _read(
+    csv_filepath: Union[str, Path], sep: str, key_column: str, chunksize: int
+) -> Iterator[pd.DataFrame]:
+    # Keys are read as strings, so "007" and 7 are not mixed up
+    if chunksize > 0:
+        with pd.read_csv(
+            csv_filepath, sep=sep, chunksize=chunksize, dtype={key_column: str}
+        ) as reader:
+            yield from reader
+    else:
+        yield pd.read_csv(csv_filepath, sep=sep, dtype={key_column: str})
+
+
+def parse_args(argv: Optional[Sequence[str]] = None) -> argparse.Namespace:
+    """
+    Parses the command line arguments.
+
+    Parameters
+    ----------
+    argv : Optional[Sequence[str]]
+        Arguments, defaults to sys.argv
+
+    Returns
+    -------
+    argparse.Namespace
+        Parsed arguments
+    """
+    parser = argparse.ArgumentParser(
+        description="Applies the labels of a key -> label mapping to a csv file"
+    )
+    parser.add_argument("csv_file", help="csv file to label")
+    parser.add_argument("mapping_file", help="csv (key, label) or json mapping")
+    parser.add_argument("--key-column", required=True, help="column with the keys")
+    parser.add_argument("--mapping-sep", default=",", help="separator of the mapping")
+    parser.add_argument(
+        "--overwrite",
+        action="store_true",
+        help="replace existing labels (by default existing labels are kept)",
+    )
+    parser.add_argument("--output", help="write the result to this file instead")
+    parser.add_argument("--config", default="config.ini", help="path to config.ini")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    """
+    Batch apply
+
+    Applies externally produced labels without the interactive loop
+    """
+    args = parse_args(argv)
+    settings = load_settings(args.config)
+    try:
+        mapping = load_mapping(args.mapping_file, args.mapping_sep)
+        labeled = apply_mapping_to_csv(
+            args.csv_file,
+            mapping,
+            args.key_column,
+            settings.label_column,
+            not args.overwrite,
+            settings.sep,
+            settings.chunksize,
+            args.output,
+        )
+    except (OSError, ValueError) as error:
+        logger.error(error)
+        sys.exit(1)
+    logger.info(
+        f"Applied {labeled} labels from {len(mapping)} keys to"
+        f" {args.output or args.csv_file}"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,329 @@
+# Copyright 2021 Robin Maasjosthusmann. All rights reserved.
+# Use of this source code is governed by a BSD-style
+# license that can be found in the LICENSE file.
+"""
+Sidecar cache
+
+The parsed csv file is stored in a columnar sidecar next to it (.<name>.feather,
+memory-mapped when read, or .<name>.npz if pyarrow is not installed). The npz sidecar
+holds one plain numpy array per column (text columns as joined UTF-8 bytes and a mask
+of the missing values) and is loaded without pickle, a sidecar inside of a shared
+folder can not run code. The sidecar is only used if it was written for the current
+content of the csv file: size and mtime have to match, if only the mtime changed
+(e.g. the file was copied) the content hash decides. Saving the labels through
+write_csv keeps the sidecar in sync.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, List, Optional, Union
+
+from csv_labeler import streaming
+from csv_labeler.lazy import lazy_import, logger
+
+if TYPE_CHECKING:
+    import numpy as np
+    import pandas as pd
+else:
+    np = lazy_import("numpy")
+    pd = lazy_import("pandas")
+
+try:
+    from pyarrow import feather
+except ImportError:  # pragma: no cover - depends on the installed extras
+    feather = None
+
+CACHE_VERSION = 2
+_HASH_BLOCK_SIZE = 1 << 20
+
+
+def sidecar_paths(csv_filepath: Union[str, Path]) -> Dict[str, Path]:
+    """
+    Returns the paths of the data and the metadata file of the sidecar.
+
+    Parameters
+    ----------
+    csv_filepath : Union[str, Path]
+        Path to the csv file
+
+    Returns
+    -------
+    Dict[str, Path]
+        "data" and "meta" path
+    """
+    csv_filepath = Path(csv_filepath)
+    suffix = ".feather" if feather is not None else ".npz"
+    return {
+        "data": csv_filepath.with_name(f".{csv_filepath.name}{suffix}"),
+        "meta": csv_filepath.with_name(f".{csv_filepath.name}.cache.json"),
+    }
+
+
+def file_hash(path: Union[str, Path]) -> str:
+    """
+    Hashes the content of the file.
+
+    Parameters
+    ----------
+    path : Union[str, Path]
+        File to hash
+
+    Returns
+    -------
+    str
+        blake2b hex digest
+    """
+    digest = hashlib.blake2b(digest_size=20)
+    with open(path, "rb") as file:
+        for block in iter(lambda: file.read(_HASH_BLOCK_SIZE), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def read_csv_cached(
+    csv_filepath: Union[str, Path], sep: str, enabled: bool = True
+) -> pd.DataFrame:
+    """
+    Reads the csv file from its sidecar if the sidecar is up to date, otherwise the
+    csv file is parsed and the sidecar is (re)written.
+
+    Parameters
+    ----------
+    csv_filepath : Union[str, Path]
+        Path to the csv file
+    sep : str
+        Separator used inside of the csv file
+    enabled : bool
+        False bypasses the cache completely
+
+    Returns
+    -------
+    pd.DataFrame
+        Content of the csv file
+    """
+    if not enabled:
+        return pd.read_csv(csv_filepath, sep=sep)
+    df = load_sidecar(csv_filepath, sep)
+    if df is None:
+        df = pd.read_csv(csv_filepath, sep=sep)
+        write_sidecar(df, csv_filepath, sep)
+    return df
+
+
+def write_csv(
+    df: pd.DataFrame, csv_filepath: Union[str, Path], sep: str, enabled: bool = True
+) -> None:
+    """
+    Writes the DataFrame to the csv file (atomically) and updates the sidecar.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        DataFrame to save
+    csv_filepath : Union[str, Path]
+        Path to the csv file
+    sep : str
+        Separator used inside of the csv file
+    enabled : bool
+        False only writes the csv file
+    """
+    temp_path = streaming.make_temp_file(csv_filepath)
+    try:
+        df.to_csv(temp_path, sep=sep, index=False)
+        streaming.replace_file(temp_path, csv_filepath)
+    finally:
+        if temp_path.exists():
+            os.remove(temp_path)
+    if enabled:
+        write_sidecar(df, csv_filepath, sep)
+
+
+def load_sidecar(csv_filepath: Union[str, Path], sep: str) -> Optional[pd.DataFrame]:
+    """
+    Loads the sidecar of the csv file.
+
+    Parameters
+    ----------
+    csv_filepath : Union[str, Path]
+        Path to the csv file
+    sep : str
+        Separator used inside of the csv file
+
+    Returns
+    -------
+    Optional[pd.DataFrame]
+        Cached content, None if there is no sidecar for the current content
+    """
+    paths = sidecar_paths(csv_filepath)
+    try:
+        with open(paths["meta"], encoding="utf-8") as file:
+            meta = json.load(file)
+        stat = os.stat(csv_filepath)
+    except (OSError, ValueError):
+        return None
+    if (
+        meta.get("version") != CACHE_VERSION
+        or meta.get("sep") != sep
+        or meta.get("data") != paths["data"].name
+        or meta.get("size") != stat.st_size
+    ):
+        return None
+    if meta.get("mtime_ns") != stat.st_mtime_ns:
+        if meta.get("hash") != file_hash(csv_filepath):
+            return None
+        # Same content (e.g. copied file), only the mtime changed
+        meta["mtime_ns"] = stat.st_mtime_ns
+        _write_meta(paths["meta"], meta)
+    try:
+        if feather is not None:
+            df = feather.read_table(paths["data"], memory_map=True).to_pandas()
+        else:
+            df = _read_columns(paths["data"])
+    except Exception as error:  # pylint: disable=broad-except
+        logger.debug(f"Sidecar of {csv_filepath} could not be read: {error}")
+        return None
+    logger.debug(f"Loaded {csv_filepath} from its sidecar")
+    return df
+
+
+def write_sidecar(df: pd.DataFrame, csv_filepath: Union[str, Path], sep: str) -> bool:
+    """
+    Writes the sidecar for the current content of the csv file. A sidecar that can
+    not be written (e.g. read-only directory, column types feather or the npz
+    fallback can not store) is removed, the csv file stays the source of truth.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        Parsed content of the csv file
+    csv_filepath : Union[str, Path]
+        Path to the csv file
+    sep : str
+        Separator used inside of the csv file
+
+    Returns
+    -------
+    bool
+        True if the sidecar was written
+    """
+    paths = sidecar_paths(csv_filepath)
+    temp_path = paths["data"].with_name(paths["data"].name + ".tmp")
+    try:
+        stat = os.stat(csv_filepath)
+        meta = {
+            "version": CACHE_VERSION,
+            "sep": sep,
+            "data": paths["data"].name,
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "hash": file_hash(csv_filepath),
+        }
+        # Metadata first, a sidecar without valid metadata is never used
+        if paths["meta"].exists():
+            os.remove(paths["meta"])
+        if feather is not None:
+            feather.write_feather(df.reset_index(drop=True), temp_path)
+        else:
+            _write_columns(df, temp_path)
+        os.replace(temp_path, paths["data"])
+        _write_meta(paths["meta"], meta)
+    except Exception as error:  # pylint: disable=broad-except
+        logger.debug(f"Sidecar of {csv_filepath} could not be written: {error}")
+        remove_sidecar(csv_filepath)
+        return False
+    finally:
+        if temp_path.exists():
+            os.remove(temp_path)
+    return True
+
+
+def remove_sidecar(csv_filepath: Union[str, Path]) -> None:
+    """
+    Removes the sidecar of the csv file.
+
+    Parameters
+    ----------
+    csv_filepath : Union[str, Path]
+        Path to the csv file
+    """
+    for path in sidecar_paths(csv_filepath).values():
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+def _write_meta(path: Path, meta: Dict) -> None:
+    temp_path = path.with_name(path.name + ".tmp")
+    with open(temp_path, "w", encoding="utf-8") as file:
+        json.dump(meta, file)
+    os.replace(temp_path, path)
+
+
+def _write_columns(df: pd.DataFrame, path: Path) -> None:
+    """
+    Writes the DataFrame as npz file with one array per column. Text columns are
+    stored as NUL separated UTF-8 bytes plus a mask of the missing values, so no
+    column needs pickle.
+    """
+    layout: List[Dict] = []
+    arrays: Dict[str, np.ndarray] = {}
+    for position, name in enumerate(df.columns):
+        if not isinstance(name, str):
+            raise TypeError(f"Column name {name!r} is not a string")
+        series = df.iloc[:, position]
+        key = f"column{position}"
+        if series.dtype == object or pd.api.types.is_string_dtype(series.dtype):
+            missing = series.isna().to_numpy(dtype=bool)
+            values = series.to_numpy(dtype=object)[~missing]
+            if not all(
+                isinstance(value, str) and "\0" not in value for value in values
+            ):
+                raise TypeError(f"Column {name} does not only contain text")
+            full = np.full(len(series), "", dtype=object)
+            full[~missing] = values
+            joined = "\0".join(full).encode("utf-8")
+            arrays[key] = np.frombuffer(joined, dtype=np.uint8)
+            arrays[f"{key}_missing"] = missing
+            layout.append({"name": name, "dtype": str(series.dtype), "text": True})
+        else:
+            values = series.to_numpy()
+            if values.dtype == object:
+                raise TypeError(
+                    f"Column {name} has the unsupported type {series.dtype}"
+                )
+            arrays[key] = values
+            layout.append({"name": name, "dtype": str(series.dtype), "text": False})
+    arrays["layout"] = np.array(json.dumps({"rows": len(df), "columns": layout}))
+    # A file object, np.savez would append .npz to the temporary name
+    with open(path, "wb") as file:
+        np.savez(file, **arrays)
+
+
+def _read_columns(path: Path) -> pd.DataFrame:
+    """
+    Reads a DataFrame written by _write_columns, pickled objects are rejected.
+    """
+    with np.load(path, allow_pickle=False) as arrays:
+        layout = json.loads(str(arrays["layout"]))
+        columns = {}
+        for position, column in enumerate(layout["columns"]):
+            key = f"column{position}"
+            if not column["text"]:
+                columns[position] = arrays[key]
+                continue
+            values = np.empty(layout["rows"], dtype=object)
+            if layout["rows"]:
+                values[:] = arrays[key].tobytes().decode("utf-8").split("\0")
+            values[arrays[f"{key}_missing"]] = np.nan
+            series = pd.Series(values, dtype=object)
+            if column["dtype"] != "object":
+                series = series.astype(column["dtype"])
+            columns[position] = series
+    df = pd.DataFrame(columns)
+    df.columns = [column["name"] for column in layout["columns"]]
+    return df
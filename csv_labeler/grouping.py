@@ -0,0 +1,207 @@
+# Copyright 2021 Robin Maasjosthusmann. All rights reserved.
+# Use of this source code is governed by a BSD-style
+# license that can be found in the LICENSE file.
+"""
+Grouping
+
+Groups rows with the same (or nearly the same) relevant-column text, so one label can
+be applied to a whole group of recurring transactions. The text of a row is
+normalized (case, whitespace and digits, so dates and amounts do not split a group)
+and factorized in a single pass. The optional near-duplicate mode compares the
+distinct texts with MinHash signatures of character shingles and joins texts that
+share a locality sensitive hashing (LSH) bucket.
+"""
+
+from __future__ import annotations
+
+import zlib
+from typing import TYPE_CHECKING, Dict, List, Sequence, Tuple
+
+from csv_labeler.lazy import lazy_import
+
+if TYPE_CHECKING:
+    import numpy as np
+    import pandas as pd
+else:
+    np = lazy_import("numpy")
+    pd = lazy_import("pandas")
+
+
+MODES = ("off", "exact", "near")
+
+_PRIME = (1 << 31) - 1
+_SHINGLE_SIZE = 4
+_BANDS = 8
+_ROWS_PER_BAND = 4
+
+
+class RowGroups:
+    """
+    Group id per row position with a lookup of all members of a group.
+    """
+
+    def __init__(self, group_ids: np.ndarray) -> None:
+        self.group_ids = np.asarray(group_ids, dtype=np.int64)
+        self.sizes = np.bincount(self.group_ids) if len(self.group_ids) else []
+        self._order = np.argsort(self.group_ids, kind="stable")
+        self._offsets = np.concatenate(([0], np.cumsum(self.sizes))).astype(np.int64)
+
+    def members(self, position: int) -> np.ndarray:
+        """
+        Returns the positions of all rows in the group of the row (including the row
+        itself), in ascending order.
+
+        Parameters
+        ----------
+        position : int
+            Position of the row
+
+        Returns
+        -------
+        np.ndarray
+            Positions of the group members
+        """
+        group = self.group_ids[position]
+        start, end = self._offsets[group], self._offsets[group + 1]
+        return self._order[start:end]
+
+
+def normalize_text(df: pd.DataFrame, columns: Sequence[str]) -> pd.Series:
+    """
+    Joins the normalized text of the columns per row.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        DataFrame (or chunk of the csv file)
+    columns : Sequence[str]
+        Columns that identify a group
+
+    Returns
+    -------
+    pd.Series
+        Normalized text per row
+    """
+    parts = []
+    for column in columns:
+        text = df[column].astype(object).where(df[column].notna(), "").astype(str)
+        text = text.str.casefold().str.replace(r"\d+", "#", regex=True)
+        parts.append(text.str.replace(r"\s+", " ", regex=True).str.strip())
+    if not parts:
+        return pd.Series([""] * len(df), index=df.index)
+    joined = parts[0]
+    for part in parts[1:]:
+        joined = joined + "\x1f" + part
+    return joined
+
+
+def group_rows(
+    df: pd.DataFrame,
+    columns: Sequence[str],
+    mode: str = "exact",
+    threshold: float = 0.8,
+) -> RowGroups:
+    """
+    Groups the rows of the DataFrame. Rows without any text are never grouped.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        DataFrame (or chunk of the csv file)
+    columns : Sequence[str]
+        Columns that identify a group
+    mode : str
+        "exact" for equal normalized text, "near" for similar text
+    threshold : float
+        Minimal estimated Jaccard similarity of the shingles (only "near")
+
+    Returns
+    -------
+    RowGroups
+        Group per row
+    """
+    text = normalize_text(df, columns)
+    codes, uniques = pd.factorize(text)
+    uniques = list(uniques)
+    if mode == "near" and len(uniques) > 1:
+        codes = _near_duplicate_groups(uniques, threshold)[codes]
+        _, codes = np.unique(codes, return_inverse=True)
+    codes = np.asarray(codes, dtype=np.int64).copy()
+
+    # Rows without text get a group of their own
+    empty = np.flatnonzero(~text.str.strip("\x1f ").astype(bool).to_numpy())
+    if len(empty):
+        start = codes.max() + 1 if len(codes) else 0
+        codes[empty] = np.arange(start, start + len(empty))
+        _, codes = np.unique(codes, return_inverse=True)
+    return RowGroups(codes)
+
+
+def minhash_signatures(texts: Sequence[str], num_perm: int) -> np.ndarray:
+    """
+    Computes the MinHash signature of the character shingles of every text.
+
+    Parameters
+    ----------
+    texts : Sequence[str]
+        Distinct texts
+    num_perm : int
+        Number of hash functions (length of a signature)
+
+    Returns
+    -------
+    np.ndarray
+        Signatures, shape (len(texts), num_perm)
+    """
+    generator = np.random.default_rng(42)
+    slopes = generator.integers(1, _PRIME, size=num_perm, dtype=np.int64)
+    intercepts = generator.integers(0, _PRIME, size=num_perm, dtype=np.int64)
+    signatures = np.empty((len(texts), num_perm), dtype=np.int64)
+    for i, text in enumerate(texts):
+        shingles = {
+            text[start:end] for start, end in _shingle_bounds(len(text), _SHINGLE_SIZE)
+        }
+        hashes = np.fromiter(
+            (zlib.crc32(shingle.encode()) for shingle in shingles),
+            dtype=np.int64,
+            count=len(shingles),
+        )
+        signatures[i] = (
+            (slopes[:, None] * (hashes[None, :] % _PRIME) + intercepts[:, None])
+            % _PRIME
+        ).min(axis=1)
+    return signatures
+
+
+def _shingle_bounds(length: int, size: int) -> List[Tuple[int, int]]:
+    """
+    Start and end of every shingle, texts shorter than {size} are a single shingle.
+    """
+    return [(start, start + size) for start in range(max(length - size + 1, 1))]
+
+
+def _near_duplicate_groups(texts: List[str], threshold: float) -> np.ndarray:
+    """
+    Assigns a common root to all texts that share an LSH bucket with an estimated
+    similarity of at least {threshold}.
+    """
+    signatures = minhash_signatures(texts, _BANDS * _ROWS_PER_BAND)
+    parent = np.arange(len(texts))
+
+    def find(item: int) -> int:
+        while parent[item] != item:
+            parent[item] = parent[parent[item]]
+            item = parent[item]
+        return item
+
+    for band in range(_BANDS):
+        columns = slice(band * _ROWS_PER_BAND, (band + 1) * _ROWS_PER_BAND)
+        buckets: Dict[Tuple[int, ...], int] = {}
+        for i, key in enumerate(map(tuple, signatures[:, columns])):
+            first = buckets.setdefault(key, i)
+            if first == i:
+                continue
+            similarity = np.mean(signatures[i] == signatures[first])
+            if similarity >= threshold:
+                parent[find(i)] = find(first)
+    return np.array([find(i) for i in range(len(texts))])
@@ -0,0 +1,91 @@
+# Copyright 2021 Robin Maasjosthusmann. All rights reserved.
+# Use of this source code is governed by a BSD-style
+# license that can be found in the LICENSE file.
+"""
+Keyword highlighting
+
+The keywords are compiled once into a word based trie (a small matching automaton),
+so highlighting a text is a single pass over its words, independent of the number of
+keywords.
+"""
+
+import re
+from typing import Dict, Iterable, List
+
+from colorama import Back, Fore, Style
+
+_WORD = re.compile(r"\w+")
+_END = ""  # Marks the end of a keyword inside of the trie, never a valid word
+
+
+class KeywordHighlighter:
+    """
+    Highlights keywords and multi-word phrases (e.g. "Amazon Marketplace") inside of
+    a text. Matching is case insensitive and only whole words are matched, the
+    longest phrase wins if several keywords start at the same word. Punctuation and
+    whitespace between the words of a phrase are not compared.
+    """
+
+    def __init__(
+        self,
+        keywords: Iterable[str],
+        foreground_color: str = "BLACK",
+        background_color: str = "YELLOW",
+    ) -> None:
+        self.start_sequence = getattr(Fore, foreground_color.upper()) + getattr(
+            Back, background_color.upper()
+        )
+        self._trie: Dict[str, dict] = {}
+        for keyword in keywords:
+            words = _WORD.findall(keyword.casefold())
+            if not words:
+                continue
+            node = self._trie
+            for word in words:
+                node = node.setdefault(word, {})
+            node[_END] = {}
+
+    def __bool__(self) -> bool:
+        return bool(self._trie)
+
+    def highlight(self, text: str) -> str:
+        """
+        Adds the necessary characters for highlighting all keywords of the text.
+
+        Parameters
+        ----------
+        text : str
+            The original text to highlight in
+
+        Returns
+        -------
+        str
+            Text with added characters for highlighting
+        """
+        if not self._trie:
+            return text
+        words = list(_WORD.finditer(text))
+        folded = [match.group().casefold() for match in words]
+        parts: List[str] = []
+        written = 0
+        idx = 0
+        while idx < len(words):
+            # Follow the trie as long as possible and remember the longest match
+            node = self._trie
+            match_end = -1
+            for end in range(idx, len(words)):
+                node = node.get(folded[end])  # type: ignore
+                if node is None:
+                    break
+                if _END in node:
+                    match_end = end
+            if match_end < 0:
+                idx += 1
+                continue
+            start, stop = words[idx].start(), words[match_end].end()
+            parts.append(text[written:start])
+            parts.append(self.start_sequence + text[start:stop] + Style.RESET_ALL)
+            written = stop
+            idx = match_end + 1
+        parts.append(text[written:])
+        return "".join(parts)
@@ -0,0 +1,181 @@
+# Copyright 2021 Robin Maasjosthusmann. All rights reserved.
+# Use of this source code is governed by a BSD-style
+# license that can be found in the LICENSE file.
+"""
+Label journal
+
+Append-only file next to the csv file that records every label decision
+(row key, label, timestamp). It is replayed on startup, so an interrupted session
+can be resumed, and removed once the labels are saved to the csv file.
+"""
+
+from __future__ import annotations
+
+import csv
+import os
+from datetime import datetime
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, Optional, TextIO, Union
+
+from csv_labeler.lazy import lazy_import, logger
+
+if TYPE_CHECKING:
+    import pandas as pd
+else:
+    pd = lazy_import("pandas")
+
+
+class LabelJournal:
+    """
+    Append-only journal with the label decisions of the current session.
+
+    Entries are flushed after every append, but only fsynced every {fsync_every}
+    entries to keep the cost per label low.
+    """
+
+    def __init__(self, path: Union[str, Path], fsync_every: int = 10) -> None:
+        self.path = Path(path)
+        self.fsync_every = max(fsync_every, 1)
+        self.entries: Dict[int, str] = {}
+        self._file: Optional[TextIO] = None
+        self._writer = None
+        self._unsynced = 0
+
+    @staticmethod
+    def path_for(csv_filepath: Union[str, Path]) -> Path:
+        """
+        Returns the journal path that belongs to the csv file
+
+        Parameters
+        ----------
+        csv_filepath : Union[str, Path]
+            Path to the csv file
+
+        Returns
+        -------
+        Path
+            Path of the journal
+        """
+        csv_filepath = Path(csv_filepath)
+        return csv_filepath.with_name(csv_filepath.name + ".journal")
+
+    def replay(self) -> Dict[int, str]:
+        """
+        Reads all entries of an existing journal. Later entries of the same row
+        overwrite earlier ones, an incomplete last line (crash while writing) is cut off
+        the file, so the next entry does not continue it.
+
+        Returns
+        -------
+        Dict[int, str]
+            Row key -> label
+        """
+        self.entries = {}
+        if not self.path.exists():
+            return self.entries
+        self._drop_torn_tail()
+        with open(self.path, newline="", encoding="utf-8") as file:
+            for entry in csv.reader(file, delimiter="\t"):
+                if len(entry) != 3:
+                    logger.debug(f"Skipping incomplete journal entry: {entry}")
+                    continue
+                try:
+                    self.entries[int(entry[0])] = entry[1]
+                except ValueError:
+                    logger.debug(f"Skipping invalid journal entry: {entry}")
+        return self.entries
+
+    def apply(self, df: pd.DataFrame, label_column: str) -> int:
+        """
+        Writes the replayed labels into the DataFrame (or chunk). Only entries with a
+        row key inside the index of the DataFrame are applied.
+
+        Parameters
+        ----------
+        df : pd.DataFrame
+            DataFrame or chunk of the csv file
+        label_column : str
+            Name of the column which contains the labels
+
+        Returns
+        -------
+        int
+            Number of applied entries
+        """
+        keys = [key for key in df.index if key in self.entries]
+        if keys:
+            df[label_column] = df[label_column].astype(object)
+            df.loc[keys, label_column] = [self.entries[key] for key in keys]
+        return len(keys)
+
+    def append(self, row_key: int, label: str) -> None:
+        """
+        Appends a label decision to the journal.
+
+        Parameters
+        ----------
+        row_key : int
+            Index of the row inside the csv file
+        label : str
+            Selected label
+        """
+        if self._file is None:
+            self._drop_torn_tail()
+            self._file = open(  # pylint: disable=consider-using-with
+                self.path, "a", newline="", encoding="utf-8"
+            )
+            self._writer = csv.writer(self._file, delimiter="\t")
+        self._writer.writerow(  # type: ignore
+            [row_key, label, datetime.now().isoformat(timespec="seconds")]
+        )
+        self._file.flush()
+        self.entries[row_key] = label
+        self._unsynced += 1
+        if self._unsynced >= self.fsync_every:
+            self.sync()
+
+    def _drop_torn_tail(self) -> None:
+        """
+        Truncates the journal after its last line break, an entry is only complete
+        with its line break.
+        """
+        if not self.path.exists():
+            return
+        with open(self.path, "rb+") as file:
+            if not file.seek(0, os.SEEK_END):
+                return
+            file.seek(-1, os.SEEK_END)
+            if file.read(1) == b"\n":
+                return
+            file.seek(0)
+            end = file.read().rfind(b"\n") + 1
+            logger.debug(f"Dropping the incomplete last entry of {self.path}")
+            file.truncate(end)
+
+    def sync(self) -> None:
+        """
+        Forces all appended entries to disk.
+        """
+        if self._file is not None and self._unsynced:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._unsynced = 0
+
+    def close(self) -> None:
+        """
+        Syncs and closes the journal file.
+        """
+        if self._file is not None:
+            self.sync()
+            self._file.close()
+            self._file = None
+            self._writer = None
+
+    def remove(self) -> None:
+        """
+        Closes and deletes the journal, called once the labels are saved to the csv file.
+        """
+        self.close()
+        self.entries = {}
+        if self.path.exists():
+            self.path.unlink()
@@ -0,0 +1,137 @@
+# Copyright 2021 Robin Maasjosthusmann. All rights reserved.
+# Use of this source code is governed by a BSD-style
+# license that can be found in the LICENSE file.
+"""
+Lazy imports
+
+Heavy dependencies (pandas, numpy, loguru) are imported when they are used for the
+first time instead of at startup, so the first prompt is not delayed by them. Modules
+bind the dependency to a proxy (np = lazy_import("numpy")), the import runs on the
+first attribute access. Annotations are not evaluated (from __future__ import
+annotations), so signatures do not trigger the import.
+"""
+
+import importlib
+import sys
+import types
+from typing import Any, Dict, List, Tuple
+
+
+class LazyModule(types.ModuleType):
+    """
+    Proxy of a module that is imported on the first attribute access.
+    """
+
+    def __init__(self, name: str) -> None:
+        super().__init__(name)
+        self.__dict__["_lazy_module"] = None
+
+    def _load(self) -> types.ModuleType:
+        module = self.__dict__["_lazy_module"]
+        if module is None:
+            module = importlib.import_module(self.__name__)
+            self.__dict__["_lazy_module"] = module
+        return module
+
+    def __getattr__(self, name: str) -> Any:
+        value = getattr(self._load(), name)
+        # Later lookups of the attribute do not pass __getattr__ anymore
+        self.__dict__[name] = value
+        return value
+
+    def __dir__(self) -> List[str]:
+        return dir(self._load())
+
+
+def lazy_import(name: str) -> types.ModuleType:
+    """
+    Returns the module if it is already imported, otherwise a proxy that imports it
+    on the first attribute access.
+
+    Parameters
+    ----------
+    name : str
+        Name of the module (e.g. "pandas")
+
+    Returns
+    -------
+    types.ModuleType
+        Module or proxy
+    """
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+    return LazyModule(name)
+
+
+class _LazyLogger:
+    """
+    Proxy of the loguru logger, loguru is imported (and configured, see
+    configure_logger) when the first message is logged.
+    """
+
+    def __init__(self) -> None:
+        self._handler: Tuple[Tuple, Dict] = ()
+
+    def _load(self) -> Any:
+        from loguru import logger  # pylint: disable=import-outside-toplevel
+
+        if self._handler:
+            args, kwargs = self._handler
+            self._handler = ()
+            # Only the default handler is replaced, handlers added by others stay
+            try:
+                logger.remove(0)
+            except ValueError:
+                pass
+            logger.add(*args, **kwargs)
+        return logger
+
+    def set_handler(self, *args: Any, **kwargs: Any) -> None:
+        self._handler = (args, kwargs)
+        if "loguru" in sys.modules:
+            self._load()
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._load(), name)
+
+
+logger: Any = _LazyLogger()
+
+
+def configure_logger(*args: Any, **kwargs: Any) -> None:
+    """
+    Replaces the default handler of loguru (same arguments as logger.add). If loguru
+    is not imported yet, this is done when the first message is logged.
+    """
+    logger.set_handler(*args, **kwargs)
+
+
+def is_missing(value: Any) -> bool:
+    """
+    Same as pd.isna for a single value, but pandas is only imported for pandas values
+    (e.g. pd.NA).
+
+    Parameters
+    ----------
+    value : Any
+        Value to check
+
+    Returns
+    -------
+    bool
+        True for None, NaN, NaT and pd.NA
+    """
+    if value is None:
+        return True
+    if isinstance(value, (str, int)):
+        return False
+    if isinstance(value, float):
+        return value != value
+    package = type(value).__module__.split(".")[0]
+    if package == "numpy":
+        # NaN and NaT are the only values that differ from themselves
+        return bool(value != value)
+    if package == "pandas":
+        return bool(lazy_import("pandas").isna(value))
+    return False
@@ -7,23 +7,50 @@ CSV Labeler
 A simple tool for labeling your csv files
 """
 
-import ast
-import configparser
-import os
+from __future__ import annotations
+
+import argparse
 import readline
 import sys
-import textwrap
-from distutils import util
 from pathlib import Path
-
-import pandas as pd
-from colorama import Back, Fore, Style
-from loguru import logger
-
-from csv_labeler import tab_completer
-
-logger.remove()
-logger.add(sys.stderr, format="{message}", level="INFO")
+from typing import (
+    TYPE_CHECKING,
+    Callable,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+)
+
+from csv_labeler import cache, grouping
+from csv_labeler import journal as label_journal
+from csv_labeler import query as label_query
+from csv_labeler import rules as label_rules
+from csv_labeler import pruned, session, shared, small_file, streaming, tab_completer
+from csv_labeler.autosave import Autosaver
+from csv_labeler.highlighting import KeywordHighlighter
+from csv_labeler.lazy import configure_logger, lazy_import, logger
+from csv_labeler.prefetch import Prefetcher
+from csv_labeler.profiling import TIMER
+from csv_labeler.progress import LabelProgress
+from csv_labeler.rendering import RenderPlan, get_render_plan
+from csv_labeler.row_store import DataFrameRows, RowStore, TableRows
+from csv_labeler.screen import SCREEN
+from csv_labeler.settings import Settings, load_settings
+from csv_labeler.suggest import LabelSuggester
+from csv_labeler.tasks import TaskRunner
+from csv_labeler.work_queue import WorkQueue
+
+if TYPE_CHECKING:
+    from concurrent.futures import Future
+
+    import numpy as np
+    import pandas as pd
+else:
+    np = lazy_import("numpy")
+    pd = lazy_import("pandas")
+
+configure_logger(sys.stderr, format="{message}", level="INFO")
 
 
 def confirm_prompt(question: str) -> bool:
@@ -43,6 +70,8 @@ def confirm_prompt(question: str) -> bool:
     """
     reply = None
     valid_inputs = ("", "y", "n")
+    # The prompt is written below the frame and may scroll the terminal
+    SCREEN.invalidate()
 
     while reply not in valid_inputs:
         if reply is not None:
@@ -118,15 +147,30 @@ def handle_existing_labels(df: pd.DataFrame, label_column: str) -> bool:
     """
     keep_label = False
     if detect_labels(df, label_column):
-        keep_label = confirm_prompt(
-            "Existing labels detected! Do you want to keep the existing labels (if you"
-            " choose No, all existing labels will be deleted!)"
-        )
+        keep_label = ask_keep_existing_labels()
 
     return keep_label
 
 
-def print_relevant_columns(row: pd.Series, config: configparser.ConfigParser) -> None:
+def ask_keep_existing_labels() -> bool:
+    """
+    Asks the user if he/she wants to keep the existing labels.
+
+    Returns
+    -------
+    bool
+        True if user wants to skip (ignore) already labeled rows, False if
+        the user wants to relable them
+    """
+    return confirm_prompt(
+        "Existing labels detected! Do you want to keep the existing labels (if you"
+        " choose No, all existing labels will be deleted!)"
+    )
+
+
+def print_relevant_columns(
+    row: pd.Series, settings: Settings, plan: Optional[RenderPlan] = None
+) -> None:
     """
     Prints all relevant columns for the classification with the corresponding value. Does
     some preprecessing for string values (removes linebreaks, splits into multiple lines if
@@ -136,70 +180,20 @@ def print_relevant_columns(row: pd.Series, config: configparser.ConfigParser) ->
     ----------
     row : pd.Series
         Row of the csv file/dataframe. Must contain all relevant columns
-    config : configparser.ConfigParser
-        ConfigParser with all information from the config.ini
+    settings : Settings
+        Parsed settings from the config.ini
+    plan : Optional[RenderPlan]
+        Render plan for the schema of the row, looked up from the cache if not passed
     """
-    clear_console()
-    wrapper = textwrap.TextWrapper(
-        width=int(config["general"]["line_length"])
-    )  # Needed for formatting outputs
-
-    # If not at least one relevant column is defined, use all columns except of label_column
-    relevant_columns = ast.literal_eval(config["csv"]["relevant_columns"])
-    if len(relevant_columns) == 0:
-        relevant_columns = list(
-            i for i in list(row.index) if i.casefold() != config["csv"]["label_column"]
-        )
-
-    # Use the length of the longest column name to determine the width of the "name" column.
-    # The width of the "value" column is the remaining space of the {line_width} defined in the
-    # config.ini minus the width of the "name" column and the vale of {name_value_seperator_width}
-    # (also defined in config.ini.)
-    name_column_width = len(max(relevant_columns, key=len))
-    value_column_width = int(config["general"]["line_length"]) - name_column_width
-    line_length = int(config["general"]["name_value_seperator_width"])
-
-    for name, value in row.items():
-        if name.casefold() in [x.casefold() for x in relevant_columns]:
-            # Check for empty row -> no further processing needed if empty
-            if pd.isna(value):
-                print_value = "None"
-            else:
-                # Cleanup text & highlight keywords (only in strings)
-                if isinstance(value, str):
-                    print_value = " ".join(value.replace("\\", "").split())
-                    print_value = highlight_keywords(
-                        print_value,
-                        ast.literal_eval(config["classification"]["keywords"]),
-                        config["highlighting"]["foreground"],
-                        config["highlighting"]["background"],
-                    )
-                else:
-                    print_value = value
-
-            # Print column
-            # If column contains text, split it into smaller parts to fit inside default terminals
-            if isinstance(value, str):
-                line_list = wrapper.wrap(text=print_value)
-                print(
-                    f"{name:{name_column_width}}:"
-                    f'{"":{line_length}}{line_list[0]:{value_column_width}}'
-                )
-                for element in line_list[1:]:
-                    print(
-                        f'{"":{name_column_width}} {"":{line_length}}{element:{value_column_width}}'
-                    )
-            else:
-                print(
-                    f"{name:{name_column_width}}:"
-                    f'{"":{line_length}}{str(print_value):{value_column_width}}'
-                )
+    if plan is None:
+        plan = get_render_plan(tuple(row.index), settings)
+    SCREEN.draw(plan.render_row(row))
 
 
 def label_row(
     row: pd.Series,
     keep_label: bool,
-    config: configparser.ConfigParser,
+    settings: Settings,
 ) -> str:
     """
     Prints the relevant columns of the passed row to the terminal and asks the user for
@@ -211,79 +205,1324 @@ def label_row(
         Row of the pandas Dataframe that contains the csv file
     keep_label : bool
         Should existing labels be retained
-    config : configparser.ConfigParser
-        ConfigParser with all information from the config.ini
+    settings : Settings
+        Parsed settings from the config.ini
 
     Returns
     -------
     str
         Selected Label
     """
-    if keep_label and not pd.isna(row[config["csv"]["label_column"]]):
-        return row[config["csv"]["label_column"]]
-    print_relevant_columns(row, config)
-    return get_classification(ast.literal_eval(config["classification"]["labels"]))
+    if keep_label and not pd.isna(row[settings.label_column]):
+        return row[settings.label_column]
+    plan = get_render_plan(tuple(row.index), settings)
+    return get_classification(settings.labels, settings, plan.render_row(row))
+
+
+def open_journal(
+    csv_filepath: Path, settings: Settings
+) -> Optional[label_journal.LabelJournal]:
+    """
+    Opens the label journal of the csv file. If the journal contains labels of an
+    unfinished session, the user can decide to resume the session or to discard them.
+
+    Parameters
+    ----------
+    csv_filepath : Path
+        Path to the csv file
+    settings : Settings
+        Parsed settings from the config.ini
+
+    Returns
+    -------
+    Optional[label_journal.LabelJournal]
+        The journal, None if the journal is disabled inside of the config.ini
+    """
+    if not settings.journal_enabled:
+        return None
+    journal = label_journal.LabelJournal(
+        label_journal.LabelJournal.path_for(csv_filepath), settings.journal_fsync_every
+    )
+    if journal.replay():
+        if settings.testmode:
+            # Development behavior, always resume
+            resume = True
+        else:
+            resume = confirm_prompt(
+                f"Found {len(journal.entries)} labels of an unfinished session, do you"
+                " want to resume it?"
+            )
+        if not resume:
+            journal.remove()
+    return journal
+
+
+def label_dataframe(
+    df: pd.DataFrame,
+    keep_label: bool,
+    settings: Settings,
+    journal: Optional[label_journal.LabelJournal] = None,
+    rule_report: Optional[label_rules.RuleReport] = None,
+    suggester: Optional[LabelSuggester] = None,
+    autosave: Optional[Autosaver] = None,
+    tasks: Optional[TaskRunner] = None,
+    progress: Optional[LabelProgress] = None,
+) -> None:
+    """
+    Labels all rows of the passed DataFrame in place. The rows that have to be labeled
+    are determined once (vectorized), rows with a kept label or a label from the journal
+    (resumed session) are never visited. Rows matching a rule of the config are labeled
+    before the interactive loop. New decisions are appended to the journal and learned
+    by the suggester, which is seeded with all labels that already exist. The label of
+    a row can be applied to all queued rows of its group (duplicates).
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        DataFrame (or chunk of the csv file) with the label column
+    keep_label : bool
+        Should existing labels be retained
+    settings : Settings
+        Parsed settings from the config.ini
+    journal : Optional[label_journal.LabelJournal]
+        Journal of the current session
+    rule_report : Optional[label_rules.RuleReport]
+        Collects the hit counts and timings of the rules
+    suggester : Optional[LabelSuggester]
+        Model for the label suggestions, a new one is created if suggestions are
+        enabled and none is passed
+    autosave : Optional[Autosaver]
+        Saves the labels in the background while labeling
+    tasks : Optional[TaskRunner]
+        Runs the background jobs (prefetching) of the loop, an own runner is used if
+        none is passed
+    progress : Optional[LabelProgress]
+        Progress of the whole run (all chunks or files, see LabelProgress.from_counts),
+        a progress of the DataFrame is created if none is passed
+
+    Raises
+    ------
+    KeyboardInterrupt
+        Raised when the user cancels the input, all labels selected so far are
+        already stored in the DataFrame
+    """
+    label_column = settings.label_column
+    # An empty label column is parsed as float, labels are strings
+    df[label_column] = df[label_column].astype(object)
+    # The labels as they were counted for the progress of the run
+    counted = df[label_column].copy() if progress is not None else None
+    if journal is not None:
+        journal.apply(df, label_column)
+
+    # Only rows without a (kept or resumed) label are visited
+    queue = WorkQueue.from_dataframe(
+        df,
+        label_column,
+        keep_label,
+        exclude=journal.entries if journal is not None else None,
+    )
+    rows = DataFrameRows(df, label_column)
+    apply_config_rules(rows, queue, settings, rule_report)
+    if counted is not None:
+        # Rows labeled by the journal or the rules leave the pending rows of the run
+        expected = int(counted.isna().sum()) if keep_label else len(df)
+        progress.update(counted, df[label_column], expected - len(queue))
+    label_rows(rows, queue, settings, journal, suggester, autosave, tasks, progress)
+
+
+def apply_config_rules(
+    rows: RowStore,
+    queue: WorkQueue,
+    settings: Settings,
+    rule_report: Optional[label_rules.RuleReport] = None,
+) -> None:
+    """
+    Labels the queued rows matching a rule of the config and removes them from the
+    queue.
+
+    Parameters
+    ----------
+    rows : RowStore
+        Rows with their labels
+    queue : WorkQueue
+        Rows that still have to be labeled
+    settings : Settings
+        Parsed settings from the config.ini
+    rule_report : Optional[label_rules.RuleReport]
+        Collects the hit counts and timings of the rules
+    """
+    if not settings.rules:
+        return
+    if rule_report is None:
+        rule_report = label_rules.RuleReport()
+    ruled = label_rules.apply_rules(
+        rows.dataframe(),
+        settings.rules,
+        settings.label_column,
+        queue.positions,
+        rule_report,
+    )
+    rows.pull(ruled)
+    queue.discard(ruled)
+
+
+def label_rows(
+    rows: RowStore,
+    queue: WorkQueue,
+    settings: Settings,
+    journal: Optional[label_journal.LabelJournal] = None,
+    suggester: Optional[LabelSuggester] = None,
+    autosave: Optional[Autosaver] = None,
+    tasks: Optional[TaskRunner] = None,
+    progress: Optional[LabelProgress] = None,
+) -> None:
+    """
+    Interactive loop over the queued rows, shared by the DataFrame and the small file
+    backend (see row_store.py). New decisions are appended to the journal and learned
+    by the suggester, which is seeded with all labels that are not queued. Rows can be
+    labeled by a query and the label of a row can be applied to all queued rows of its
+    group (duplicates).
+
+    Parameters
+    ----------
+    rows : RowStore
+        Rows with their labels
+    queue : WorkQueue
+        Rows that have to be labeled
+    settings : Settings
+        Parsed settings from the config.ini
+    journal : Optional[label_journal.LabelJournal]
+        Journal of the current session
+    suggester : Optional[LabelSuggester]
+        Model for the label suggestions, a new one is created if suggestions are
+        enabled and none is passed
+    autosave : Optional[Autosaver]
+        Saves the labels in the background while labeling
+    tasks : Optional[TaskRunner]
+        Runs the background jobs (prefetching) of the loop, an own runner is used if
+        none is passed
+    progress : Optional[LabelProgress]
+        Progress of the run, a progress of the rows is created if none is passed
+
+    Raises
+    ------
+    KeyboardInterrupt
+        Raised when the user cancels the input, all labels selected so far are
+        already stored in {rows}
+    """
+    if progress is None and settings.progress_window > 0:
+        # Counted once, the loop only updates the counters
+        progress = LabelProgress(rows.labels, len(queue), settings.progress_window)
+    plan = get_render_plan(rows.columns, settings)
+    columns = rows.column_values(plan)
+    if suggester is None and settings.suggestions_enabled:
+        suggester = LabelSuggester(settings.labels)
+    if suggester is not None:
+        seed_suggester(suggester, rows, columns, queue)
+    groups = None
+    if settings.grouping_mode != "off":
+        groups = grouping.group_rows(
+            rows.dataframe(),
+            plan.names,
+            settings.grouping_mode,
+            settings.grouping_threshold,
+        )
+
+    # Rows labeled by queries since the last autosave count
+    queried = 0
+
+    def label_by_query(query: str, current: int) -> Optional[str]:
+        # The current row was already taken from the queue, it is labeled (and
+        # journaled) by the loop if it matches
+        nonlocal queried
+        df = rows.dataframe()
+        candidates = np.append(queue.remaining(), current)
+        previous = {x: rows.get(x) for x in candidates.tolist()}
+        labeled, label = bulk_label(
+            df,
+            query,
+            candidates,
+            df.columns.get_loc(settings.label_column),
+            settings.labels,
+        )
+        rows.pull(labeled)
+        queue.discard(labeled)
+        others = labeled[labeled != current]
+        queried += len(others)
+        if progress is not None and len(others):
+            progress.record(label, [previous[x] for x in others.tolist()])
+        for labeled_position in others.tolist():
+            if journal is not None:
+                journal.append(rows.key(labeled_position), label)
+            if suggester is not None:
+                suggester.learn(
+                    suggester.tokenize(
+                        [column[labeled_position] for column in columns]
+                    ),
+                    label,
+                )
+        return label if current in labeled else None
+
+    with Prefetcher(
+        lambda position: plan.render_position(columns, position),
+        queue,
+        settings.prefetch_depth,
+        tasks,
+    ) as prefetcher:
+        for position in queue:
+            suggestion = None
+            if suggester is not None:
+                with TIMER.stage("suggest"):
+                    tokens = suggester.tokenize(
+                        [column[position] for column in columns]
+                    )
+                    suggestion = suggester.suggest(tokens)
+            with TIMER.stage("render"):
+                frame = prefetcher.get(position)
+            # Read before the prompt, a query may label the current row as well
+            previous = rows.get(position)
+            label = get_classification(
+                settings.labels,
+                settings,
+                frame,
+                suggestion,
+                lambda query, current=position: label_by_query(query, current),
+                progress,
+            )
+            with TIMER.stage("label"):
+                rows.set(position, label)
+                if progress is not None:
+                    progress.record(label, [previous])
+                if journal is not None:
+                    journal.append(rows.key(position), label)
+                if suggester is not None:
+                    suggester.learn(tokens, label)
+            TIMER.row_done()
+            labeled_rows = 1 + queried
+            queried = 0
+            if groups is not None and groups.sizes[groups.group_ids[position]] > 1:
+                df = rows.dataframe()
+                grouped = label_group(
+                    df,
+                    df.columns.get_loc(settings.label_column),
+                    label,
+                    groups.members(position),
+                    queue,
+                    journal,
+                    progress,
+                )
+                rows.pull(grouped)
+                if suggester is not None and len(grouped):
+                    suggester.learn_rows(
+                        ([column[x] for column in columns] for x in grouped),
+                        [label] * len(grouped),
+                    )
+                labeled_rows += len(grouped)
+            if autosave is not None:
+                autosave.row_labeled(rows.labels, labeled_rows)
+
+
+def label_group(
+    df: pd.DataFrame,
+    label_position: int,
+    label: str,
+    members: np.ndarray,
+    queue: WorkQueue,
+    journal: Optional[label_journal.LabelJournal] = None,
+    progress: Optional[LabelProgress] = None,
+) -> np.ndarray:
+    """
+    Asks the user if the label should be applied to the other queued rows of the group
+    and labels them if so.
 
+    Parameters
+    ----------
+    df : pd.DataFrame
+        DataFrame (or chunk of the csv file) with the label column
+    label_position : int
+        Position of the label column
+    label : str
+        Label of the labeled row
+    members : np.ndarray
+        Positions of all rows of the group
+    queue : WorkQueue
+        Rows that still have to be labeled
+    journal : Optional[label_journal.LabelJournal]
+        Journal of the current session
+    progress : Optional[LabelProgress]
+        Progress of the session
+
+    Returns
+    -------
+    np.ndarray
+        Positions of the rows labeled by the group, empty if the user declined
+    """
+    others = np.intersect1d(members, queue.remaining(), assume_unique=True)
+    if not len(others):
+        return others
+    if not confirm_prompt(
+        f"Apply {label} to {len(others)} similar row(s) of the same group?"
+    ):
+        return np.empty(0, dtype=np.int64)
+    if progress is not None:
+        progress.record(label, df.iloc[others, label_position].tolist())
+    df.iloc[others, label_position] = label
+    queue.discard(others)
+    if journal is not None:
+        for position in others:
+            journal.append(df.index[position], label)
+    return others
+
+
+def bulk_label(
+    df: pd.DataFrame,
+    query: str,
+    candidates: np.ndarray,
+    label_position: int,
+    categories: Sequence[str],
+) -> Tuple[np.ndarray, Optional[str]]:
+    """
+    Labels all candidate rows that match the query at once. The number of matching
+    rows is shown and the user is asked for the label.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        DataFrame (or chunk of the csv file) with the label column
+    query : str
+        Filter over the columns, e.g. payee~"Uber" & amount<-100 (see query.py)
+    candidates : np.ndarray
+        Positions of the rows that may be labeled (unlabeled rows)
+    label_position : int
+        Position of the label column
+    categories : Sequence[str]
+        List with the class labels
+
+    Returns
+    -------
+    Tuple[np.ndarray, Optional[str]]
+        Positions of the labeled rows and the label, no positions and None if the
+        query was invalid or the user aborted
+    """
+    nothing_labeled: Tuple[np.ndarray, Optional[str]] = (np.empty(0, np.int64), None)
+    try:
+        conditions = label_query.parse_query(query)
+        names = label_query.referenced_columns(conditions, df.columns)
+        names = list(dict.fromkeys(names))
+        # Only the columns of the query and the candidate rows are evaluated
+        mask = label_query.evaluate(
+            conditions, df.iloc[candidates, df.columns.get_indexer(names)]
+        )
+    except label_query.QueryError as error:
+        print(f"Invalid query: {error}")
+        return nothing_labeled
+    matches = np.sort(candidates[mask])
+    if not len(matches):
+        print("No unlabeled rows match the query")
+        return nothing_labeled
+
+    while True:
+        selected_category = input(
+            f"{len(matches)} unlabeled row(s) match the query, please select the label"
+            " for all of them (Enter to abort): "
+        )
+        if not selected_category:
+            return nothing_labeled
+        label = resolve_category_input(selected_category, categories)
+        if label is not None:
+            break
+        print("Invalid Input, please choose a valid category!")
+    df.iloc[matches, label_position] = label
+    return matches, label
+
+
+def seed_suggester(
+    suggester: LabelSuggester,
+    rows: RowStore,
+    columns: List,
+    queue: WorkQueue,
+) -> None:
+    """
+    Learns all labels of the rows that are not going to be labeled by the user
+    (existing, resumed and rule based labels).
+
+    Parameters
+    ----------
+    suggester : LabelSuggester
+        Model for the label suggestions
+    rows : RowStore
+        Rows with their labels
+    columns : List
+        Relevant columns, see RenderPlan.column_values
+    queue : WorkQueue
+        Rows that still have to be labeled
+    """
+    pending = np.zeros(len(rows), dtype=bool)
+    pending[queue.remaining()] = True
+    positions = rows.labeled_positions()
+    positions = positions[~pending[positions]].tolist()
+    suggester.learn_rows(
+        ([column[position] for column in columns] for position in positions),
+        [rows.get(position) for position in positions],
+    )
+
+
+def label_csv_in_chunks(
+    csv_filepath: Path,
+    keep_label: bool,
+    settings: Settings,
+    journal: Optional[label_journal.LabelJournal] = None,
+    rule_report: Optional[label_rules.RuleReport] = None,
+    progress: Optional[LabelProgress] = None,
+) -> None:
+    """
+    Streaming mode: labels the csv file chunk by chunk, so only {chunksize} rows are
+    kept in memory. Finished chunks are written to a temporary file (in the background,
+    while the next chunk is labeled) that replaces the csv file at the end.
+
+    Parameters
+    ----------
+    csv_filepath : Path
+        Path to the csv file
+    keep_label : bool
+        Should existing labels be retained
+    settings : Settings
+        Parsed settings from the config.ini
+    journal : Optional[label_journal.LabelJournal]
+        Journal of the current session
+    rule_report : Optional[label_rules.RuleReport]
+        Collects the hit counts and timings of the rules
+    progress : Optional[LabelProgress]
+        Progress of the whole file, shared by all chunks
+    """
+    chunks = streaming.iter_chunks(csv_filepath, settings.sep, settings.chunksize)
+    # One model for all chunks, so labels of previous chunks are suggested as well
+    suggester = (
+        LabelSuggester(settings.labels) if settings.suggestions_enabled else None
+    )
+    writer = streaming.ChunkWriter(csv_filepath, settings.sep)
+    save_changes = True
+    try:
+        # Background jobs (prefetching, writing finished chunks) run while the user
+        # decides on a row
+        with TaskRunner() as tasks:
+            writing: Optional[Future] = None
+
+            def write(chunk: pd.DataFrame) -> None:
+                nonlocal writing
+                # At most one chunk is written at a time, in the order of the file,
+                # errors of the previous write are raised here
+                if writing is not None:
+                    writing.result()
+                writing = tasks.run_blocking(writer.write, chunk)
+
+            for chunk in chunks:
+                try:
+                    label_dataframe(
+                        chunk,
+                        keep_label,
+                        settings,
+                        journal,
+                        rule_report,
+                        suggester,
+                        tasks=tasks,
+                        progress=progress,
+                    )
+                except KeyboardInterrupt:
+                    save_changes = confirm_prompt(
+                        "\nInput was canceled, should the labels created so far be"
+                        " saved?"
+                    )
+                    if save_changes:
+                        # Copy the remaining rows, only labels of the journal are
+                        # applied
+                        write(chunk)
+                        for remaining_chunk in chunks:
+                            if journal is not None:
+                                journal.apply(remaining_chunk, settings.label_column)
+                            write(remaining_chunk)
+                    break
+                write(chunk)
+            if writing is not None:
+                writing.result()
+    except BaseException:
+        writer.discard()
+        raise
 
-def main():
+    clear_console()
+    print("Labeling of the CSV file completed")
+    if save_changes:
+        writer.commit()
+    else:
+        writer.discard()
+    if journal is not None:
+        # The csv file is up to date (or the labels were discarded)
+        journal.remove()
+
+
+def label_shared(
+    df: pd.DataFrame,
+    settings: Settings,
+    queue: shared.SharedQueue,
+    suggester: Optional[LabelSuggester] = None,
+    tasks: Optional[TaskRunner] = None,
+) -> int:
+    """
+    Labels the rows leased from the shared session until no unlabeled row is left.
+    Every label is committed to the database immediately.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        DataFrame with the label column, the labels of the session are merged into it
+    settings : Settings
+        Parsed settings from the config.ini
+    queue : shared.SharedQueue
+        Shared session
+    suggester : Optional[LabelSuggester]
+        Model for the label suggestions, seeded with all labels of the DataFrame and
+        the session
+    tasks : Optional[TaskRunner]
+        Runs the background jobs (prefetching of the leased rows), an own runner is
+        used if none is passed
+
+    Returns
+    -------
+    int
+        Number of rows labeled by this labeler
+
+    Raises
+    ------
+    KeyboardInterrupt
+        Raised when the user cancels the input, all labels are already committed
+    """
+    label_column = settings.label_column
+    df[label_column] = df[label_column].astype(object)
+    session_labels = queue.labels()
+    known = pd.notna(session_labels)
+    df.loc[df.index[known], label_column] = session_labels[known]
+    progress = None
+    if settings.progress_window > 0:
+        # Labels of the other labelers are only counted once (at the start)
+        progress = LabelProgress(
+            df[label_column], int((~known).sum()), settings.progress_window
+        )
+    label_position = df.columns.get_loc(label_column)
+    plan = get_render_plan(tuple(df.columns), settings)
+    columns = plan.column_values(df)
+    if suggester is not None:
+        seed_suggester(
+            suggester,
+            DataFrameRows(df, label_column),
+            columns,
+            WorkQueue(np.flatnonzero(~known)),
+        )
+
+    labeled = 0
+    batch = queue.lease()
+    while batch:
+        leased = WorkQueue(batch)
+        with Prefetcher(
+            lambda position: plan.render_position(columns, position),
+            leased,
+            settings.prefetch_depth,
+            tasks,
+        ) as prefetcher:
+            for position in leased:
+                suggestion = None
+                if suggester is not None:
+                    with TIMER.stage("suggest"):
+                        tokens = suggester.tokenize(
+                            [column[position] for column in columns]
+                        )
+                        suggestion = suggester.suggest(tokens)
+                with TIMER.stage("render"):
+                    frame = prefetcher.get(position)
+                label = get_classification(
+                    settings.labels, settings, frame, suggestion, progress=progress
+                )
+                with TIMER.stage("label"):
+                    if queue.commit(position, label):
+                        labeled += 1
+                        if progress is not None:
+                            progress.record(label, [df.iat[position, label_position]])
+                        df.iat[position, label_position] = label
+                        if suggester is not None:
+                            suggester.learn(tokens, label)
+                    else:
+                        logger.warning(f"Row {position} was labeled by someone else")
+                TIMER.row_done()
+        batch = queue.lease()
+    return labeled
+
+
+def parse_args(argv: Optional[Sequence[str]] = None) -> argparse.Namespace:
+    """
+    Parses the command line arguments.
+
+    Parameters
+    ----------
+    argv : Optional[Sequence[str]]
+        Arguments, defaults to sys.argv
+
+    Returns
+    -------
+    argparse.Namespace
+        Parsed arguments
+    """
+    parser = argparse.ArgumentParser(
+        description="A simple tool for labeling your csv files"
+    )
+    parser.add_argument(
+        "source",
+        nargs="?",
+        help="csv file, or a directory/glob of csv files that are labeled in one"
+        " session (asks for the csv file if omitted)",
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="record the time of every stage and log a summary at the end",
+    )
+    parser.add_argument(
+        "--profile-output",
+        metavar="FILE",
+        help="also run cProfile and write its statistics to FILE (implies --profile)",
+    )
+    parser.add_argument(
+        "--shared",
+        metavar="DATABASE",
+        help="label the csv file together with others, the rows are leased from the"
+        " SQLite DATABASE (created by the first labeler)",
+    )
+    parser.add_argument(
+        "--export",
+        action="store_true",
+        help="merge the labels of the --shared session into the csv file",
+    )
+    args = parser.parse_args(argv)
+    if args.export and not args.shared:
+        parser.error("--export requires --shared")
+    if args.shared and (
+        args.source is None or not Path(args.source).expanduser().is_file()
+    ):
+        parser.error("--shared requires a csv file")
+    return args
+
+
+def main(argv: Optional[Sequence[str]] = None):
     """
     CSV Labeler
 
     A simple tool for labeling your csv files
     """
-    config = configparser.ConfigParser()
-    config.read("config.ini")
-    if bool(util.strtobool(config["development"]["testmode"])):
-        # Development behavior, set values inside of config.ini
-        csv_filepath = config["development"]["csv_file"]
-    else:
-        # Normal behavior
+    args = parse_args(argv)
+    settings = load_settings("config.ini")
+    profile_file = args.profile_output or settings.profile_file
+    if args.profile or profile_file or settings.profiling_enabled:
+        TIMER.start(profile=bool(profile_file))
+    try:
+        if args.shared:
+            label_shared_file(
+                settings,
+                Path(args.source).expanduser(),
+                Path(args.shared).expanduser(),
+                args.export,
+            )
+        elif args.source is None:
+            label_csv_file(settings)
+        elif Path(args.source).expanduser().is_file():
+            label_csv_file(settings, Path(args.source).expanduser())
+        else:
+            paths = session.expand_paths(args.source)
+            if not paths:
+                print(f"No csv file found for {args.source}")
+                sys.exit(1)
+            label_session(paths, settings)
+    finally:
+        TIMER.stop(profile_file)
+
+
+def label_csv_file(settings: Settings, csv_filepath: Optional[Path] = None) -> None:
+    """
+    Asks for the csv file (or uses the file of the testmode), labels it and saves the
+    labels.
+
+    Parameters
+    ----------
+    settings : Settings
+        Parsed settings from the config.ini
+    csv_filepath : Optional[Path]
+        Csv file passed on the command line, the user is not asked if passed
+    """
+    if csv_filepath is None:
+        if settings.testmode:
+            # Development behavior, set values inside of config.ini
+            csv_filepath = Path(settings.csv_file)
+        else:
+            # Normal behavior
+            try:
+                csv_filepath = get_csv_filepath()
+            except KeyboardInterrupt:
+                clear_console()
+                print("Exiting...")
+                sys.exit(0)
+    journal = open_journal(Path(csv_filepath), settings)
+    rule_report = label_rules.RuleReport()
+
+    # Streaming mode for files that do not fit into memory
+    if settings.chunksize > 0:
+        counted = None
+        if settings.progress_window > 0:
+            # One pass over the label column, for the progress of all chunks and the
+            # question about existing labels
+            counted = streaming.count_labels(
+                csv_filepath, settings.sep, settings.label_column, settings.chunksize
+            )
+        if settings.testmode:
+            keep_label = settings.skip_labels
+        elif counted is not None:
+            keep_label = ask_keep_existing_labels() if counted[1] else False
+        else:
+            # Stops at the first chunk with a label
+            keep_label = (
+                streaming.detect_labels_in_chunks(
+                    csv_filepath,
+                    settings.sep,
+                    settings.label_column,
+                    settings.chunksize,
+                )
+                and ask_keep_existing_labels()
+            )
+        progress = None
+        if counted is not None:
+            total, counts = counted
+            progress = LabelProgress.from_counts(
+                total,
+                counts,
+                total - sum(counts.values()) if keep_label else total,
+                settings.progress_window,
+            )
         try:
-            csv_filepath = get_csv_filepath()
-        except KeyboardInterrupt:
-            clear_console()
-            print("Exiting...")
-            sys.exit(0)
-    df = pd.read_csv(csv_filepath, sep=config["csv"]["sep"])
+            label_csv_in_chunks(
+                Path(csv_filepath), keep_label, settings, journal, rule_report, progress
+            )
+        finally:
+            if journal is not None:
+                journal.close()
+        rule_report.log()
+        return
+
+    if small_file.is_small_file(csv_filepath, settings.small_file_bytes):
+        label_small_file(Path(csv_filepath), settings, journal, rule_report)
+        rule_report.log()
+        return
+
+    with TIMER.stage("read_csv"):
+        if settings.prune_columns:
+            df = pruned.read_pruned(
+                csv_filepath,
+                settings.sep,
+                settings.relevant_columns,
+                settings.label_column,
+            )
+        else:
+            df = cache.read_csv_cached(
+                csv_filepath, settings.sep, settings.cache_enabled
+            )
     if not isinstance(df, pd.DataFrame):
         raise ValueError("Error while reading the csv file")
 
-    if bool(util.strtobool(config["development"]["testmode"])):
+    if settings.testmode:
         # Development behavior, set values inside of config.ini
-        keep_label = bool(util.strtobool(config["development"]["skip_labels"]))
+        keep_label = settings.skip_labels
     else:
         # Normal behavior
-        keep_label = handle_existing_labels(df, config["csv"]["label_column"])
+        keep_label = handle_existing_labels(df, settings.label_column)
+
+    def label(tasks: TaskRunner, autosave: Optional[Autosaver]) -> None:
+        label_dataframe(
+            df,
+            keep_label,
+            settings,
+            journal,
+            rule_report,
+            autosave=autosave,
+            tasks=tasks,
+        )
+
+    save_changes = run_labeling(
+        label, csv_filepath, df[settings.label_column], settings, journal
+    )
+    rule_report.log()
+    if save_changes:
+        # Compaction: write the complete csv file, the journal is no longer needed
+        with TIMER.stage("save"):
+            if settings.prune_columns:
+                # Only the label fields are rewritten, the source provides the rest
+                pruned.write_labels(
+                    csv_filepath,
+                    settings.sep,
+                    settings.label_column,
+                    df[settings.label_column],
+                )
+            else:
+                cache.write_csv(
+                    df, csv_filepath, settings.sep, settings.cache_enabled
+                )
+    if journal is not None:
+        journal.remove()
+
+
+def run_labeling(
+    label: Callable[[TaskRunner, Optional[Autosaver]], None],
+    csv_filepath: Path,
+    labels: Sequence,
+    settings: Settings,
+    journal: Optional[label_journal.LabelJournal] = None,
+) -> bool:
+    """
+    Runs the labeling loop of a single csv file next to the background tasks
+    (autosave, prefetching), see label_file_in_runner.
+
+    Parameters
+    ----------
+    label : Callable[[TaskRunner, Optional[Autosaver]], None]
+        Labeling loop, gets the runner of the background jobs and the autosave (None
+        if disabled)
+    csv_filepath : Path
+        Path to the csv file
+    labels : Sequence
+        Label column before labeling
+    settings : Settings
+        Parsed settings from the config.ini
+    journal : Optional[label_journal.LabelJournal]
+        Journal of the current session, closed when the loop is left
+
+    Returns
+    -------
+    bool
+        True if the labels should be saved
+    """
+    # Background jobs run while the user decides on a row
+    with TaskRunner() as tasks:
+        save_changes, _ = label_file_in_runner(
+            label, csv_filepath, labels, settings, tasks, journal
+        )
+    clear_console()
+    print("Labeling of the CSV file completed")
+    return save_changes
+
+
+def label_file_in_runner(
+    label: Callable[[TaskRunner, Optional[Autosaver]], None],
+    csv_filepath: Path,
+    labels: Sequence,
+    settings: Settings,
+    tasks: TaskRunner,
+    journal: Optional[label_journal.LabelJournal] = None,
+) -> Tuple[bool, bool]:
+    """
+    Runs the labeling loop of a csv file with the autosave of the file and asks the
+    user if the labels should be saved if the input is canceled. If not, the labels
+    written by the autosave are restored.
+
+    Parameters
+    ----------
+    label : Callable[[TaskRunner, Optional[Autosaver]], None]
+        Labeling loop, gets the runner of the background jobs and the autosave (None
+        if disabled)
+    csv_filepath : Path
+        Path to the csv file
+    labels : Sequence
+        Label column before labeling
+    settings : Settings
+        Parsed settings from the config.ini
+    tasks : TaskRunner
+        Runs the background jobs, shared by all files of a session
+    journal : Optional[label_journal.LabelJournal]
+        Journal of the file, closed when the loop is left
+
+    Returns
+    -------
+    Tuple[bool, bool]
+        True if the labels should be saved, True if the input was canceled
+    """
     save_changes = True
+    canceled = False
+    autosave = None
+    if settings.autosave_enabled:
+        autosave = Autosaver(
+            csv_filepath,
+            settings.sep,
+            settings.label_column,
+            labels,
+            settings.autosave_interval,
+            settings.autosave_rows,
+            tasks,
+        )
+    try:
+        label(tasks, autosave)
+    except KeyboardInterrupt:
+        canceled = True
+        # Pending jobs of the canceled loop are not needed anymore
+        tasks.cancel_all()
+        save_changes = confirm_prompt(
+            f"\nInput was canceled, should the labels of {csv_filepath.name} created"
+            " so far be saved?"
+        )
+    finally:
+        if journal is not None:
+            journal.close()
+        if autosave is not None:
+            # The final save must not race with a running autosave
+            autosave.close()
+    if not save_changes and autosave is not None:
+        autosave.discard()
+    return save_changes, canceled
+
+
+def label_small_file(
+    csv_filepath: Path,
+    settings: Settings,
+    journal: Optional[label_journal.LabelJournal] = None,
+    rule_report: Optional[label_rules.RuleReport] = None,
+) -> None:
+    """
+    Labels a small csv file with the csv module backend (see small_file.py) and saves
+    the labels. Only the label fields of the file are rewritten.
 
-    for index, row in df.iterrows():
-        try:
-            df.loc[  # pylint: disable=no-member
-                index, config["csv"]["label_column"]
-            ] = label_row(row, keep_label, config)
-        except KeyboardInterrupt:
-            save_changes = confirm_prompt(
-                "\nInput was canceled, should the labels created so far be saved?"
+    Parameters
+    ----------
+    csv_filepath : Path
+        Path to the csv file
+    settings : Settings
+        Parsed settings from the config.ini
+    journal : Optional[label_journal.LabelJournal]
+        Journal of the current session
+    rule_report : Optional[label_rules.RuleReport]
+        Collects the hit counts and timings of the rules
+    """
+    with TIMER.stage("read_csv"):
+        table = small_file.SmallTable.read(csv_filepath, settings.sep)
+    labels = table.column(settings.label_column)
+    if settings.testmode:
+        # Development behavior, set values inside of config.ini
+        keep_label = settings.skip_labels
+    else:
+        keep_label = False
+        if any(label is not None for label in labels):
+            keep_label = ask_keep_existing_labels()
+
+    def label(tasks: TaskRunner, autosave: Optional[Autosaver]) -> None:
+        label_table(
+            table, labels, keep_label, settings, journal, autosave, tasks, rule_report
+        )
+
+    if run_labeling(label, csv_filepath, labels, settings, journal):
+        with TIMER.stage("save"):
+            pruned.write_labels(
+                csv_filepath, settings.sep, settings.label_column, labels
             )
-            break
+    if journal is not None:
+        journal.remove()
+
+
+def label_table(
+    table: small_file.SmallTable,
+    labels: List[Optional[str]],
+    keep_label: bool,
+    settings: Settings,
+    journal: Optional[label_journal.LabelJournal] = None,
+    autosave: Optional[Autosaver] = None,
+    tasks: Optional[TaskRunner] = None,
+    rule_report: Optional[label_rules.RuleReport] = None,
+) -> None:
+    """
+    Labels the rows of a small csv file, same as label_dataframe. The labels are stored
+    in {labels}, the DataFrame of the file is only parsed if it is needed: for rules,
+    grouping or if the user labels rows by a query.
+
+    Parameters
+    ----------
+    table : small_file.SmallTable
+        Parsed csv file
+    labels : List[Optional[str]]
+        Label per row, None if the row is not labeled
+    keep_label : bool
+        Should existing labels be retained
+    settings : Settings
+        Parsed settings from the config.ini
+    journal : Optional[label_journal.LabelJournal]
+        Journal of the current session
+    autosave : Optional[Autosaver]
+        Saves the labels in the background while labeling
+    tasks : Optional[TaskRunner]
+        Runs the background jobs (prefetching) of the loop, an own runner is used if
+        none is passed
+    rule_report : Optional[label_rules.RuleReport]
+        Collects the hit counts and timings of the rules
+
+    Raises
+    ------
+    KeyboardInterrupt
+        Raised when the user cancels the input, all labels selected so far are
+        already stored in {labels}
+    """
+    # The row keys of the journal are the positions of the rows
+    resumed = journal.entries if journal is not None else {}
+    for position, label in resumed.items():
+        if 0 <= position < len(labels):
+            labels[position] = label
+    queue = WorkQueue(
+        [
+            position
+            for position, label in enumerate(labels)
+            if position not in resumed and not (keep_label and label is not None)
+        ]
+    )
+    rows = TableRows(table, labels, settings.label_column)
+    apply_config_rules(rows, queue, settings, rule_report)
+    label_rows(rows, queue, settings, journal, autosave=autosave, tasks=tasks)
+
+
+def label_session(paths: Sequence[Path], settings: Settings) -> None:
+    """
+    Labels multiple csv files in one session. The upcoming files are parsed in a
+    process pool while the current one is labeled. The files are labeled one after
+    another without a prompt in between (each file keeps its own work queue and
+    journal) and every file is saved as soon as it is finished. The labels of the
+    current file are autosaved in the background. Rule statistics, the suggestion
+    model, the progress and the label statistics carry over from file to file. A file
+    is added to the progress when it is handed over by the preloader. The user is
+    asked about existing labels at the first file that contains labels, the answer
+    applies to all files.
+
+    Parameters
+    ----------
+    paths : Sequence[Path]
+        Csv files of the session
+    settings : Settings
+        Parsed settings from the config.ini
+    """
+    rule_report = label_rules.RuleReport()
+    suggester = (
+        LabelSuggester(settings.labels) if settings.suggestions_enabled else None
+    )
+    label_counts = pd.Series(dtype="int64")
+    # Asked once, at the first file that contains labels
+    keep_label: Optional[bool] = settings.skip_labels if settings.testmode else None
+    progress = None
+    # Background jobs (autosaves, prefetching) run while the user decides on a row
+    with TaskRunner() as tasks, session.FilePreloader(
+        list(paths),
+        settings.sep,
+        settings.session_workers,
+        settings.session_preload,
+        settings.cache_enabled,
+    ) as files:
+        for csv_filepath, df in files:
+            labels = df[settings.label_column]
+            if keep_label is None and labels.notna().any():
+                keep_label = ask_keep_existing_labels()
+            if settings.progress_window > 0:
+                # Counted when the file is handed over, it is already parsed
+                pending = int(labels.isna().sum()) if keep_label else len(labels)
+                if progress is None:
+                    progress = LabelProgress(labels, pending, settings.progress_window)
+                else:
+                    progress.add(labels, pending)
+            journal = open_journal(csv_filepath, settings)
+
+            def label(tasks: TaskRunner, autosave: Optional[Autosaver]) -> None:
+                label_dataframe(
+                    df,
+                    bool(keep_label),
+                    settings,
+                    journal,
+                    rule_report,
+                    suggester,
+                    autosave,
+                    tasks,
+                    progress,
+                )
+
+            save_changes, canceled = label_file_in_runner(
+                label,
+                csv_filepath,
+                labels,
+                settings,
+                tasks,
+                journal,
+            )
+            if save_changes:
+                with TIMER.stage("save"):
+                    cache.write_csv(
+                        df, csv_filepath, settings.sep, settings.cache_enabled
+                    )
+            if journal is not None:
+                journal.remove()
+            label_counts = label_counts.add(
+                df[settings.label_column].value_counts(), fill_value=0
+            )
+            if canceled:
+                break
 
     clear_console()
-    print("Labeling of the CSV file completed")
-    if save_changes:
-        df.to_csv(  # pylint: disable=no-member
-            csv_filepath, sep=config["csv"]["sep"], index=False
+    print("Labeling of the session completed")
+    rule_report.log()
+    for label, count in label_counts.sort_values(ascending=False).items():
+        logger.info(f"\t{label}: {int(count)} rows")
+
+
+def label_shared_file(
+    settings: Settings, csv_filepath: Path, db_path: Path, export: bool = False
+) -> None:
+    """
+    Joins (or creates) the shared session of the csv file and labels leased rows, or
+    merges the labels of the session into the csv file.
+
+    Parameters
+    ----------
+    settings : Settings
+        Parsed settings from the config.ini
+    csv_filepath : Path
+        Path to the csv file
+    db_path : Path
+        SQLite database of the shared session
+    export : bool
+        Merge the labels into the csv file instead of labeling
+    """
+    with TIMER.stage("read_csv"):
+        df = cache.read_csv_cached(csv_filepath, settings.sep, settings.cache_enabled)
+    rule_report = label_rules.RuleReport()
+    with shared.SharedQueue(
+        db_path,
+        lease_seconds=settings.shared_lease_seconds,
+        batch_size=settings.shared_batch_size,
+    ) as queue:
+        if not queue.row_count:
+            # First labeler: the rows to label are determined once for everybody
+            if settings.testmode:
+                keep_label = settings.skip_labels
+            else:
+                keep_label = handle_existing_labels(df, settings.label_column)
+            work_queue = WorkQueue.from_dataframe(df, settings.label_column, keep_label)
+            rule_labels = {}
+            if settings.rules:
+                df[settings.label_column] = df[settings.label_column].astype(object)
+                positions = label_rules.apply_rules(
+                    df,
+                    settings.rules,
+                    settings.label_column,
+                    work_queue.positions,
+                    rule_report,
+                )
+                labels = df[settings.label_column].to_numpy()[positions]
+                rule_labels = {
+                    position: str(label)
+                    for position, label in zip(positions.tolist(), labels)
+                }
+            queue.initialize(
+                csv_filepath.name, len(df), work_queue.positions, rule_labels
+            )
+        elif queue.row_count != len(df):
+            raise ValueError(f"{db_path} does not belong to {csv_filepath}")
+
+        if export:
+            with TIMER.stage("save"):
+                exported = shared.export_labels(
+                    queue, csv_filepath, settings.sep, settings.label_column
+                )
+            print(f"Exported {exported} labels to {csv_filepath}")
+            return
+
+        suggester = (
+            LabelSuggester(settings.labels) if settings.suggestions_enabled else None
         )
+        labeled = 0
+        # Background jobs (prefetching) run while the user decides on a row
+        with TaskRunner() as tasks:
+            try:
+                labeled = label_shared(df, settings, queue, suggester, tasks)
+            except KeyboardInterrupt:
+                tasks.cancel_all()
+        done, total = queue.progress()
 
+    clear_console()
+    print(f"You labeled {labeled} rows, {done} of {total} rows of the session are done")
+    rule_report.log()
+    if done == total:
+        print(f"Run with --export to write the labels into {csv_filepath.name}")
+
+
+def format_category_menu(
+    categories: Sequence[str],
+    suggestion: Optional[str] = None,
+    query_command: bool = False,
+    progress: Sequence[str] = (),
+) -> List[str]:
+    """
+    Creates the lines of the category menu.
+
+    Parameters
+    ----------
+    categories : Sequence[str]
+        List with the class labels
+    suggestion : Optional[str]
+        Suggested label, shown below the categories
+    query_command : bool
+        Show the help for the bulk labeling command
+    progress : Sequence[str]
+        Progress lines of the session, shown above the categories
 
-def get_classification(categories: list) -> str:
+    Returns
+    -------
+    List[str]
+        Lines of the menu
+    """
+    lines = ["", *progress] if progress else []
+    lines.extend(["", "The following categories exist: "])
+    for idx, category in enumerate(categories):
+        lines.append(f"\t{idx+1:x})\t{category}")
+    lines.extend(["", "\tu)\tUmbuchung", "\tq)\tCancel Input"])
+    if query_command:
+        lines.append(
+            '\t/query\tLabel all matching rows, e.g. /payee~"Uber" & amount<-100'
+        )
+    if suggestion is not None:
+        lines.extend(["", f"Suggestion: {suggestion} (press Enter to accept)"])
+    return lines
+
+
+def get_classification(
+    categories: Sequence[str],
+    settings: Optional[Settings] = None,
+    header: Sequence[str] = (),
+    suggestion: Optional[str] = None,
+    on_query: Optional[Callable[[str], Optional[str]]] = None,
+    progress: Optional[LabelProgress] = None,
+) -> str:
     """
     Displays the possible label classes and validates the userinput (must be a valid labelclass or a
     corresponding id). Converts a class id to the class name if necessary
 
     Parameters
     ----------
-    categories : list
+    categories : Sequence[str]
         List with the class labels
+    settings : Optional[Settings]
+        Parsed settings from the config.ini, used for the autocompletion
+    header : Sequence[str]
+        Lines shown above the categories (e.g. the rendered row), header and categories
+        are drawn as one frame
+    suggestion : Optional[str]
+        Suggested label, accepted with an empty input
+    on_query : Optional[Callable[[str], Optional[str]]]
+        Handler for the bulk labeling command (input starting with "/"), returns the
+        label of the current row if it was labeled by the command
+    progress : Optional[LabelProgress]
+        Progress of the session, shown as compact line above the categories
 
     Returns
     -------
@@ -295,18 +1534,20 @@ def get_classification(categories: list) -> str:
     KeyboardInterrupt
         Raised when the user choose to cancel the classification
     """
-    lower_category_list = [x.casefold() for x in categories]
-    category_integer_list = list(range(1, len(lower_category_list) + 1))
-    category_hex_list = list(hex(n) for n in category_integer_list)
-    print("\nThe following categories exist: ")
-    for idx, category in enumerate(categories):
-        print(f"\t{idx+1:x})\t{category}")
-
-    print("\n\tu)\tUmbuchung")
-    print("\tq)\tCancel Input")
+    frame = [
+        *header,
+        *format_category_menu(
+            categories,
+            suggestion,
+            on_query is not None,
+            progress.format_lines() if progress is not None else (),
+        ),
+    ]
+    with TIMER.stage("draw"):
+        SCREEN.draw(frame)
 
     # Setup auto-completion via tab
-    completer = tab_completer.TabCompleter()
+    completer = tab_completer.TabCompleter(settings)
     completer.create_list_completer(categories)
     readline.set_completer_delims("\t")
     readline.parse_and_bind("tab: complete")
@@ -314,37 +1555,76 @@ def get_classification(categories: list) -> str:
 
     while True:
         skip_invalid_print = False
-        selected_category = input(
-            "\nPlease select one of the categories, you can use the name (autocomplete"
-            " via tab) the corresponding number: "
-        )
-        # Check if the input was empty, if so, ask again
+        with TIMER.stage("input"):
+            selected_category = input(
+                "\nPlease select one of the categories, you can use the name"
+                " (autocomplete via tab) the corresponding number: "
+            )
+        # Check if the input was empty, if so, accept the suggestion or ask again
         if not selected_category:
+            if suggestion is not None:
+                return suggestion
             print("\nPlease select a category")
+            SCREEN.invalidate()
             continue
 
-        # Check if there is an exact match
-        if selected_category.casefold() in lower_category_list:
-            clear_console()
-            return resolve_correct_label_name(selected_category, categories)
-        # Check if the user entered the hardcoded value 'Umbuchung'
-        if selected_category.casefold() == "umbuchung" or selected_category == "u":
-            clear_console()
-            return "Umbuchung"
+        # Check if the user entered the bulk labeling command
+        if on_query is not None and selected_category.startswith("/"):
+            label = on_query(selected_category[1:])
+            # Output of the command (matches, prompts) is written below the frame
+            SCREEN.invalidate()
+            if label is not None:
+                return label
+            continue
         # Check if the user entered the exit command
         if selected_category.casefold() == "cancel input" or selected_category == "q":
             raise KeyboardInterrupt("User canceled the input")
-        # Check if the user entered a hex value (-> Id of a category)
-        try:
-            if hex(int(selected_category, 16)) in category_hex_list:
-                selected_category = categories[int(selected_category, 16) - 1]
-                clear_console()
-                return selected_category
-        except ValueError:
-            logger.debug("User input was not a hex value")
+        label = resolve_category_input(selected_category, categories)
+        if label is not None:
+            return label
 
         if not skip_invalid_print:
             print("Invalid Input, please choose a valid category!")
+            # Repeated messages can scroll the frame out of its position
+            SCREEN.invalidate()
+
+
+def resolve_category_input(
+    selected_category: str, categories: Sequence[str]
+) -> Optional[str]:
+    """
+    Resolves the input of the user to a label. Valid inputs are the name of a category
+    (case insensitive), the id (hex) of a category and "u"/"Umbuchung".
+
+    Parameters
+    ----------
+    selected_category : str
+        Input of the user
+    categories : Sequence[str]
+        List with the class labels
+
+    Returns
+    -------
+    Optional[str]
+        Selected label, None if the input is invalid
+    """
+    lower_category_list = [x.casefold() for x in categories]
+    category_integer_list = list(range(1, len(lower_category_list) + 1))
+    category_hex_list = list(hex(n) for n in category_integer_list)
+
+    # Check if there is an exact match
+    if selected_category.casefold() in lower_category_list:
+        return resolve_correct_label_name(selected_category, categories)
+    # Check if the user entered the hardcoded value 'Umbuchung'
+    if selected_category.casefold() == "umbuchung" or selected_category == "u":
+        return "Umbuchung"
+    # Check if the user entered a hex value (-> Id of a category)
+    try:
+        if hex(int(selected_category, 16)) in category_hex_list:
+            return categories[int(selected_category, 16) - 1]
+    except ValueError:
+        logger.debug("User input was not a hex value")
+    return None
 
 
 def resolve_correct_label_name(label: str, label_list: list) -> str:
@@ -374,7 +1654,7 @@ def clear_console():
     """
     Clears console output
     """
-    os.system("cls||clear")
+    SCREEN.clear()
 
 
 def highlight_keywords(
@@ -384,16 +1664,16 @@ def highlight_keywords(
     background_color: str = "YELLOW",
 ) -> str:
     """
-    Loops over the text and adds the necessary characters for word based highlighting.
-    This is maybe not the most effective way to do this, but its good enough for this
-    usecase.
+    Adds the necessary characters for word based highlighting. The keywords are
+    compiled on every call, use a KeywordHighlighter (e.g. Settings.highlighter) for
+    repeated calls with the same keywords.
 
     Parameters
     ----------
     text : str
         The original text to highlight in
     keywords : list
-        List with all words that should be highlighted
+        List with all words (or phrases) that should be highlighted
     foreground_color : str
         Forgroundcolor for highlighted words
     background_color : str
@@ -405,26 +1685,9 @@ def highlight_keywords(
     str
         Text with added characters for highlighting
     """
-    # Skip loop if there are no keywords
-    if len(keywords) > 0:
-        words_in_text = text.split(" ")
-        for idx, word in enumerate(words_in_text):
-            if word.casefold() in [x.casefold() for x in keywords]:
-                highlight_stopper = (
-                    Style.RESET_ALL if idx == len(words_in_text) - 1 else ""
-                )
-
-                text = text.replace(
-                    word,
-                    getattr(Fore, foreground_color.upper())
-                    + getattr(Back, background_color.upper())
-                    + word
-                    + highlight_stopper,
-                )
-            else:
-                text = text.replace(f" {word}", Style.RESET_ALL + f" {word}")
-
-    return text
+    return KeywordHighlighter(keywords, foreground_color, background_color).highlight(
+        text
+    )
 
 
 if __name__ == "__main__":
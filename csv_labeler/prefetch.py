@@ -0,0 +1,126 @@
+# Copyright 2021 Robin Maasjosthusmann. All rights reserved.
+# Use of this source code is governed by a BSD-style
+# license that can be found in the LICENSE file.
+"""
+Prefetching
+
+While the user decides on the current row, the next rows of the work queue are
+rendered as blocking jobs of the TaskRunner (next to the autosaves), so the next frame
+can be shown as soon as a label is accepted.
+"""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional
+
+from csv_labeler.lazy import logger
+from csv_labeler.tasks import TaskRunner
+from csv_labeler.work_queue import WorkQueue
+
+if TYPE_CHECKING:
+    from concurrent.futures import Future
+
+
+class Prefetcher:
+    """
+    Keeps jobs for the frames of the next {depth} positions of the work queue. The
+    queue is only read by the labeling loop, frames of positions that were discarded
+    in the meantime are canceled.
+    """
+
+    def __init__(
+        self,
+        render: Callable[[int], List[str]],
+        queue: WorkQueue,
+        depth: int,
+        tasks: Optional[TaskRunner] = None,
+    ) -> None:
+        """
+        Parameters
+        ----------
+        render : Callable[[int], List[str]]
+            Renders the frame of a position
+        queue : WorkQueue
+            Rows that still have to be labeled
+        depth : int
+            Number of upcoming rows that are rendered in advance, 0 disables it
+        tasks : Optional[TaskRunner]
+            Runs the render jobs, an own runner is used if none is passed
+        """
+        self.render = render
+        self.queue = queue
+        self.depth = depth
+        self.tasks = tasks
+        self._owns_tasks = False
+        self._frames: Dict[int, Future] = {}
+
+    def __enter__(self) -> "Prefetcher":
+        self.start()
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.stop()
+
+    def start(self) -> None:
+        """
+        Schedules the first frames, nothing is prefetched if the depth is 0.
+        """
+        if self.depth <= 0:
+            return
+        if self.tasks is None:
+            self.tasks = TaskRunner("csv_labeler-prefetch")
+            self._owns_tasks = True
+        self._schedule()
+
+    def stop(self) -> None:
+        """
+        Cancels the frames that were not rendered yet.
+        """
+        for future in self._frames.values():
+            future.cancel()
+        self._frames.clear()
+        if self._owns_tasks:
+            self.tasks.close(cancel=True)
+            self._owns_tasks = False
+
+    def get(self, position: int) -> List[str]:
+        """
+        Returns the frame of the position, it is rendered synchronously if it was not
+        prefetched (yet).
+
+        Parameters
+        ----------
+        position : int
+            Position of the row
+
+        Returns
+        -------
+        List[str]
+            Rendered lines of the row
+        """
+        future = self._frames.pop(position, None)
+        frame = None
+        if future is not None:
+            if future.done() and not future.cancelled() and future.exception() is None:
+                frame = future.result()
+            else:
+                # Still waiting behind another job (e.g. a save) or failed, rows are
+                # rendered again synchronously, prefetching is only an optimization
+                future.cancel()
+        # The next positions can be rendered while the user decides on this one
+        self._schedule()
+        if frame is None:
+            logger.debug(f"Frame of row {position} was not prefetched")
+            frame = self.render(position)
+        return frame
+
+    def _schedule(self) -> None:
+        if self.depth <= 0 or self.tasks is None:
+            return
+        upcoming = self.queue.peek(self.depth)
+        # Drop frames of rows that were discarded from the queue
+        for position in set(self._frames) - set(upcoming):
+            self._frames.pop(position).cancel()
+        for position in upcoming:
+            if position not in self._frames:
+                self._frames[position] = self.tasks.run_blocking(self.render, position)
@@ -0,0 +1,151 @@
+# Copyright 2021 Robin Maasjosthusmann. All rights reserved.
+# Use of this source code is governed by a BSD-style
+# license that can be found in the LICENSE file.
+"""
+Profiling
+
+Opt-in timing of the stages of a labeling session (csv parsing, rendering, waiting
+for the user, completion, labeling and saving). The timings are kept in memory and
+summarized with the logger at the end of the session. A disabled timer only costs an
+attribute lookup per stage.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import cProfile
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import TYPE_CHECKING, ContextManager, Dict, Iterator, List, Optional, Union
+
+from csv_labeler.lazy import lazy_import, logger
+
+if TYPE_CHECKING:
+    import numpy as np
+else:
+    np = lazy_import("numpy")
+
+
+# Stages in which the program waits for the user, completion runs inside of them
+HUMAN_STAGES = ("input",)
+COMPLETION_STAGE = "completion"
+
+_NO_TIMING: ContextManager[None] = contextlib.nullcontext()
+
+
+class StageTimer:
+    """
+    Collects monotonic timings per stage.
+    """
+
+    def __init__(self) -> None:
+        self.enabled = False
+        self.timings: Dict[str, List[float]] = defaultdict(list)
+        self.rows = 0
+        self._started = time.perf_counter()
+        self._profile: Optional[cProfile.Profile] = None
+
+    def start(self, profile: bool = False) -> None:
+        """
+        Enables the timer and resets all timings.
+
+        Parameters
+        ----------
+        profile : bool
+            Also run cProfile for the whole session
+        """
+        self.enabled = True
+        self.timings.clear()
+        self.rows = 0
+        self._started = time.perf_counter()
+        if profile:
+            self._profile = cProfile.Profile()
+            self._profile.enable()
+
+    def stage(self, name: str) -> ContextManager[None]:
+        """
+        Times the block as stage {name}.
+
+        Parameters
+        ----------
+        name : str
+            Name of the stage
+
+        Returns
+        -------
+        ContextManager[None]
+            Context manager that records the duration of the block
+        """
+        if not self.enabled:
+            return _NO_TIMING
+        return self._timed(name)
+
+    @contextlib.contextmanager
+    def _timed(self, name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[name].append(time.perf_counter() - start)
+
+    def row_done(self) -> None:
+        """Counts a labeled row"""
+        if self.enabled:
+            self.rows += 1
+
+    def summary(self) -> List[str]:
+        """
+        Creates the report: p50/p95/max per stage, rows per minute and machine time vs.
+        human think time.
+
+        Returns
+        -------
+        List[str]
+            Lines of the report
+        """
+        elapsed = time.perf_counter() - self._started
+        lines = [
+            f"{'stage':<12} {'calls':>7} {'p50 [ms]':>10} {'p95 [ms]':>10}"
+            f" {'max [ms]':>10} {'total [s]':>10}"
+        ]
+        for name, timings in sorted(self.timings.items()):
+            values = np.asarray(timings) * 1000
+            p50, p95 = np.percentile(values, [50, 95])
+            lines.append(
+                f"{name:<12} {len(values):>7} {p50:>10.2f} {p95:>10.2f}"
+                f" {values.max():>10.2f} {values.sum() / 1000:>10.2f}"
+            )
+        completion = sum(self.timings.get(COMPLETION_STAGE, []))
+        human = sum(sum(self.timings.get(name, [])) for name in HUMAN_STAGES)
+        human = max(human - completion, 0.0)
+        rows_per_minute = self.rows / elapsed * 60 if elapsed else 0.0
+        lines.append(
+            f"{self.rows} rows in {elapsed:.1f} s ({rows_per_minute:.1f} rows/min),"
+            f" machine time {elapsed - human:.2f} s, think time {human:.2f} s"
+        )
+        return lines
+
+    def stop(self, profile_file: Union[str, Path, None] = None) -> None:
+        """
+        Logs the summary, dumps the cProfile statistics and disables the timer.
+
+        Parameters
+        ----------
+        profile_file : Union[str, Path, None]
+            Target of the cProfile dump (pstats format)
+        """
+        if not self.enabled:
+            return
+        if self._profile is not None:
+            self._profile.disable()
+            if profile_file:
+                self._profile.dump_stats(str(profile_file))
+                logger.info(f"cProfile statistics written to {profile_file}")
+            self._profile = None
+        for line in self.summary():
+            logger.info(line)
+        self.enabled = False
+
+
+TIMER = StageTimer()
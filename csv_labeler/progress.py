@@ -0,0 +1,227 @@
+# Copyright 2021 Robin Maasjosthusmann. All rights reserved.
+# Use of this source code is governed by a BSD-style
+# license that can be found in the LICENSE file.
+"""
+Progress
+
+Counters of the labeling session: labeled/unlabeled rows, rows per label and the
+labeling speed. The label column is counted once (vectorized value_counts), afterwards
+every decision only updates the counters, so the progress line shown with the category
+menu never scans the label column. Runs over several chunks or files share one
+progress, seeded from a counting pass over all label columns (see from_counts).
+Speed and ETA use a moving average over the last decisions, so breaks of the user fade
+out quickly.
+"""
+
+from __future__ import annotations
+
+import time
+from collections import Counter, deque
+from typing import Deque, Dict, List, Optional, Sequence, Tuple
+
+from csv_labeler.lazy import is_missing
+
+
+class LabelProgress:
+    """
+    Incrementally maintained progress of a labeling run (DataFrame, small file, all
+    chunks of a file or all files of a session).
+    """
+
+    def __init__(self, labels: Sequence, pending: int, window: int = 20) -> None:
+        """
+        Parameters
+        ----------
+        labels : Sequence
+            Label column (Series or list) before the interactive loop
+        pending : int
+            Number of rows the user has to label (length of the work queue)
+        window : int
+            Number of decisions used for the moving average of the speed
+        """
+        self.total = len(labels)
+        self.counts: Dict[str, int] = _count_labels(labels)
+        self.labeled = sum(self.counts.values())
+        self.pending = pending
+        self._window: Deque[Tuple[float, int]] = deque(maxlen=max(window, 1))
+        self._window_seconds = 0.0
+        self._window_rows = 0
+        self._last = time.monotonic()
+
+    @classmethod
+    def from_counts(
+        cls, total: int, counts: Dict[str, int], pending: int, window: int = 20
+    ) -> "LabelProgress":
+        """
+        Creates the progress of a run whose rows are not loaded at once.
+
+        Parameters
+        ----------
+        total : int
+            Number of rows of the run
+        counts : Dict[str, int]
+            Number of rows per label before the run
+        pending : int
+            Number of rows the user has to label
+        window : int
+            Number of decisions used for the moving average of the speed
+
+        Returns
+        -------
+        LabelProgress
+            Progress of the run
+        """
+        progress = cls([], pending, window)
+        progress.total = total
+        progress.counts = dict(counts)
+        progress.labeled = sum(progress.counts.values())
+        return progress
+
+    @property
+    def unlabeled(self) -> int:
+        """Number of rows without a label"""
+        return self.total - self.labeled
+
+    def record(self, label: str, previous: Sequence) -> None:
+        """
+        Updates the counters after a decision of the user.
+
+        Parameters
+        ----------
+        label : str
+            Selected label
+        previous : Sequence
+            Labels of the rows before the decision, one per labeled row (more than one
+            for a query or a group)
+        """
+        if not len(previous):
+            return
+        now = time.monotonic()
+        for old in previous:
+            if is_missing(old):
+                self.labeled += 1
+            else:
+                self.counts[old] = self.counts.get(old, 0) - 1
+        self.counts[label] = self.counts.get(label, 0) + len(previous)
+        self.pending = max(self.pending - len(previous), 0)
+
+        if len(self._window) == self._window.maxlen:
+            seconds, rows = self._window[0]
+            self._window_seconds -= seconds
+            self._window_rows -= rows
+        self._window.append((now - self._last, len(previous)))
+        self._window_seconds += now - self._last
+        self._window_rows += len(previous)
+        self._last = now
+
+    def update(self, previous: Sequence, labels: Sequence, skipped: int) -> None:
+        """
+        Updates the counters for labels that were set without a decision of the user
+        (journal of a resumed session, rules), e.g. when the next chunk is loaded.
+
+        Parameters
+        ----------
+        previous : Sequence
+            Label column of the chunk (or file) as it was counted
+        labels : Sequence
+            Label column after the journal and the rules were applied
+        skipped : int
+            Number of counted pending rows that do not have to be labeled anymore
+        """
+        for label, count in _count_labels(previous).items():
+            self.counts[label] = self.counts.get(label, 0) - count
+            self.labeled -= count
+        for label, count in _count_labels(labels).items():
+            self.counts[label] = self.counts.get(label, 0) + count
+            self.labeled += count
+        self.pending = max(self.pending - skipped, 0)
+
+    def add(self, labels: Sequence, pending: int) -> None:
+        """
+        Adds the rows of the next file of the run, e.g. when a file of a session is
+        handed over by the preloader.
+
+        Parameters
+        ----------
+        labels : Sequence
+            Label column of the file
+        pending : int
+            Number of rows of the file the user has to label
+        """
+        self.total += len(labels)
+        for label, count in _count_labels(labels).items():
+            self.counts[label] = self.counts.get(label, 0) + count
+            self.labeled += count
+        self.pending += pending
+
+    def rows_per_minute(self) -> Optional[float]:
+        """
+        Returns the moving average of the labeled rows per minute, None before the
+        first decision.
+        """
+        if not self._window_rows or self._window_seconds <= 0:
+            return None
+        return self._window_rows * 60 / self._window_seconds
+
+    def eta(self) -> Optional[float]:
+        """
+        Returns the estimated seconds until all pending rows are labeled, None if the
+        speed is not known yet.
+        """
+        speed = self.rows_per_minute()
+        if speed is None:
+            return None
+        return self.pending * 60 / speed
+
+    def format_lines(self) -> List[str]:
+        """
+        Creates the progress lines shown with the category menu.
+
+        Returns
+        -------
+        List[str]
+            Progress line and distribution of the labels
+        """
+        share = self.labeled / self.total * 100 if self.total else 100.0
+        speed = self.rows_per_minute()
+        eta = self.eta()
+        progress = (
+            f"Labeled {self.labeled}/{self.total} ({share:.0f}%), {self.pending} left"
+            f" | {'-' if speed is None else f'{speed:.1f}'} rows/min"
+            f" | ETA {'-' if eta is None else format_duration(eta)}"
+        )
+        distribution = ", ".join(
+            f"{label}: {count}"
+            for label, count in sorted(self.counts.items(), key=lambda x: -x[1])
+            if count
+        )
+        return [progress, distribution] if distribution else [progress]
+
+
+def format_duration(seconds: float) -> str:
+    """
+    Formats a duration compact, e.g. "45s", "6m 24s" or "1h 05m".
+
+    Parameters
+    ----------
+    seconds : float
+        Duration in seconds
+
+    Returns
+    -------
+    str
+        Formatted duration
+    """
+    seconds = int(round(seconds))
+    if seconds < 60:
+        return f"{seconds}s"
+    if seconds < 3600:
+        return f"{seconds // 60}m {seconds % 60:02d}s"
+    return f"{seconds // 3600}h {seconds % 3600 // 60:02d}m"
+
+
+def _count_labels(labels: Sequence) -> Dict[str, int]:
+    if hasattr(labels, "value_counts"):
+        # Vectorized for a Series, missing values are dropped
+        return {k: int(v) for k, v in labels.value_counts().items()}
+    return dict(Counter(x for x in labels if not is_missing(x)))
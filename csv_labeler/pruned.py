@@ -0,0 +1,291 @@
+# Copyright 2021 Robin Maasjosthusmann. All rights reserved.
+# Use of this source code is governed by a BSD-style
+# license that can be found in the LICENSE file.
+"""
+Pruned loading
+
+Only the relevant columns and the label column are parsed, with compact dtypes
+(categorical text columns, downcast integers). On save the source file is streamed
+record by record and only the label field is replaced, so all other bytes (columns
+that were never loaded, quoting, line endings) stay exactly as they were.
+"""
+
+from __future__ import annotations
+
+import csv
+import io
+import os
+from pathlib import Path
+from typing import (
+    TYPE_CHECKING,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
+
+from csv_labeler import streaming
+from csv_labeler.lazy import is_missing, lazy_import
+
+if TYPE_CHECKING:
+    import pandas as pd
+else:
+    pd = lazy_import("pandas")
+
+# Text columns with at most this share of distinct values are stored as categorical
+CATEGORY_RATIO = 0.5
+
+# States of the quoting state machine (_scan)
+_FIELD_START, _UNQUOTED, _QUOTED, _QUOTE_IN_QUOTED = range(4)
+
+
+def read_pruned(
+    csv_filepath: Union[str, Path],
+    sep: str,
+    relevant_columns: Sequence[str],
+    label_column: str,
+) -> pd.DataFrame:
+    """
+    Parses only the relevant and the label column of the csv file.
+
+    Parameters
+    ----------
+    csv_filepath : Union[str, Path]
+        Path to the csv file
+    sep : str
+        Separator used inside of the csv file
+    relevant_columns : Sequence[str]
+        Columns shown while labeling (case insensitive), all columns if empty
+    label_column : str
+        Name of the column which contains the labels
+
+    Returns
+    -------
+    pd.DataFrame
+        Relevant columns and label column in the order of the file
+    """
+    header = pd.read_csv(csv_filepath, sep=sep, nrows=0).columns
+    wanted = {x.casefold() for x in relevant_columns}
+    usecols = [
+        name
+        for name in header
+        if not wanted or name.casefold() in wanted or name == label_column
+    ]
+    if label_column not in usecols:
+        raise ValueError(f"Label column {label_column} does not exist")
+    return compact_dtypes(pd.read_csv(csv_filepath, sep=sep, usecols=usecols))
+
+
+def compact_dtypes(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Converts repetitive text columns to categoricals and downcasts integer columns.
+    Float columns are kept, float32 would change the printed amounts.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        Parsed DataFrame
+
+    Returns
+    -------
+    pd.DataFrame
+        DataFrame with compact dtypes
+    """
+    for column in df.columns:
+        series = df[column]
+        if pd.api.types.is_integer_dtype(series):
+            df[column] = pd.to_numeric(series, downcast="integer")
+        elif pd.api.types.is_object_dtype(series) or pd.api.types.is_string_dtype(
+            series
+        ):
+            if len(series) and series.nunique() <= CATEGORY_RATIO * len(series):
+                df[column] = series.astype("category")
+    return df
+
+
+def write_labels(
+    csv_filepath: Union[str, Path],
+    sep: str,
+    label_column: str,
+    labels: Iterable,
+) -> None:
+    """
+    Writes the labels into the csv file. The file is streamed record by record and
+    only label fields whose value changed are replaced, everything else is copied
+    byte for byte. The file is replaced atomically.
+
+    Parameters
+    ----------
+    csv_filepath : Union[str, Path]
+        Path to the csv file
+    sep : str
+        Separator used inside of the csv file
+    label_column : str
+        Name of the column which contains the labels
+    labels : Iterable
+        Label per row (in file order), missing values keep the original field and
+        empty strings clear it
+
+    Raises
+    ------
+    ValueError
+        If the label column does not exist or the number of rows does not match
+    """
+    temp_path = streaming.make_temp_file(csv_filepath)
+    try:
+        with open(csv_filepath, encoding="utf-8", newline="") as source, open(
+            temp_path, "w", encoding="utf-8", newline=""
+        ) as target:
+            target.writelines(_replace_labels(source, sep, label_column, labels))
+        streaming.replace_file(temp_path, csv_filepath)
+    finally:
+        if temp_path.exists():
+            os.remove(temp_path)
+
+
+def _replace_labels(
+    source: Iterable[str], sep: str, label_column: str, labels: Iterable
+) -> Iterator[str]:
+    records = iter_records(source, sep)
+    header = next(records, None)
+    if header is None:
+        raise ValueError("The csv file is empty")
+    yield header
+    # A byte order mark is kept in the output but is not part of the first name
+    body = _split_terminator(header)[0].lstrip("\ufeff")
+    names = [_unquote(x) for x in split_fields(body, sep)]
+    if label_column not in names:
+        raise ValueError(f"Label column {label_column} does not exist")
+    index = names.index(label_column)
+
+    labels = iter(labels)
+    for record in records:
+        body, terminator = _split_terminator(record)
+        if not body:
+            # Blank lines are skipped by pd.read_csv, they are not a row
+            yield record
+            continue
+        try:
+            label = next(labels)
+        except StopIteration as error:
+            raise ValueError("The csv file has more rows than labels") from error
+        if is_missing(label):
+            yield record
+            continue
+        fields = split_fields(body, sep)
+        fields.extend([""] * (index + 1 - len(fields)))
+        if _unquote(fields[index]) == str(label):
+            yield record
+            continue
+        fields[index] = _quote(str(label), sep)
+        yield sep.join(fields) + terminator
+    if next(labels, None) is not None:
+        raise ValueError("The csv file has less rows than labels")
+
+
+def iter_records(lines: Iterable[str], sep: str) -> Iterator[str]:
+    """
+    Joins physical lines to csv records (quoted fields can contain line breaks). The
+    line endings are kept.
+
+    Parameters
+    ----------
+    lines : Iterable[str]
+        Lines of a file opened with newline=""
+    sep : str
+        Separator used inside of the csv file
+
+    Yields
+    ------
+    str
+        Next record including its line ending
+    """
+    pending = ""
+    state = _FIELD_START
+    for line in lines:
+        if not pending and '"' not in line:
+            yield line
+            continue
+        pending += line
+        state = _scan(line, sep, state)
+        if state != _QUOTED:
+            yield pending
+            pending = ""
+            state = _FIELD_START
+    if pending:
+        yield pending
+
+
+def split_fields(body: str, sep: str) -> List[str]:
+    """
+    Splits a record (without line ending) into its raw fields, quotes are kept.
+
+    Parameters
+    ----------
+    body : str
+        Record without line ending
+    sep : str
+        Separator used inside of the csv file
+
+    Returns
+    -------
+    List[str]
+        Raw fields
+    """
+    if '"' not in body:
+        return body.split(sep)
+    boundaries: List[int] = []
+    _scan(body, sep, _FIELD_START, boundaries)
+    starts = [0] + [x + 1 for x in boundaries]
+    ends = boundaries + [len(body)]
+    return [body[start:end] for start, end in zip(starts, ends)]
+
+
+def _scan(
+    text: str, sep: str, state: int, boundaries: Optional[List[int]] = None
+) -> int:
+    """
+    Runs the quoting state machine of the csv module over the text. A quote only
+    opens a quoted field at the start of the field (12" Pizza is plain text), inside
+    of a quoted field "" is an escaped quote. The positions of the separators that
+    end a field are appended to boundaries.
+    """
+    for position, char in enumerate(text):
+        if state == _QUOTED:
+            if char == '"':
+                state = _QUOTE_IN_QUOTED
+        elif char == sep:
+            if boundaries is not None:
+                boundaries.append(position)
+            state = _FIELD_START
+        elif state == _FIELD_START:
+            state = _QUOTED if char == '"' else _UNQUOTED
+        elif state == _QUOTE_IN_QUOTED:
+            # "" is an escaped quote, any other character follows the closed quotes
+            state = _QUOTED if char == '"' else _UNQUOTED
+    return state
+
+
+def _split_terminator(record: str) -> Tuple[str, str]:
+    if record.endswith("\r\n"):
+        return record[:-2], "\r\n"
+    if record.endswith(("\n", "\r")):
+        return record[:-1], record[-1]
+    return record, ""
+
+
+def _unquote(field: str) -> str:
+    if len(field) >= 2 and field[0] == field[-1] == '"':
+        return field[1:-1].replace('""', '"')
+    return field
+
+
+def _quote(value: str, sep: str) -> str:
+    if not value:
+        return value
+    buffer = io.StringIO()
+    csv.writer(buffer, delimiter=sep, lineterminator="").writerow([value])
+    return buffer.getvalue()
@@ -0,0 +1,232 @@
+# Copyright 2021 Robin Maasjosthusmann. All rights reserved.
+# Use of this source code is governed by a BSD-style
+# license that can be found in the LICENSE file.
+"""
+Queries
+
+Small filter language over the columns of the csv file, e.g.
+payee~"Uber" & amount<-100. A query is evaluated for all rows at once with
+vectorized pandas operations.
+
+Conditions:
+    column~"regex"     column contains the regex (case insensitive)
+    column!~"regex"    column does not contain the regex
+    column==value      equal (numbers or case insensitive text)
+    column!=value      not equal
+    column<number      also <=, > and >=
+Conditions are combined with "&", all of them have to match.
+"""
+
+from __future__ import annotations
+
+import operator
+import re
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, NamedTuple, Sequence, Union
+
+from csv_labeler.lazy import lazy_import
+
+if TYPE_CHECKING:
+    import numpy as np
+    import pandas as pd
+else:
+    np = lazy_import("numpy")
+    pd = lazy_import("pandas")
+
+
+_CONDITION = re.compile(
+    r'^\s*(?P<column>[^~<>=!&"]+?)\s*(?P<operator>!~|~|==|!=|<=|>=|<|>)'
+    r'\s*(?P<value>"(?:[^"\\]|\\.)*"|[^"\s]+)\s*$'
+)
+
+_COMPARISONS: Dict[str, Callable[[Any, Any], Any]] = {
+    "==": operator.eq,
+    "!=": operator.ne,
+    "<": operator.lt,
+    "<=": operator.le,
+    ">": operator.gt,
+    ">=": operator.ge,
+}
+
+
+class QueryError(ValueError):
+    """
+    Raised for queries with an invalid syntax or unknown columns.
+    """
+
+
+class Condition(NamedTuple):
+    """
+    Single condition of a query
+    """
+
+    column: str
+    operator: str
+    value: Union[str, float]
+
+
+def parse_query(query: str) -> List[Condition]:
+    """
+    Parses the query into its conditions.
+
+    Parameters
+    ----------
+    query : str
+        Query like payee~"Uber" & amount<-100
+
+    Returns
+    -------
+    List[Condition]
+        Conditions of the query
+
+    Raises
+    ------
+    QueryError
+        If the query is empty or invalid
+    """
+    conditions = []
+    for part in _split_conditions(query):
+        match = _CONDITION.match(part)
+        if match is None:
+            raise QueryError(f"Invalid condition: {part.strip()}")
+        op = match.group("operator")
+        raw_value = match.group("value")
+        quoted = raw_value.startswith('"')
+        value: Union[str, float]
+        if op in ("~", "!~"):
+            # Backslashes are kept, they belong to the regex
+            value = raw_value[1:-1] if quoted else raw_value
+            try:
+                re.compile(value)
+            except re.error as error:
+                raise QueryError(f"Invalid regex {value}: {error}") from error
+        elif quoted:
+            value = re.sub(r"\\(.)", r"\1", raw_value[1:-1])
+        else:
+            try:
+                value = float(raw_value)
+            except ValueError:
+                value = raw_value
+        if op in ("<", "<=", ">", ">=") and not isinstance(value, float):
+            raise QueryError(f"{op} needs a number: {part.strip()}")
+        conditions.append(Condition(match.group("column"), op, value))
+    if not conditions:
+        raise QueryError("Empty query")
+    return conditions
+
+
+def evaluate(conditions: Sequence[Condition], df: pd.DataFrame) -> np.ndarray:
+    """
+    Evaluates the conditions for all rows of the DataFrame.
+
+    Parameters
+    ----------
+    conditions : Sequence[Condition]
+        Parsed query
+    df : pd.DataFrame
+        DataFrame (or chunk of the csv file)
+
+    Returns
+    -------
+    np.ndarray
+        Boolean mask, True for all rows that match all conditions
+
+    Raises
+    ------
+    QueryError
+        If a column of the query does not exist
+    """
+    names = referenced_columns(conditions, df.columns)
+    mask = np.ones(len(df), dtype=bool)
+    for condition, name in zip(conditions, names):
+        mask &= _evaluate_condition(condition, df[name])
+    return mask
+
+
+def referenced_columns(
+    conditions: Sequence[Condition], columns: Sequence[Any]
+) -> List[Any]:
+    """
+    Resolves the column of every condition (case insensitive).
+
+    Parameters
+    ----------
+    conditions : Sequence[Condition]
+        Parsed query
+    columns : Sequence[Any]
+        Column names of the DataFrame
+
+    Returns
+    -------
+    List[Any]
+        Column name per condition
+
+    Raises
+    ------
+    QueryError
+        If a column of the query does not exist
+    """
+    lookup = {str(name).casefold(): name for name in columns}
+    names = []
+    for condition in conditions:
+        name = lookup.get(condition.column.casefold())
+        if name is None:
+            raise QueryError(f"Unknown column: {condition.column}")
+        names.append(name)
+    return names
+
+
+def _evaluate_condition(condition: Condition, series: pd.Series) -> np.ndarray:
+    if condition.operator in ("~", "!~"):
+        matches = _as_text(series).str.contains(
+            condition.value, case=False, regex=True, na=False
+        )
+        if condition.operator == "!~":
+            # Missing values never match, also not the negation
+            matches = ~matches & series.notna()
+        return matches.to_numpy(dtype=bool)
+
+    compare = _COMPARISONS[condition.operator]
+    if isinstance(condition.value, float):
+        result = compare(_as_number(series), condition.value)
+    else:
+        result = compare(_as_text(series).str.casefold(), condition.value.casefold())
+    # Missing values never match (NaN comparisons are False, except for !=)
+    return (result & series.notna()).to_numpy(dtype=bool)
+
+
+def _as_text(series: pd.Series) -> pd.Series:
+    # Missing values stay missing, as text they would be "nan"/"None" and match
+    return series.astype(str).where(series.notna())
+
+
+def _as_number(series: pd.Series) -> pd.Series:
+    if pd.api.types.is_numeric_dtype(series):
+        return series
+    # Amounts inside of csv exports often use a decimal comma
+    return pd.to_numeric(
+        series.astype(str).str.replace(",", ".", regex=False), errors="coerce"
+    )
+
+
+def _split_conditions(query: str) -> List[str]:
+    """
+    Splits the query at every "&" that is not inside of quotes.
+    """
+    parts = []
+    current: List[str] = []
+    in_quotes = False
+    escaped = False
+    for char in query:
+        if escaped:
+            escaped = False
+        elif char == "\\":
+            escaped = True
+        elif char == '"':
+            in_quotes = not in_quotes
+        elif char == "&" and not in_quotes:
+            parts.append("".join(current))
+            current = []
+            continue
+        current.append(char)
+    parts.append("".join(current))
+    return [part for part in parts if part.strip()]
@@ -0,0 +1,176 @@
+# Copyright 2021 Robin Maasjosthusmann. All rights reserved.
+# Use of this source code is governed by a BSD-style
+# license that can be found in the LICENSE file.
+"""
+Rendering
+
+A RenderPlan is compiled once per DataFrame schema. It contains the positions of the
+relevant columns, the column widths and the text wrapper, so rendering a row only
+touches the relevant values.
+"""
+
+from __future__ import annotations
+
+import functools
+import textwrap
+from typing import TYPE_CHECKING, Any, List, Sequence, Tuple
+
+from csv_labeler.lazy import is_missing
+from csv_labeler.settings import Settings
+
+if TYPE_CHECKING:
+    import numpy as np
+    import pandas as pd
+
+
+class RenderPlan:
+    """
+    Precomputed layout for printing the relevant columns of a row.
+    """
+
+    def __init__(self, columns: Sequence[str], settings: Settings) -> None:
+        # If not at least one relevant column is defined, use all columns except of
+        # label_column
+        relevant_columns = settings.relevant_columns_casefold
+        if not relevant_columns:
+            relevant_columns = frozenset(
+                x.casefold()
+                for x in columns
+                if x.casefold() != settings.label_column.casefold()
+            )
+        self.positions: Tuple[int, ...] = tuple(
+            i for i, name in enumerate(columns) if name.casefold() in relevant_columns
+        )
+        self.names: Tuple[str, ...] = tuple(columns[i] for i in self.positions)
+
+        # Use the length of the longest column name to determine the width of the "name"
+        # column. The width of the "value" column is the remaining space of the
+        # {line_width} defined in the config.ini minus the width of the "name" column and
+        # the vale of {name_value_seperator_width} (also defined in config.ini.)
+        name_columns = settings.relevant_columns or self.names or ("",)
+        self.name_column_width = len(max(name_columns, key=len))
+        self.value_column_width = settings.line_length - self.name_column_width
+        self.separator_width = settings.name_value_seperator_width
+        self.wrapper = textwrap.TextWrapper(width=settings.line_length)
+        self.highlighter = settings.highlighter
+
+    def column_values(self, df: pd.DataFrame) -> List[np.ndarray]:
+        """
+        Extracts the relevant columns of the DataFrame once, so the values of a row can
+        be looked up by position without creating a row Series.
+
+        Parameters
+        ----------
+        df : pd.DataFrame
+            DataFrame with the schema of the plan
+
+        Returns
+        -------
+        List[np.ndarray]
+            One array per relevant column
+        """
+        return [df.iloc[:, position].to_numpy() for position in self.positions]
+
+    def render_row(self, row: pd.Series) -> List[str]:
+        """
+        Renders a row Series with the schema of the plan.
+
+        Parameters
+        ----------
+        row : pd.Series
+            Row of the csv file/dataframe
+
+        Returns
+        -------
+        List[str]
+            Output lines
+        """
+        return self.render([row.iat[position] for position in self.positions])
+
+    def render_position(self, columns: List[np.ndarray], position: int) -> List[str]:
+        """
+        Renders the row at the position from the arrays of column_values.
+
+        Parameters
+        ----------
+        columns : List[np.ndarray]
+            Relevant columns, see column_values
+        position : int
+            Position of the row
+
+        Returns
+        -------
+        List[str]
+            Output lines
+        """
+        return self.render([column[position] for column in columns])
+
+    def render(self, values: Sequence[Any]) -> List[str]:
+        """
+        Formats the values of the relevant columns. Does some preprecessing for string
+        values (removes linebreaks, splits into multiple lines if the text is to
+        long...).
+
+        Parameters
+        ----------
+        values : Sequence[Any]
+            Values of the relevant columns, in the order of the plan
+
+        Returns
+        -------
+        List[str]
+            Output lines
+        """
+        name_width = self.name_column_width
+        value_width = self.value_column_width
+        separator_width = self.separator_width
+        lines = []
+        for name, value in zip(self.names, values):
+            # Check for empty row -> no further processing needed if empty
+            if is_missing(value):
+                print_value = "None"
+            elif isinstance(value, str):
+                # Cleanup text & highlight keywords (only in strings)
+                print_value = " ".join(value.replace("\\", "").split())
+                print_value = self.highlighter.highlight(print_value)
+            else:
+                print_value = value
+
+            # If column contains text, split it into smaller parts to fit inside default
+            # terminals
+            if isinstance(value, str):
+                line_list = self.wrapper.wrap(text=print_value) or [""]
+                lines.append(
+                    f"{name:{name_width}}:"
+                    f'{"":{separator_width}}{line_list[0]:{value_width}}'
+                )
+                for element in line_list[1:]:
+                    lines.append(
+                        f'{"":{name_width}} {"":{separator_width}}{element:{value_width}}'
+                    )
+            else:
+                lines.append(
+                    f"{name:{name_width}}:"
+                    f'{"":{separator_width}}{str(print_value):{value_width}}'
+                )
+        return lines
+
+
+@functools.lru_cache(maxsize=8)
+def get_render_plan(columns: Tuple[str, ...], settings: Settings) -> RenderPlan:
+    """
+    Returns the cached render plan for the schema.
+
+    Parameters
+    ----------
+    columns : Tuple[str, ...]
+        Column names of the DataFrame
+    settings : Settings
+        Parsed settings from the config.ini
+
+    Returns
+    -------
+    RenderPlan
+        Compiled plan
+    """
+    return RenderPlan(columns, settings)
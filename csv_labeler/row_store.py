@@ -0,0 +1,159 @@
+# Copyright 2021 Robin Maasjosthusmann. All rights reserved.
+# Use of this source code is governed by a BSD-style
+# license that can be found in the LICENSE file.
+"""
+Row storage
+
+The labeling loop (main.label_rows) reads and writes labels by row position through
+one of these stores, so the same loop labels a DataFrame (or chunk) and the rows of a
+small file (see small_file.py). Features that need the typed DataFrame (rules,
+grouping and queries) work on store.dataframe() and copy their labels back with
+store.pull().
+"""
+
+from __future__ import annotations
+
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Hashable,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
+
+from csv_labeler.lazy import lazy_import
+
+if TYPE_CHECKING:
+    import numpy as np
+    import pandas as pd
+
+    from csv_labeler.rendering import RenderPlan
+    from csv_labeler.small_file import SmallTable
+else:
+    np = lazy_import("numpy")
+    pd = lazy_import("pandas")
+
+
+class DataFrameRows:
+    """
+    Rows of a DataFrame, the labels are stored in its label column.
+    """
+
+    def __init__(self, df: pd.DataFrame, label_column: str) -> None:
+        self.df = df
+        self.label_column = label_column
+        self._label_position = df.columns.get_loc(label_column)
+
+    def __len__(self) -> int:
+        return len(self.df)
+
+    @property
+    def columns(self) -> Tuple[str, ...]:
+        """Names of the columns"""
+        return tuple(self.df.columns)
+
+    @property
+    def labels(self) -> pd.Series:
+        """Label column, e.g. for the autosave"""
+        return self.df[self.label_column]
+
+    def get(self, position: int) -> Any:
+        """Label of the row at the position"""
+        return self.df.iat[position, self._label_position]
+
+    def set(self, position: int, label: str) -> None:
+        """Labels the row at the position"""
+        self.df.iat[position, self._label_position] = label
+
+    def key(self, position: int) -> Hashable:
+        """Key of the row inside of the journal (index label)"""
+        return self.df.index[position]
+
+    def column_values(self, plan: RenderPlan) -> List[np.ndarray]:
+        """Relevant columns of the plan, see RenderPlan.column_values"""
+        return plan.column_values(self.df)
+
+    def labeled_positions(self) -> np.ndarray:
+        """Positions of all rows with a label"""
+        return np.flatnonzero(self.labels.notna().to_numpy())
+
+    def dataframe(self) -> pd.DataFrame:
+        """The DataFrame itself"""
+        return self.df
+
+    def pull(self, positions: Sequence[int]) -> None:
+        """Nothing to copy, the DataFrame is the storage"""
+
+
+class TableRows:
+    """
+    Rows of a small file, the labels are stored in a list (None if a row has no
+    label). The DataFrame of the file is only parsed if it is needed.
+    """
+
+    def __init__(
+        self, table: SmallTable, labels: List[Optional[str]], label_column: str
+    ) -> None:
+        self.table = table
+        self.label_column = label_column
+        self._labels = labels
+        self._df: Optional[pd.DataFrame] = None
+
+    def __len__(self) -> int:
+        return len(self._labels)
+
+    @property
+    def columns(self) -> Tuple[str, ...]:
+        """Names of the columns"""
+        return tuple(self.table.columns)
+
+    @property
+    def labels(self) -> List[Optional[str]]:
+        """Label per row, e.g. for the autosave"""
+        return self._labels
+
+    def get(self, position: int) -> Optional[str]:
+        """Label of the row at the position"""
+        return self._labels[position]
+
+    def set(self, position: int, label: str) -> None:
+        """Labels the row at the position"""
+        self._labels[position] = label
+
+    def key(self, position: int) -> int:
+        """Key of the row inside of the journal (the position itself)"""
+        return position
+
+    def column_values(self, plan: RenderPlan) -> List[List[Optional[str]]]:
+        """Relevant columns of the plan, see SmallTable.column_values"""
+        return self.table.column_values(plan.positions)
+
+    def labeled_positions(self) -> np.ndarray:
+        """Positions of all rows with a label"""
+        return np.flatnonzero([label is not None for label in self._labels])
+
+    def dataframe(self) -> pd.DataFrame:
+        """
+        Parses the file on first use, the label column is synced with the labels of
+        the store on every call.
+        """
+        if self._df is None:
+            self._df = self.table.to_dataframe()
+        self._df[self.label_column] = pd.Series(
+            self._labels, index=self._df.index, dtype=object
+        )
+        return self._df
+
+    def pull(self, positions: Sequence[int]) -> None:
+        """Copies the labels of the positions from the DataFrame into the store"""
+        if self._df is None or not len(positions):
+            return
+        labels = self._df[self.label_column].to_numpy()
+        for position in np.asarray(positions).tolist():
+            self._labels[position] = labels[position]
+
+
+RowStore = Union[DataFrameRows, TableRows]
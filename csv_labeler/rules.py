@@ -0,0 +1,168 @@
+# Copyright 2021 Robin Maasjosthusmann. All rights reserved.
+# Use of this source code is governed by a BSD-style
+# license that can be found in the LICENSE file.
+"""
+Rules
+
+Rule based pre-labeling. Every rule consists of a label and a query (see query.py).
+All rules are evaluated once for the whole DataFrame before the interactive labeling
+starts, only rows without a matching rule are left for the user.
+
+Rules are defined as sections of the config.ini (or of an additional rules file set
+with [rules] file):
+
+    [rule:netflix]
+    label = Freetime
+    query = payee~"Netflix"
+"""
+
+from __future__ import annotations
+
+import configparser
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, List, NamedTuple, Tuple
+
+from csv_labeler import query as rule_query
+from csv_labeler.lazy import lazy_import, logger
+
+if TYPE_CHECKING:
+    import numpy as np
+    import pandas as pd
+else:
+    np = lazy_import("numpy")
+    pd = lazy_import("pandas")
+
+SECTION_PREFIX = "rule:"
+
+
+class Rule(NamedTuple):
+    """
+    Parsed rule
+    """
+
+    name: str
+    label: str
+    query: str
+    conditions: Tuple[rule_query.Condition, ...]
+
+
+class RuleReport:
+    """
+    Hit counts and timings per rule, summed up over all evaluated DataFrames (chunks).
+    """
+
+    def __init__(self) -> None:
+        self.hits: Dict[str, int] = {}
+        self.seconds: Dict[str, float] = {}
+        self.candidates = 0
+
+    def add(self, rule: Rule, hits: int, seconds: float) -> None:
+        """Adds the result of one rule evaluation"""
+        self.hits[rule.name] = self.hits.get(rule.name, 0) + hits
+        self.seconds[rule.name] = self.seconds.get(rule.name, 0.0) + seconds
+
+    def log(self) -> None:
+        """Logs the hit count and time of every rule"""
+        if not self.hits:
+            return
+        total = sum(self.hits.values())
+        logger.info(f"Rules labeled {total} of {self.candidates} rows:")
+        for name, hits in sorted(self.hits.items(), key=lambda item: -item[1]):
+            logger.info(f"\t{name}: {hits} rows ({self.seconds[name] * 1000:.1f} ms)")
+
+
+def load_rules(config: configparser.ConfigParser) -> Tuple[Rule, ...]:
+    """
+    Reads all rules of the config and of the optional rules file.
+
+    Parameters
+    ----------
+    config : configparser.ConfigParser
+        ConfigParser with all information from the config.ini
+
+    Returns
+    -------
+    Tuple[Rule, ...]
+        Rules in the order of their definition
+
+    Raises
+    ------
+    ValueError
+        If a rule has no label or an invalid query
+    """
+    sections = [config]
+    rules_file = config.get("rules", "file", fallback="").strip()
+    if rules_file:
+        if not Path(rules_file).is_file():
+            raise ValueError(f"Rules file {rules_file} does not exist")
+        rules_config = configparser.ConfigParser()
+        rules_config.read(rules_file)
+        sections.append(rules_config)
+
+    rules = []
+    for parser in sections:
+        for section in parser.sections():
+            if not section.startswith(SECTION_PREFIX):
+                continue
+            name = section.split(":", 1)[1]
+            try:
+                label = parser[section]["label"]
+                query = parser[section]["query"]
+            except KeyError as error:
+                raise ValueError(f"Rule {name} needs a label and a query") from error
+            try:
+                conditions = rule_query.parse_query(query)
+            except rule_query.QueryError as error:
+                raise ValueError(f"Invalid query for rule {name}: {error}") from error
+            rules.append(Rule(name, label, query, tuple(conditions)))
+    return tuple(rules)
+
+
+def apply_rules(
+    df: pd.DataFrame,
+    rules: Tuple[Rule, ...],
+    label_column: str,
+    positions: np.ndarray,
+    report: RuleReport,
+) -> np.ndarray:
+    """
+    Labels the rows at the passed positions that match a rule, the first matching rule
+    wins. All rules are evaluated vectorized over the whole DataFrame.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        DataFrame (or chunk of the csv file) with the label column
+    rules : Tuple[Rule, ...]
+        Rules to apply
+    label_column : str
+        Name of the column which contains the labels
+    positions : np.ndarray
+        Positions of the rows that may be labeled (e.g. the work queue)
+    report : RuleReport
+        Collects hit counts and timings
+
+    Returns
+    -------
+    np.ndarray
+        Positions of all rows that were labeled by a rule
+    """
+    pending = np.zeros(len(df), dtype=bool)
+    pending[positions] = True
+    report.candidates += len(positions)
+    label_position = df.columns.get_loc(label_column)
+    labeled: List[np.ndarray] = []
+    for rule in rules:
+        if not pending.any():
+            break
+        start = time.perf_counter()
+        hits = np.flatnonzero(rule_query.evaluate(rule.conditions, df) & pending)
+        if len(hits):
+            df.iloc[hits, label_position] = rule.label
+            pending[hits] = False
+            labeled.append(hits)
+        report.add(rule, len(hits), time.perf_counter() - start)
+    if not labeled:
+        return np.empty(0, dtype=np.int64)
+    return np.concatenate(labeled)
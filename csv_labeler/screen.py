@@ -0,0 +1,110 @@
+# Copyright 2021 Robin Maasjosthusmann. All rights reserved.
+# Use of this source code is governed by a BSD-style
+# license that can be found in the LICENSE file.
+"""
+Screen
+
+Renders complete frames (row + category menu) with ANSI escape sequences instead of
+spawning a shell for clearing the console. Every frame is written with a single
+write/flush and, if the previous frame is still on the screen, only the changed lines
+are redrawn.
+"""
+
+import re
+import shutil
+import sys
+from typing import List, Optional, Sequence, TextIO
+
+CURSOR_HOME = "\x1b[H"
+CLEAR_SCREEN = "\x1b[2J\x1b[3J"
+CLEAR_LINE = "\x1b[K"
+CLEAR_BELOW = "\x1b[J"
+
+# Lines below the frame that are needed for prompts and messages
+PROMPT_LINES = 6
+
+_ESCAPE_SEQUENCE = re.compile(r"\x1b\[[0-9;]*[A-Za-z]")
+
+
+class Screen:
+    """
+    Writes frames to the terminal. If the output is not a terminal (pipe, file or
+    captured by tests) the frames are written as plain lines without any escape
+    sequences.
+    """
+
+    def __init__(self, stream: Optional[TextIO] = None) -> None:
+        self._stream = stream
+        self._previous: Optional[List[str]] = None
+
+    @property
+    def stream(self) -> TextIO:
+        """Output stream, defaults to the current sys.stdout"""
+        return self._stream if self._stream is not None else sys.stdout
+
+    def is_terminal(self) -> bool:
+        """True if the output stream is an interactive terminal"""
+        try:
+            return self.stream.isatty()
+        except (AttributeError, ValueError):
+            return False
+
+    def clear(self) -> None:
+        """
+        Clears the terminal and moves the cursor to the top left corner.
+        """
+        self._previous = None
+        if self.is_terminal():
+            self._write(CURSOR_HOME + CLEAR_SCREEN)
+
+    def invalidate(self) -> None:
+        """
+        Forces a complete redraw for the next frame, e.g. after something else was
+        written above the prompt area.
+        """
+        self._previous = None
+
+    def draw(self, lines: Sequence[str]) -> None:
+        """
+        Draws the frame. Lines that did not change since the last frame are skipped if
+        the previous frame is still on the screen, everything below the frame (old
+        prompts and messages) is cleared. Frames with more lines or wider lines than
+        the terminal are always drawn completely.
+
+        Parameters
+        ----------
+        lines : Sequence[str]
+            Lines of the frame
+        """
+        lines = list(lines)
+        if not self.is_terminal():
+            self._write("".join(line + "\n" for line in lines))
+            return
+
+        # Trailing padding is invisible, but would wrap on narrow terminals
+        lines = [line.rstrip() for line in lines]
+        previous = self._previous
+        size = shutil.get_terminal_size()
+        fits = len(lines) + PROMPT_LINES < size.lines and all(
+            len(_ESCAPE_SEQUENCE.sub("", line)) <= size.columns for line in lines
+        )
+        if previous is None or not fits:
+            buffer = CURSOR_HOME + CLEAR_SCREEN + "".join(line + "\n" for line in lines)
+        else:
+            parts = [
+                f"\x1b[{number};1H{line}{CLEAR_LINE}"
+                for number, line in enumerate(lines, start=1)
+                if number > len(previous) or previous[number - 1] != line
+            ]
+            parts.append(f"\x1b[{len(lines) + 1};1H{CLEAR_BELOW}")
+            buffer = "".join(parts)
+        # Positions are only valid if the frame did not scroll the terminal
+        self._previous = lines if fits else None
+        self._write(buffer)
+
+    def _write(self, buffer: str) -> None:
+        self.stream.write(buffer)
+        self.stream.flush()
+
+
+SCREEN = Screen()
@@ -0,0 +1,143 @@
+# Copyright 2021 Robin Maasjosthusmann. All rights reserved.
+# Use of this source code is governed by a BSD-style
+# license that can be found in the LICENSE file.
+"""
+Multi-file sessions
+
+Expands a directory or glob into the csv files of a session and parses the upcoming
+files in a process pool while the user labels the current one.
+"""
+
+from __future__ import annotations
+
+import glob
+from collections import deque
+from pathlib import Path
+from typing import TYPE_CHECKING, Deque, Iterator, List, Optional, Tuple, Union
+
+from csv_labeler import cache
+from csv_labeler.lazy import lazy_import
+
+if TYPE_CHECKING:
+    import multiprocessing
+    from concurrent import futures
+
+    import pandas as pd
+else:
+    futures = lazy_import("concurrent.futures")
+    multiprocessing = lazy_import("multiprocessing")
+    pd = lazy_import("pandas")
+
+
+def expand_paths(source: Union[str, Path]) -> List[Path]:
+    """
+    Returns the csv files of a file, directory (all *.csv files) or glob pattern.
+
+    Parameters
+    ----------
+    source : Union[str, Path]
+        Csv file, directory or glob pattern (e.g. exports/2021-*.csv)
+
+    Returns
+    -------
+    List[Path]
+        Sorted csv files, empty if nothing matches
+    """
+    path = Path(source).expanduser()
+    if path.is_file():
+        return [path]
+    if path.is_dir():
+        return sorted(x for x in path.glob("*.csv") if x.is_file())
+    return sorted(
+        Path(x) for x in glob.glob(str(path), recursive=True) if Path(x).is_file()
+    )
+
+
+def read_csv_file(csv_filepath: Path, sep: str, use_cache: bool = True) -> pd.DataFrame:
+    """
+    Parses a csv file or loads its sidecar (runs inside of the worker processes).
+
+    Parameters
+    ----------
+    csv_filepath : Path
+        Path to the csv file
+    sep : str
+        Separator used inside of the csv file
+    use_cache : bool
+        Use (and update) the sidecar cache of the file
+
+    Returns
+    -------
+    pd.DataFrame
+        Content of the csv file
+    """
+    return cache.read_csv_cached(csv_filepath, sep, use_cache)
+
+
+class FilePreloader:
+    """
+    Yields the files of a session in order, up to {preload} upcoming files are parsed
+    in the background. Without workers the files are parsed on demand.
+    """
+
+    def __init__(
+        self,
+        paths: List[Path],
+        sep: str,
+        workers: int = 2,
+        preload: int = 2,
+        use_cache: bool = True,
+    ) -> None:
+        self.paths = list(paths)
+        self.sep = sep
+        self.use_cache = use_cache
+        self.preload = max(preload, 1)
+        self._executor: Optional[futures.ProcessPoolExecutor] = None
+        if workers > 0 and len(self.paths) > 1:
+            # Spawned workers do not inherit the state of the prefetch thread
+            self._executor = futures.ProcessPoolExecutor(
+                max_workers=workers, mp_context=multiprocessing.get_context("spawn")
+            )
+        self._pending: Deque[Tuple[Path, futures.Future]] = deque()
+        self._next = 0
+
+    def __enter__(self) -> "FilePreloader":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def __iter__(self) -> Iterator[Tuple[Path, pd.DataFrame]]:
+        if self._executor is None:
+            for path in self.paths:
+                yield path, read_csv_file(path, self.sep, self.use_cache)
+            return
+        self._fill()
+        while self._pending:
+            path, future = self._pending.popleft()
+            self._fill()
+            yield path, future.result()
+
+    def close(self) -> None:
+        """
+        Cancels all preloads that did not start yet and stops the workers.
+        """
+        for _, future in self._pending:
+            future.cancel()
+        self._pending.clear()
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    def _fill(self) -> None:
+        while len(self._pending) < self.preload and self._next < len(self.paths):
+            path = self.paths[self._next]
+            self._next += 1
+            self._pending.append(
+                (
+                    path,
+                    self._executor.submit(
+                        read_csv_file, path, self.sep, self.use_cache
+                    ),
+                )
+            )
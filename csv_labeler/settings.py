@@ -0,0 +1,283 @@
+# Copyright 2021 Robin Maasjosthusmann. All rights reserved.
+# Use of this source code is governed by a BSD-style
+# license that can be found in the LICENSE file.
+"""
+Settings
+
+The config.ini is parsed and validated once at startup into an immutable Settings
+object, so no value has to be parsed again while labeling.
+"""
+
+import ast
+import configparser
+from pathlib import Path
+from typing import Any, FrozenSet, Tuple, Union
+
+from colorama import Back, Fore
+
+from csv_labeler.grouping import MODES
+from csv_labeler.highlighting import KeywordHighlighter
+from csv_labeler.rules import Rule, load_rules
+
+
+class Settings:
+    """
+    Immutable, pre-parsed content of the config.ini
+    """
+
+    __slots__ = (
+        "line_length",
+        "name_value_seperator_width",
+        "prefetch_depth",
+        "progress_window",
+        "sep",
+        "relevant_columns",
+        "relevant_columns_casefold",
+        "label_column",
+        "chunksize",
+        "prune_columns",
+        "small_file_bytes",
+        "keywords",
+        "labels",
+        "highlight_foreground",
+        "highlight_background",
+        "highlighter",
+        "journal_enabled",
+        "journal_fsync_every",
+        "autocomplete_max_cost",
+        "autocomplete_size",
+        "suggestions_enabled",
+        "grouping_mode",
+        "grouping_threshold",
+        "cache_enabled",
+        "session_workers",
+        "session_preload",
+        "autosave_enabled",
+        "autosave_interval",
+        "autosave_rows",
+        "shared_lease_seconds",
+        "shared_batch_size",
+        "profiling_enabled",
+        "profile_file",
+        "testmode",
+        "csv_file",
+        "skip_labels",
+        "rules",
+    )
+
+    line_length: int
+    name_value_seperator_width: int
+    prefetch_depth: int
+    progress_window: int
+    sep: str
+    relevant_columns: Tuple[str, ...]
+    relevant_columns_casefold: FrozenSet[str]
+    label_column: str
+    chunksize: int
+    prune_columns: bool
+    small_file_bytes: int
+    keywords: Tuple[str, ...]
+    labels: Tuple[str, ...]
+    highlight_foreground: str
+    highlight_background: str
+    highlighter: KeywordHighlighter
+    journal_enabled: bool
+    journal_fsync_every: int
+    autocomplete_max_cost: int
+    autocomplete_size: int
+    suggestions_enabled: bool
+    grouping_mode: str
+    grouping_threshold: float
+    cache_enabled: bool
+    session_workers: int
+    session_preload: int
+    autosave_enabled: bool
+    autosave_interval: float
+    autosave_rows: int
+    shared_lease_seconds: float
+    shared_batch_size: int
+    profiling_enabled: bool
+    profile_file: str
+    testmode: bool
+    csv_file: str
+    skip_labels: bool
+    rules: Tuple[Rule, ...]
+
+    def __init__(self, **values: Any) -> None:
+        missing = set(self.__slots__) - set(values)
+        if missing:
+            raise TypeError(f"Missing settings: {', '.join(sorted(missing))}")
+        for name, value in values.items():
+            object.__setattr__(self, name, value)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        raise AttributeError("Settings are immutable")
+
+    def __delattr__(self, name: str) -> None:
+        raise AttributeError("Settings are immutable")
+
+    def __repr__(self) -> str:
+        values = ", ".join(
+            f"{name}={getattr(self, name)!r}"
+            for name in self.__slots__
+            if name != "highlighter"
+        )
+        return f"Settings({values})"
+
+    @classmethod
+    def from_config(cls, config: configparser.ConfigParser) -> "Settings":
+        """
+        Parses and validates the config.
+
+        Parameters
+        ----------
+        config : configparser.ConfigParser
+            ConfigParser with all information from the config.ini
+
+        Returns
+        -------
+        Settings
+            Parsed settings
+
+        Raises
+        ------
+        ValueError
+            If a value is missing or invalid
+        """
+        try:
+            relevant_columns = _parse_list(config, "csv", "relevant_columns")
+            keywords = _parse_list(config, "classification", "keywords")
+            labels = _parse_list(config, "classification", "labels")
+            foreground = config["highlighting"]["foreground"].upper()
+            background = config["highlighting"]["background"].upper()
+            values = dict(
+                line_length=_parse_positive_int(config, "general", "line_length"),
+                name_value_seperator_width=config.getint(
+                    "general", "name_value_seperator_width"
+                ),
+                prefetch_depth=config.getint("general", "prefetch_depth", fallback=3),
+                progress_window=config.getint(
+                    "general", "progress_window", fallback=20
+                ),
+                sep=config["csv"]["sep"],
+                relevant_columns=relevant_columns,
+                relevant_columns_casefold=frozenset(
+                    x.casefold() for x in relevant_columns
+                ),
+                label_column=config["csv"]["label_column"],
+                chunksize=config.getint("csv", "chunksize", fallback=0),
+                prune_columns=config.getboolean(
+                    "csv", "prune_columns", fallback=False
+                ),
+                small_file_bytes=config.getint("csv", "small_file_bytes", fallback=0),
+                keywords=keywords,
+                labels=labels,
+                highlight_foreground=getattr(Fore, foreground),
+                highlight_background=getattr(Back, background),
+                highlighter=KeywordHighlighter(keywords, foreground, background),
+                journal_enabled=config.getboolean("journal", "enabled", fallback=True),
+                journal_fsync_every=config.getint(
+                    "journal", "fsync_every", fallback=10
+                ),
+                autocomplete_max_cost=config.getint(
+                    "fast_autocomplete", "max_cost", fallback=3
+                ),
+                autocomplete_size=config.getint(
+                    "fast_autocomplete", "size", fallback=10
+                ),
+                suggestions_enabled=config.getboolean(
+                    "suggestions", "enabled", fallback=True
+                ),
+                grouping_mode=config.get("grouping", "mode", fallback="off").lower(),
+                grouping_threshold=config.getfloat(
+                    "grouping", "threshold", fallback=0.8
+                ),
+                cache_enabled=config.getboolean("cache", "enabled", fallback=True),
+                session_workers=config.getint("session", "workers", fallback=2),
+                session_preload=config.getint("session", "preload", fallback=2),
+                autosave_enabled=config.getboolean(
+                    "autosave", "enabled", fallback=True
+                ),
+                autosave_interval=config.getfloat(
+                    "autosave", "interval", fallback=60.0
+                ),
+                autosave_rows=config.getint("autosave", "rows", fallback=500),
+                shared_lease_seconds=config.getfloat(
+                    "shared", "lease_seconds", fallback=300.0
+                ),
+                shared_batch_size=config.getint("shared", "batch_size", fallback=20),
+                profiling_enabled=config.getboolean(
+                    "profiling", "enabled", fallback=False
+                ),
+                profile_file=config.get("profiling", "profile_file", fallback=""),
+                testmode=config.getboolean("development", "testmode", fallback=False),
+                csv_file=config.get("development", "csv_file", fallback=""),
+                skip_labels=config.getboolean(
+                    "development", "skip_labels", fallback=True
+                ),
+                rules=load_rules(config),
+            )
+        except (KeyError, configparser.Error) as error:
+            raise ValueError(f"Missing value in config.ini: {error}") from error
+        except AttributeError as error:
+            raise ValueError(
+                f"Invalid highlighting color in config.ini: {error}"
+            ) from error
+        if values["grouping_mode"] not in MODES:
+            raise ValueError(
+                f"Invalid grouping mode in config.ini: {values['grouping_mode']}"
+            )
+        if not labels:
+            raise ValueError("At least one label must be defined in config.ini")
+        return cls(**values)
+
+
+def load_settings(path: Union[str, Path] = "config.ini") -> Settings:
+    """
+    Reads the config.ini and returns the parsed settings.
+
+    Parameters
+    ----------
+    path : Union[str, Path]
+        Path to the config.ini
+
+    Returns
+    -------
+    Settings
+        Parsed settings
+    """
+    config = configparser.ConfigParser()
+    config.read(path)
+    return Settings.from_config(config)
+
+
+def _parse_list(
+    config: configparser.ConfigParser, section: str, option: str
+) -> Tuple[str, ...]:
+    """
+    Parses a list of strings like ["a", "b"] from the config.
+    """
+    raw_value = config[section][option]
+    try:
+        value = ast.literal_eval(raw_value)
+    except (ValueError, SyntaxError) as error:
+        raise ValueError(
+            f"Invalid list for {option} in config.ini: {raw_value}"
+        ) from error
+    if not isinstance(value, (list, tuple)) or not all(
+        isinstance(x, str) for x in value
+    ):
+        raise ValueError(f"{option} in config.ini must be a list of strings")
+    return tuple(value)
+
+
+def _parse_positive_int(
+    config: configparser.ConfigParser, section: str, option: str
+) -> int:
+    """
+    Parses an integer that must be greater than zero.
+    """
+    value = config.getint(section, option)
+    if value <= 0:
+        raise ValueError(f"{option} in config.ini must be greater than 0")
+    return value
@@ -0,0 +1,299 @@
+# Copyright 2021 Robin Maasjosthusmann. All rights reserved.
+# Use of this source code is governed by a BSD-style
+# license that can be found in the LICENSE file.
+"""
+Shared sessions
+
+Several labelers work on the same csv file at once. The rows that have to be labeled
+and their labels are stored in a SQLite database (WAL mode, so readers never block the
+writer). Every labeler leases a small batch of unlabeled rows, a lease expires if the
+labeler disappears and is renewed with every committed label. Every label is
+committed in its own short transaction, the first label of a row wins. The export
+merges the labels back into the csv file (see pruned.write_labels).
+"""
+
+from __future__ import annotations
+
+import contextlib
+import getpass
+import os
+import socket
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, Iterable, Iterator, List, Tuple, Union
+
+from csv_labeler import pruned
+from csv_labeler.lazy import lazy_import
+
+if TYPE_CHECKING:
+    import sqlite3
+
+    import numpy as np
+    import pandas as pd
+else:
+    sqlite3 = lazy_import("sqlite3")
+    np = lazy_import("numpy")
+    pd = lazy_import("pandas")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS rows (
+    position INTEGER PRIMARY KEY,
+    label TEXT,
+    labeled_by TEXT,
+    worker TEXT,
+    lease_until REAL
+);
+CREATE INDEX IF NOT EXISTS open_rows ON rows (position) WHERE label IS NULL;
+CREATE INDEX IF NOT EXISTS leased_rows ON rows (worker) WHERE label IS NULL;
+"""
+
+
+def default_worker() -> str:
+    """
+    Returns the id of this labeler (user, host and process).
+
+    Returns
+    -------
+    str
+        Worker id
+    """
+    return f"{getpass.getuser()}@{socket.gethostname()}:{os.getpid()}"
+
+
+class SharedQueue:
+    """
+    Work queue and labels of a shared session, stored in a SQLite database.
+    """
+
+    def __init__(
+        self,
+        db_path: Union[str, Path],
+        worker: str = "",
+        lease_seconds: float = 300.0,
+        batch_size: int = 20,
+    ) -> None:
+        self.db_path = Path(db_path)
+        self.worker = worker or default_worker()
+        self.lease_seconds = lease_seconds
+        self.batch_size = max(batch_size, 1)
+        # Transactions are started explicitly, see _transaction
+        self.connection = sqlite3.connect(
+            str(self.db_path), timeout=30, isolation_level=None
+        )
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.executescript(SCHEMA)
+
+    def __enter__(self) -> "SharedQueue":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    @contextlib.contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        # IMMEDIATE takes the write lock at the start, concurrent leases can not
+        # hand out the same rows
+        self.connection.execute("BEGIN IMMEDIATE")
+        try:
+            yield self.connection
+        except BaseException:
+            self.connection.execute("ROLLBACK")
+            raise
+        self.connection.execute("COMMIT")
+
+    @property
+    def row_count(self) -> int:
+        """Number of rows of the csv file, 0 if the session is not initialized"""
+        row = self.connection.execute(
+            "SELECT value FROM meta WHERE key = 'row_count'"
+        ).fetchone()
+        return int(row[0]) if row else 0
+
+    def initialize(
+        self,
+        csv_name: str,
+        row_count: int,
+        positions: Iterable[int],
+        labels: Dict[int, str],
+    ) -> bool:
+        """
+        Stores the rows that have to be labeled, only the first labeler of the session
+        does this.
+
+        Parameters
+        ----------
+        csv_name : str
+            Name of the csv file
+        row_count : int
+            Number of rows of the csv file
+        positions : Iterable[int]
+            Positions of the rows that have to be labeled
+        labels : Dict[int, str]
+            Rows that are already labeled (e.g. by rules), position -> label
+
+        Returns
+        -------
+        bool
+            True if the session was created, False if it already existed
+
+        Raises
+        ------
+        ValueError
+            If the existing session belongs to another csv file
+        """
+        with self._transaction() as connection:
+            meta = dict(connection.execute("SELECT key, value FROM meta").fetchall())
+            if meta:
+                if meta["csv_name"] != csv_name or int(meta["row_count"]) != row_count:
+                    raise ValueError(
+                        f"{self.db_path} belongs to {meta['csv_name']}"
+                        f" ({meta['row_count']} rows)"
+                    )
+                return False
+            connection.executemany(
+                "INSERT INTO meta (key, value) VALUES (?, ?)",
+                [("csv_name", csv_name), ("row_count", str(row_count))],
+            )
+            connection.executemany(
+                "INSERT INTO rows (position) VALUES (?)",
+                ((int(x),) for x in positions if int(x) not in labels),
+            )
+            connection.executemany(
+                "INSERT INTO rows (position, label, labeled_by) VALUES (?, ?, 'rules')",
+                ((int(position), label) for position, label in labels.items()),
+            )
+        return True
+
+    def lease(self) -> List[int]:
+        """
+        Leases the next batch of rows that are neither labeled nor leased (or whose
+        lease expired).
+
+        Returns
+        -------
+        List[int]
+            Positions of the leased rows, empty if there is nothing left
+        """
+        now = time.time()
+        with self._transaction() as connection:
+            positions = [
+                row[0]
+                for row in connection.execute(
+                    "SELECT position FROM rows WHERE label IS NULL"
+                    " AND (lease_until IS NULL OR lease_until < ?)"
+                    " ORDER BY position LIMIT ?",
+                    (now, self.batch_size),
+                )
+            ]
+            connection.executemany(
+                "UPDATE rows SET worker = ?, lease_until = ? WHERE position = ?",
+                ((self.worker, now + self.lease_seconds, x) for x in positions),
+            )
+        return positions
+
+    def commit(self, position: int, label: str) -> bool:
+        """
+        Stores the label of the row and renews the leases of this labeler.
+
+        Parameters
+        ----------
+        position : int
+            Position of the row
+        label : str
+            Selected label
+
+        Returns
+        -------
+        bool
+            False if the row was already labeled by someone else (expired lease)
+        """
+        with self._transaction() as connection:
+            stored = connection.execute(
+                "UPDATE rows SET label = ?, labeled_by = ?, worker = NULL,"
+                " lease_until = NULL WHERE position = ? AND label IS NULL",
+                (label, self.worker, int(position)),
+            ).rowcount
+            connection.execute(
+                "UPDATE rows SET lease_until = ? WHERE worker = ? AND label IS NULL",
+                (time.time() + self.lease_seconds, self.worker),
+            )
+        return bool(stored)
+
+    def release(self) -> None:
+        """
+        Returns the leased rows of this labeler to the queue.
+        """
+        with self._transaction() as connection:
+            connection.execute(
+                "UPDATE rows SET worker = NULL, lease_until = NULL"
+                " WHERE worker = ? AND label IS NULL",
+                (self.worker,),
+            )
+
+    def progress(self) -> Tuple[int, int]:
+        """
+        Returns the number of labeled rows and of all rows of the session.
+
+        Returns
+        -------
+        Tuple[int, int]
+            Labeled rows, rows of the session
+        """
+        return self.connection.execute(
+            "SELECT COUNT(label), COUNT(*) FROM rows"
+        ).fetchone()
+
+    def labels(self) -> np.ndarray:
+        """
+        Returns the label of every row of the csv file.
+
+        Returns
+        -------
+        np.ndarray
+            Labels by position, NaN for rows without a label of the session
+        """
+        labels = np.full(self.row_count, np.nan, dtype=object)
+        for position, label in self.connection.execute(
+            "SELECT position, label FROM rows WHERE label IS NOT NULL"
+        ):
+            labels[position] = label
+        return labels
+
+    def close(self) -> None:
+        """
+        Releases the leases and closes the database.
+        """
+        try:
+            self.release()
+        finally:
+            self.connection.close()
+
+
+def export_labels(
+    queue: SharedQueue, csv_filepath: Union[str, Path], sep: str, label_column: str
+) -> int:
+    """
+    Merges the labels of the shared session into the csv file. Rows without a label
+    of the session keep their field, all other bytes of the file stay unchanged.
+
+    Parameters
+    ----------
+    queue : SharedQueue
+        Shared session
+    csv_filepath : Union[str, Path]
+        Path to the csv file
+    sep : str
+        Separator used inside of the csv file
+    label_column : str
+        Name of the column which contains the labels
+
+    Returns
+    -------
+    int
+        Number of exported labels
+    """
+    labels = queue.labels()
+    pruned.write_labels(csv_filepath, sep, label_column, labels)
+    return int(pd.notna(labels).sum())
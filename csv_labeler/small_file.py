@@ -0,0 +1,180 @@
+# Copyright 2021 Robin Maasjosthusmann. All rights reserved.
+# Use of this source code is governed by a BSD-style
+# license that can be found in the LICENSE file.
+"""
+Small files
+
+Small csv files are parsed with the csv module of the standard library instead of
+pandas, importing pandas takes longer than parsing such a file. Values are kept as
+strings, missing values (same markers as pd.read_csv) are None. The labels are written
+back with pruned.write_labels, so pandas is only imported for features that need the
+typed DataFrame of the file (rules, grouping and queries).
+"""
+
+from __future__ import annotations
+
+import csv
+import os
+from pathlib import Path
+from typing import TYPE_CHECKING, List, Optional, Sequence, Union
+
+from csv_labeler.lazy import lazy_import
+
+if TYPE_CHECKING:
+    import pandas as pd
+else:
+    pd = lazy_import("pandas")
+
+# Default missing value markers of pd.read_csv
+NA_VALUES = frozenset(
+    (
+        "",
+        "#N/A",
+        "#N/A N/A",
+        "#NA",
+        "-1.#IND",
+        "-1.#QNAN",
+        "-NaN",
+        "-nan",
+        "1.#IND",
+        "1.#QNAN",
+        "<NA>",
+        "N/A",
+        "NA",
+        "NULL",
+        "NaN",
+        "None",
+        "n/a",
+        "nan",
+        "null",
+    )
+)
+
+
+def is_small_file(csv_filepath: Union[str, Path], limit: int) -> bool:
+    """
+    Checks if the csv file is small enough for the csv module backend.
+
+    Parameters
+    ----------
+    csv_filepath : Union[str, Path]
+        Path to the csv file
+    limit : int
+        Maximal size in bytes, 0 disables the backend
+
+    Returns
+    -------
+    bool
+        True if the file is not larger than {limit}
+    """
+    return limit > 0 and os.path.getsize(csv_filepath) <= limit
+
+
+class SmallTable:
+    """
+    Rows of a small csv file, one list of values per row.
+    """
+
+    def __init__(
+        self,
+        csv_filepath: Union[str, Path],
+        sep: str,
+        columns: Sequence[str],
+        rows: List[List[Optional[str]]],
+    ) -> None:
+        self.csv_filepath = Path(csv_filepath)
+        self.sep = sep
+        self.columns = list(columns)
+        self.rows = rows
+
+    @classmethod
+    def read(cls, csv_filepath: Union[str, Path], sep: str) -> "SmallTable":
+        """
+        Parses the csv file. Blank lines are skipped (like pd.read_csv), so the
+        position of a row is the same as in the DataFrame of the file.
+
+        Parameters
+        ----------
+        csv_filepath : Union[str, Path]
+            Path to the csv file
+        sep : str
+            Separator used inside of the csv file
+
+        Returns
+        -------
+        SmallTable
+            Parsed rows
+
+        Raises
+        ------
+        ValueError
+            If the csv file is empty
+        """
+        with open(csv_filepath, encoding="utf-8-sig", newline="") as file:
+            reader = csv.reader(file, delimiter=sep)
+            columns = next(reader, None)
+            if columns is None:
+                raise ValueError("The csv file is empty")
+            width = len(columns)
+            rows = []
+            for record in reader:
+                if not record:
+                    continue
+                record.extend([""] * (width - len(record)))
+                rows.append([None if x in NA_VALUES else x for x in record])
+        return cls(csv_filepath, sep, columns, rows)
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def column(self, name: str) -> List[Optional[str]]:
+        """
+        Returns the values of the column.
+
+        Parameters
+        ----------
+        name : str
+            Name of the column
+
+        Returns
+        -------
+        List[Optional[str]]
+            Value per row
+
+        Raises
+        ------
+        ValueError
+            If the column does not exist
+        """
+        if name not in self.columns:
+            raise ValueError(f"Column {name} does not exist")
+        index = self.columns.index(name)
+        return [row[index] for row in self.rows]
+
+    def column_values(self, positions: Sequence[int]) -> List[List[Optional[str]]]:
+        """
+        Returns the columns at the positions, same as RenderPlan.column_values for a
+        DataFrame.
+
+        Parameters
+        ----------
+        positions : Sequence[int]
+            Positions of the columns
+
+        Returns
+        -------
+        List[List[Optional[str]]]
+            One list of values per column
+        """
+        return [[row[position] for row in self.rows] for position in positions]
+
+    def to_dataframe(self) -> pd.DataFrame:
+        """
+        Parses the file with pandas (typed columns), e.g. for rules or a query.
+
+        Returns
+        -------
+        pd.DataFrame
+            Content of the csv file
+        """
+        return pd.read_csv(self.csv_filepath, sep=self.sep)
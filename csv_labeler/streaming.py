@@ -0,0 +1,234 @@
+# Copyright 2021 Robin Maasjosthusmann. All rights reserved.
+# Use of this source code is governed by a BSD-style
+# license that can be found in the LICENSE file.
+"""
+Streaming helpers
+
+Reads a csv file in chunks and writes the labeled chunks to a temporary file next to
+the source, so that only the current window of rows has to be kept in memory. Files
+are never overwritten in place: the temporary file is fsynced and atomically renamed,
+an interrupted save leaves the previous version intact.
+"""
+
+from __future__ import annotations
+
+import os
+import shutil
+import tempfile
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, Iterator, Tuple, Union
+
+from csv_labeler.lazy import lazy_import
+from csv_labeler.profiling import TIMER
+
+if TYPE_CHECKING:
+    import pandas as pd
+else:
+    pd = lazy_import("pandas")
+
+
+def iter_chunks(
+    csv_filepath: Union[str, Path], sep: str, chunksize: int
+) -> Iterator[pd.DataFrame]:
+    """
+    Yields the csv file as consecutive DataFrames with at most {chunksize} rows.
+
+    Parameters
+    ----------
+    csv_filepath : Union[str, Path]
+        Path to the csv file
+    sep : str
+        Separator used inside of the csv file
+    chunksize : int
+        Maximum number of rows per chunk
+
+    Yields
+    ------
+    pd.DataFrame
+        Next chunk of the csv file
+    """
+    with pd.read_csv(csv_filepath, sep=sep, chunksize=chunksize) as reader:
+        while True:
+            with TIMER.stage("read_csv"):
+                chunk = next(reader, None)
+            if chunk is None:
+                return
+            yield chunk
+
+
+def count_labels(
+    csv_filepath: Union[str, Path], sep: str, label_column: str, chunksize: int = 0
+) -> Tuple[int, Dict[Any, int]]:
+    """
+    Counts the rows of the csv file and the rows per label. Only the label column is
+    parsed, chunk by chunk if a chunksize is passed.
+
+    Parameters
+    ----------
+    csv_filepath : Union[str, Path]
+        Path to the csv file
+    sep : str
+        Separator used inside of the csv file
+    label_column : str
+        Column which contains the labels
+    chunksize : int
+        Number of rows parsed at once, 0 parses the column at once
+
+    Returns
+    -------
+    Tuple[int, Dict[Any, int]]
+        Number of rows and number of rows per label
+    """
+    if chunksize <= 0:
+        labels = pd.read_csv(csv_filepath, sep=sep, usecols=[label_column])
+        counts = labels[label_column].value_counts()
+        return len(labels), {label: int(count) for label, count in counts.items()}
+    total = 0
+    counts = pd.Series(dtype="int64")
+    with pd.read_csv(
+        csv_filepath, sep=sep, usecols=[label_column], chunksize=chunksize
+    ) as reader:
+        for chunk in reader:
+            total += len(chunk)
+            counts = counts.add(chunk[label_column].value_counts(), fill_value=0)
+    return total, {label: int(count) for label, count in counts.items()}
+
+
+def detect_labels_in_chunks(
+    csv_filepath: Union[str, Path], sep: str, label_column: str, chunksize: int
+) -> bool:
+    """
+    Streaming version of detect_labels. Only the label column is parsed and the
+    scan stops at the first chunk that contains a label.
+
+    Parameters
+    ----------
+    csv_filepath : Union[str, Path]
+        Path to the csv file
+    sep : str
+        Separator used inside of the csv file
+    label_column : str
+        Column to check for labels
+    chunksize : int
+        Number of rows parsed at once
+
+    Returns
+    -------
+    bool
+        True if any row contains a label, False if not
+    """
+    with pd.read_csv(
+        csv_filepath, sep=sep, usecols=[label_column], chunksize=chunksize
+    ) as reader:
+        for chunk in reader:
+            if not chunk[label_column].isnull().all():
+                return True
+    return False
+
+
+class ChunkWriter:
+    """
+    Writes DataFrame chunks to a temporary file in the directory of the target file.
+    The target is only replaced once all chunks are written and commit is called.
+    """
+
+    def __init__(self, target: Union[str, Path], sep: str) -> None:
+        self.target = Path(target)
+        self.sep = sep
+        self.temp_path = make_temp_file(self.target)
+        self._header_written = False
+
+    def write(self, chunk: pd.DataFrame) -> None:
+        """
+        Appends the chunk to the temporary file, the header is only written once.
+
+        Parameters
+        ----------
+        chunk : pd.DataFrame
+            Finished chunk
+        """
+        with TIMER.stage("save"):
+            chunk.to_csv(
+                self.temp_path,
+                sep=self.sep,
+                index=False,
+                mode="a" if self._header_written else "w",
+                header=not self._header_written,
+            )
+        self._header_written = True
+
+    def commit(self) -> None:
+        """
+        Replaces the target file with the written chunks.
+        """
+        replace_file(self.temp_path, self.target)
+
+    def discard(self) -> None:
+        """
+        Removes the temporary file and leaves the target untouched.
+        """
+        if self.temp_path.exists():
+            self.temp_path.unlink()
+
+
+def make_temp_file(target: Union[str, Path]) -> Path:
+    """
+    Creates an empty temporary file in the directory of the target, so it can be
+    renamed to the target atomically.
+
+    Parameters
+    ----------
+    target : Union[str, Path]
+        File that will be replaced
+
+    Returns
+    -------
+    Path
+        Path of the temporary file
+    """
+    target = Path(target)
+    file_descriptor, temp_name = tempfile.mkstemp(
+        prefix=f".{target.name}.", suffix=".tmp", dir=target.parent
+    )
+    os.close(file_descriptor)
+    return Path(temp_name)
+
+
+def replace_file(temp_path: Union[str, Path], target: Union[str, Path]) -> None:
+    """
+    Flushes the temporary file to disk and atomically renames it to the target. The
+    permissions of an existing target are kept.
+
+    Parameters
+    ----------
+    temp_path : Union[str, Path]
+        Completely written temporary file (see make_temp_file)
+    target : Union[str, Path]
+        File to replace
+    """
+    target = Path(target)
+    if target.exists():
+        shutil.copymode(target, temp_path)
+    else:
+        # New file, use the default permissions instead of the ones of mkstemp
+        umask = os.umask(0)
+        os.umask(umask)
+        os.chmod(temp_path, 0o666 & ~umask)
+    with open(temp_path, "rb+") as file:
+        os.fsync(file.fileno())
+    os.replace(temp_path, target)
+    _fsync_directory(target.parent)
+
+
+def _fsync_directory(directory: Path) -> None:
+    # Persists the rename, not supported on every platform (e.g. Windows)
+    try:
+        file_descriptor = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(file_descriptor)
+    except OSError:
+        pass
+    finally:
+        os.close(file_descriptor)
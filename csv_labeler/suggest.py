@@ -0,0 +1,169 @@
+# Copyright 2021 Robin Maasjosthusmann. All rights reserved.
+# Use of this source code is governed by a BSD-style
+# license that can be found in the LICENSE file.
+"""
+Suggestions
+
+Online multinomial naive Bayes classifier over hashed tokens of the relevant columns.
+It is seeded with the existing labels of the csv file and learns from every label the
+user selects, the best category is suggested in the category menu.
+"""
+
+from __future__ import annotations
+
+import re
+import zlib
+from typing import TYPE_CHECKING, Iterable, List, Optional, Sequence
+
+from csv_labeler.lazy import is_missing, lazy_import
+
+if TYPE_CHECKING:
+    import numpy as np
+else:
+    np = lazy_import("numpy")
+
+
+_TOKEN = re.compile(r"\w+")
+
+
+class LabelSuggester:
+    """
+    Ranks the labels for a row. Learning a row costs O(tokens), scoring a row gathers
+    the count rows of its tokens and sums them with numpy. Only tokens that were
+    learned get a row of counts (one int32 per label), so the model grows with the
+    learned vocabulary, not with the number of labels times the hash space.
+    """
+
+    def __init__(
+        self, labels: Sequence[str], n_features: int = 2 ** 16, alpha: float = 1.0
+    ) -> None:
+        self.labels = tuple(labels)
+        self.n_features = n_features
+        self.alpha = alpha
+        self._label_index = {label: i for i, label in enumerate(self.labels)}
+        # Row of every hashed token inside of _counts, -1 if it was never learned
+        self._token_rows = np.full(n_features, -1, dtype=np.int64)
+        self._counts = np.zeros((0, len(self.labels)), dtype=np.int32)
+        self._learned = 0
+        self.token_totals = np.zeros(len(self.labels), dtype=np.int64)
+        self.row_counts = np.zeros(len(self.labels), dtype=np.int64)
+
+    @property
+    def token_counts(self) -> np.ndarray:
+        """Counts per label (columns) of every learned token (rows)"""
+        return self._counts[: self._learned]
+
+    def tokenize(self, values: Sequence) -> np.ndarray:
+        """
+        Hashes the words of the values (one value per relevant column). Words are
+        prefixed with the column position, so "Netflix" in the payee and in the memo
+        column are different features.
+
+        Parameters
+        ----------
+        values : Sequence
+            Values of the relevant columns of a row
+
+        Returns
+        -------
+        np.ndarray
+            Feature ids of the row
+        """
+        features: List[int] = []
+        for column, value in enumerate(values):
+            if is_missing(value):
+                continue
+            for word in _TOKEN.findall(str(value).casefold()):
+                features.append(zlib.crc32(f"{column}:{word}".encode()))
+        return np.asarray(features, dtype=np.int64) % self.n_features
+
+    def learn(self, tokens: np.ndarray, label: str) -> None:
+        """
+        Adds a labeled row to the model, labels that are not part of the model
+        (e.g. "Umbuchung") are ignored.
+
+        Parameters
+        ----------
+        tokens : np.ndarray
+            Feature ids of the row, see tokenize
+        label : str
+            Label of the row
+        """
+        index = self._label_index.get(label)
+        if index is None:
+            return
+        rows = self._token_rows[tokens]
+        new = np.unique(tokens[rows < 0])
+        if len(new):
+            self._token_rows[new] = np.arange(self._learned, self._learned + len(new))
+            self._learned += len(new)
+            if self._learned > len(self._counts):
+                # Grown by doubling, so learning stays amortized O(tokens)
+                grown = np.zeros(
+                    (max(self._learned, 2 * len(self._counts)), len(self.labels)),
+                    dtype=np.int32,
+                )
+                grown[: len(self._counts)] = self._counts
+                self._counts = grown
+            rows = self._token_rows[tokens]
+        np.add.at(self._counts, (rows, index), 1)
+        self.token_totals[index] += len(tokens)
+        self.row_counts[index] += 1
+
+    def learn_rows(self, rows: Iterable[Sequence], labels: Iterable[str]) -> None:
+        """
+        Adds multiple labeled rows, e.g. the existing labels of the csv file.
+
+        Parameters
+        ----------
+        rows : Iterable[Sequence]
+            Values of the relevant columns per row
+        labels : Iterable[str]
+            Label per row
+        """
+        for values, label in zip(rows, labels):
+            self.learn(self.tokenize(values), label)
+
+    def scores(self, tokens: np.ndarray) -> np.ndarray:
+        """
+        Log posterior (up to a constant) of every label.
+
+        Parameters
+        ----------
+        tokens : np.ndarray
+            Feature ids of the row, see tokenize
+
+        Returns
+        -------
+        np.ndarray
+            One score per label
+        """
+        log_prior = np.log(self.row_counts + 1) - np.log(
+            self.row_counts.sum() + len(self.labels)
+        )
+        rows = self._token_rows[tokens]
+        counts = np.zeros((len(tokens), len(self.labels)), dtype=np.int64)
+        known = rows >= 0
+        counts[known] = self._counts[rows[known]]
+        log_likelihood = np.log(counts + self.alpha).sum(axis=0) - len(tokens) * np.log(
+            self.token_totals + self.alpha * self.n_features
+        )
+        return log_prior + log_likelihood
+
+    def suggest(self, tokens: np.ndarray) -> Optional[str]:
+        """
+        Returns the most likely label of the row.
+
+        Parameters
+        ----------
+        tokens : np.ndarray
+            Feature ids of the row, see tokenize
+
+        Returns
+        -------
+        Optional[str]
+            Suggested label, None as long as no row was learned
+        """
+        if not self.row_counts.any():
+            return None
+        return self.labels[int(np.argmax(self.scores(tokens)))]
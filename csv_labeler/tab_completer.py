@@ -8,11 +8,75 @@ TODO: Add hint to readme to explain how to fine tune suggestions (max_cost,
 size should be longer than list of words)
 """
 
-import glob
+import functools
 import os
 import readline
-import configparser
-from fast_autocomplete import AutoComplete
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional, Tuple
+
+from csv_labeler.lazy import lazy_import
+from csv_labeler.profiling import TIMER
+
+if TYPE_CHECKING:
+    import fast_autocomplete
+
+    from csv_labeler.settings import Settings
+else:
+    # fast_autocomplete imports pkg_resources, which slows down the startup noticeably
+    fast_autocomplete = lazy_import("fast_autocomplete")
+
+
+# Directory -> (mtime of the directory, sorted entry names)
+_directory_cache: Dict[str, Tuple[int, Tuple[str, ...]]] = {}
+_DIRECTORY_CACHE_SIZE = 128
+
+
+def list_directory(directory: str) -> Tuple[str, ...]:
+    """
+    Returns the sorted entry names of the directory. The listing is cached and only
+    scanned again if the mtime of the directory changed (entry added, removed or renamed).
+    """
+    try:
+        mtime = os.stat(directory or ".").st_mtime_ns
+    except OSError:
+        return ()
+    cached = _directory_cache.get(directory)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+    try:
+        with os.scandir(directory or ".") as entries:
+            names = tuple(sorted(entry.name for entry in entries))
+    except OSError:
+        return ()
+    if len(_directory_cache) >= _DIRECTORY_CACHE_SIZE:
+        _directory_cache.clear()
+    _directory_cache[directory] = (mtime, names)
+    return names
+
+
+@functools.lru_cache(maxsize=16)
+def build_list_completer(
+    word_list: Tuple[str, ...], max_cost: int, size: int, cache_size: int = 256
+) -> Callable[[str, int], Optional[str]]:
+    """
+    Builds the AutoComplete index once per distinct word list. The search results
+    are memoized per prefix (LRU, {cache_size} entries), so all state calls of
+    readline for one tab press are served from the same list.
+    """
+    autocomplete = fast_autocomplete.AutoComplete(words={i: {} for i in word_list})
+    all_words = tuple(c + " " for c in word_list)
+
+    @functools.lru_cache(maxsize=cache_size)
+    def search(text: str) -> Tuple[str, ...]:
+        result = autocomplete.search(word=text, max_cost=max_cost, size=size)
+        return tuple(c[0] for c in result)
+
+    def list_completer(text: str, state: int) -> Optional[str]:
+        with TIMER.stage("completion"):
+            line = readline.get_line_buffer()
+            matches = search(text) if line else all_words
+            return matches[state] if state < len(matches) else None
+
+    return list_completer
 
 
 class TabCompleter:
@@ -24,25 +88,48 @@ class TabCompleter:
     http://stackoverflow.com/questions/5637124/tab-completion-in-pythons-raw-input
     """
 
-    def __init__(self) -> None:
+    def __init__(self, settings: Optional["Settings"] = None) -> None:
+        self.settings = settings
         self.list_completer = None
+        self._path_text: Optional[str] = None
+        self._path_matches: List[str] = []
 
-    @staticmethod
-    def path_completer(text, state):
-
+    def path_completer(self, text, state):
         """
         This is the tab completer for systems paths.
         Only tested on *nix systems
+
+        The matches are computed once per text (state 0), all further states are
+        served from the same list.
+        """
+        if state == 0 or text != self._path_text:
+            with TIMER.stage("completion"):
+                self._path_text = text
+                self._path_matches = self.complete_path(text)
+        if state < len(self._path_matches):
+            return self._path_matches[state]
+        return None
+
+    @staticmethod
+    def complete_path(text: str) -> List[str]:
+        """
+        Returns all paths that start with the text, like glob.glob(text + "*") (hidden
+        entries are only matched if the text starts with a dot).
         """
         # replace ~ with the user's home dir. See https://docs.python.org/2/library/os.path.html
-        if "~" in text:
-            text = os.path.expanduser("~")
+        path = os.path.expanduser(text)
 
         # autocomplete directories with having a trailing slash
-        if os.path.isdir(text):
-            text += "/"
+        if os.path.isdir(path) and not path.endswith(os.sep):
+            path += os.sep
 
-        return list(glob.glob(text + "*"))[state]
+        directory, prefix = os.path.split(path)
+        return [
+            os.path.join(directory, name)
+            for name in list_directory(directory)
+            if name.startswith(prefix)
+            and (prefix.startswith(".") or not name.startswith("."))
+        ]
 
     def create_list_completer(self, word_list):
         """
@@ -51,24 +138,12 @@ class TabCompleter:
 
         Since the autocomplete function can't be given a list to complete from
         a closure is used to create the listCompleter function with a list to complete
-        from.
+        from. The closure (and its index) is shared between all completers with the
+        same list.
         """
-        config = configparser.ConfigParser()
-        config.read("config.ini")
-
-        def list_completer(text, state):
-            line = readline.get_line_buffer()
-
-            if not line:
-                return [c + " " for c in word_list][state]
-
-            words = {i: {} for i in word_list}
-            autocomplete = AutoComplete(words=words)
-            result = autocomplete.search(
-                word=text,
-                max_cost=int(config["fast_autocomplete"]["max_cost"]),
-                size=int(config["fast_autocomplete"]["size"]),
-            )
-            return [c[0] for c in result][state]
-
-        self.list_completer = list_completer
+        if self.settings is None:
+            max_cost, size = 3, 10
+        else:
+            max_cost = self.settings.autocomplete_max_cost
+            size = self.settings.autocomplete_size
+        self.list_completer = build_list_completer(tuple(word_list), max_cost, size)
@@ -0,0 +1,165 @@
+# Copyright 2021 Robin Maasjosthusmann. All rights reserved.
+# Use of this source code is governed by a BSD-style
+# license that can be found in the LICENSE file.
+"""
+Background tasks
+
+An asyncio event loop runs in a background thread next to the input prompt, so jobs
+scheduled by the labeling loop (autosaves, prefetched frames, finished chunks of the
+streaming mode) keep running while the user decides. Every entry point owns one runner
+for the whole run.
+The prompt itself stays on the main thread: readline completion and Ctrl+C only work
+reliably there. Blocking jobs run one after another in a single worker thread, in the
+order they were scheduled.
+"""
+
+from __future__ import annotations
+
+import functools
+import threading
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, Optional, Type
+
+from csv_labeler.lazy import lazy_import
+
+if TYPE_CHECKING:
+    import asyncio
+    from concurrent import futures
+else:
+    asyncio = lazy_import("asyncio")
+    futures = lazy_import("concurrent.futures")
+
+
+class TaskRunner:
+    """
+    Event loop in a background thread. If the block of the context manager is left
+    with a KeyboardInterrupt, all pending tasks are canceled.
+    """
+
+    def __init__(self, name: str = "csv_labeler-tasks") -> None:
+        self.loop = asyncio.new_event_loop()
+        self._executor = futures.ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix=f"{name}-blocking"
+        )
+        self.loop.set_default_executor(self._executor)
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def __enter__(self) -> "TaskRunner":
+        return self
+
+    def __exit__(self, exc_type: Optional[Type[BaseException]], *args) -> None:
+        self.close(
+            cancel=exc_type is not None and issubclass(exc_type, KeyboardInterrupt)
+        )
+
+    def _run(self) -> None:
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    def submit(self, coroutine: Awaitable) -> futures.Future:
+        """
+        Schedules the coroutine as task of the event loop.
+
+        Parameters
+        ----------
+        coroutine : Awaitable
+            Job to run
+
+        Returns
+        -------
+        Future
+            Result of the job, canceling the future cancels the task
+        """
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop)
+
+    def run_blocking(self, function: Callable, *args: Any) -> futures.Future:
+        """
+        Schedules a blocking function (e.g. file IO), it runs in the worker thread once
+        all previously scheduled blocking jobs are done.
+
+        Parameters
+        ----------
+        function : Callable
+            Job to run
+        *args : Any
+            Arguments of the job
+
+        Returns
+        -------
+        Future
+            Result of the job, a job that did not start yet is skipped if the future
+            is canceled
+        """
+        job = _BlockingJob(functools.partial(function, *args))
+        job.future = self.submit(self._in_executor(job))
+        return job.future
+
+    def wait_blocking(self) -> None:
+        """
+        Waits until all blocking jobs scheduled so far are done (or skipped because
+        they were canceled).
+        """
+        if not self._closed:
+            self.run_blocking(_nothing).result()
+
+    async def _in_executor(self, function: Callable) -> Any:
+        return await self.loop.run_in_executor(None, function)
+
+    def cancel_all(self) -> None:
+        """
+        Cancels all pending tasks, blocking jobs that already started are finished.
+        """
+
+        def cancel() -> None:
+            for task in asyncio.all_tasks(self.loop):
+                task.cancel()
+
+        if not self._closed:
+            self.loop.call_soon_threadsafe(cancel)
+
+    def close(self, cancel: bool = False) -> None:
+        """
+        Waits for the pending tasks (or cancels them) and stops the event loop.
+
+        Parameters
+        ----------
+        cancel : bool
+            Cancel the pending tasks instead of waiting for them
+        """
+        if self._closed:
+            return
+        if cancel:
+            self.cancel_all()
+        self.submit(self._drain()).result()
+        self._closed = True
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join()
+        self._executor.shutdown(wait=True)
+        self.loop.close()
+
+    async def _drain(self) -> None:
+        current = asyncio.current_task()
+        tasks = [task for task in asyncio.all_tasks() if task is not current]
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+class _BlockingJob:
+    """
+    Blocking function that is skipped if its future was canceled before the worker
+    thread reached it. Canceling the future only reaches the task on the event loop
+    later, the job could already be waiting in the executor by then.
+    """
+
+    def __init__(self, function: Callable) -> None:
+        self.function = function
+        self.future: Optional[futures.Future] = None
+
+    def __call__(self) -> Any:
+        if self.future is not None and self.future.cancelled():
+            return None
+        return self.function()
+
+
+def _nothing() -> None:
+    pass
@@ -0,0 +1,134 @@
+# Copyright 2021 Robin Maasjosthusmann. All rights reserved.
+# Use of this source code is governed by a BSD-style
+# license that can be found in the LICENSE file.
+"""
+Work queue
+
+Positions of the rows that still have to be labeled. The queue is computed once with
+a vectorized mask over the label column, so already labeled rows are never visited.
+"""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Iterable, Iterator, List, Optional
+
+from csv_labeler.lazy import lazy_import
+
+if TYPE_CHECKING:
+    import numpy as np
+    import pandas as pd
+else:
+    np = lazy_import("numpy")
+    pd = lazy_import("pandas")
+
+
+class WorkQueue:
+    """
+    Ordered queue of row positions (not index labels) that have to be labeled.
+    Positions can be discarded while iterating, e.g. if they were labeled by another
+    mechanism than the interactive loop.
+    """
+
+    def __init__(self, positions: np.ndarray) -> None:
+        self.positions = np.asarray(positions, dtype=np.int64)
+        self._pending = np.ones(len(self.positions), dtype=bool)
+        self._remaining = len(self.positions)
+        self._cursor = 0
+
+    @classmethod
+    def from_dataframe(
+        cls,
+        df: pd.DataFrame,
+        label_column: str,
+        keep_label: bool,
+        exclude: Optional[Iterable] = None,
+    ) -> "WorkQueue":
+        """
+        Creates the queue for the DataFrame.
+
+        Parameters
+        ----------
+        df : pd.DataFrame
+            DataFrame (or chunk of the csv file) with the label column
+        label_column : str
+            Name of the column which contains the labels
+        keep_label : bool
+            Should existing labels be retained, if so only unlabeled rows are queued
+        exclude : Optional[Iterable]
+            Index labels of rows that must not be queued (e.g. rows from the journal)
+
+        Returns
+        -------
+        WorkQueue
+            Queue with the positions of all rows that have to be labeled
+        """
+        if keep_label:
+            mask = df[label_column].isnull().to_numpy()
+        else:
+            mask = np.ones(len(df), dtype=bool)
+        if exclude is not None:
+            mask = mask & ~df.index.isin(list(exclude))
+        return cls(np.flatnonzero(mask))
+
+    def __iter__(self) -> Iterator[int]:
+        while self._cursor < len(self.positions):
+            cursor = self._cursor
+            self._cursor += 1
+            if self._pending[cursor]:
+                self._pending[cursor] = False
+                self._remaining -= 1
+                yield int(self.positions[cursor])
+
+    def __len__(self) -> int:
+        return self._remaining
+
+    def discard(self, positions: Iterable[int]) -> None:
+        """
+        Removes the positions from the queue, unknown positions are ignored.
+
+        Parameters
+        ----------
+        positions : Iterable[int]
+            Row positions that no longer have to be labeled
+        """
+        targets = np.asarray(list(positions), dtype=np.int64)
+        slots = np.searchsorted(self.positions, targets)
+        known = slots < len(self.positions)
+        slots, targets = slots[known], targets[known]
+        slots = np.unique(slots[self.positions[slots] == targets])
+        self._remaining -= int(self._pending[slots].sum())
+        self._pending[slots] = False
+
+    def peek(self, count: int) -> List[int]:
+        """
+        Returns the next pending positions without removing them from the queue.
+
+        Parameters
+        ----------
+        count : int
+            Maximum number of positions
+
+        Returns
+        -------
+        List[int]
+            Next pending positions
+        """
+        upcoming: List[int] = []
+        cursor = self._cursor
+        while len(upcoming) < count and cursor < len(self.positions):
+            if self._pending[cursor]:
+                upcoming.append(int(self.positions[cursor]))
+            cursor += 1
+        return upcoming
+
+    def remaining(self) -> np.ndarray:
+        """
+        Returns all pending positions without removing them from the queue.
+
+        Returns
+        -------
+        np.ndarray
+            Pending positions in queue order
+        """
+        cursor = self._cursor
+        return self.positions[cursor:][self._pending[cursor:]]
@@ -117,6 +117,12 @@ def pytest_o(session):
     )
 
 
+@nox.session(python=False)
+def benchmark(session):
+    args = session.posargs or ["--output=benchmark-results.json"]
+    session.run("python", "-m", "benchmarks.suite", *args)
+
+
 @nox.session(python=False)
 def pytest_integration(session):
     session.run(
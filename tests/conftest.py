@@ -0,0 +1,39 @@
+"""
+ Copyright 2021 Robin Maasjosthusmann. All rights reserved.
+ Use of this source code is governed by a BSD-style
+ license that can be found in the LICENSE file.
+"""
+
+import configparser
+
+import pytest
+
+from csv_labeler.settings import Settings
+
+TEST_CONFIG = {
+    "general": {"line_length": "80", "name_value_seperator_width": "4"},
+    "csv": {
+        "sep": ";",
+        "relevant_columns": '["payee"]',
+        "label_column": "category",
+        "chunksize": "0",
+    },
+    "classification": {"keywords": '["Uber"]', "labels": '["Food", "Car"]'},
+    "highlighting": {"foreground": "BLACK", "background": "YELLOW"},
+}
+
+
+def make_settings(**sections: dict) -> Settings:
+    """
+    Creates settings from the test config, the passed sections are merged into it.
+    """
+    config = configparser.ConfigParser()
+    config.read_dict(TEST_CONFIG)
+    config.read_dict(sections)
+    return Settings.from_config(config)
+
+
+@pytest.fixture(name="settings")
+def fixture_settings() -> Settings:
+    """Settings for a csv file with the columns payee and category."""
+    return make_settings()
@@ -0,0 +1,137 @@
+"""
+ Copyright 2021 Robin Maasjosthusmann. All rights reserved.
+ Use of this source code is governed by a BSD-style
+ license that can be found in the LICENSE file.
+"""
+
+from pathlib import Path
+
+import pandas as pd
+import pytest
+from parametrization import Parametrization
+from pytest_mock import MockerFixture
+
+from csv_labeler import cache, main
+from csv_labeler.autosave import Autosaver
+
+from .conftest import make_settings
+
+SOURCE = "payee;memo;category\r\nUber;\"a; b\";\r\nRewe;x;Food\r\nShell;y;\r\n"
+
+
+@pytest.fixture(name="csv_file")
+def fixture_csv_file(tmp_path: Path) -> Path:
+    """Export with one existing label."""
+    csv_file = tmp_path / "export.csv"
+    csv_file.write_bytes(SOURCE.encode("utf-8"))
+    return csv_file
+
+
+def read_labels(csv_file: Path) -> list:
+    """Returns the label column of the csv file."""
+    return pd.read_csv(csv_file, sep=";")["category"].tolist()
+
+
+def test_row_interval(csv_file: Path):
+    """
+    Tests that the labels are saved every {rows} labeled rows and the pending snapshot
+    is written on close.
+    """
+    df = pd.read_csv(csv_file, sep=";")
+    df["category"] = df["category"].astype(object)
+    with Autosaver(csv_file, ";", "category", df["category"], 0, 2) as autosave:
+        df.iat[0, 2] = "Car"
+        autosave.row_labeled(df["category"])
+        autosave.close()
+        assert autosave.saves == 0
+    assert csv_file.read_bytes() == SOURCE.encode("utf-8")
+
+    with Autosaver(csv_file, ";", "category", df["category"], 0, 2) as autosave:
+        autosave.row_labeled(df["category"])
+        df.iat[2, 2] = "Car"
+        autosave.row_labeled(df["category"])
+        # Changes after the snapshot are not part of the save
+        df.iat[1, 2] = "Fun"
+    assert autosave.saves == 1
+    assert read_labels(csv_file) == ["Car", "Food", "Car"]
+
+
+def test_time_interval(mocker: MockerFixture, csv_file: Path):
+    """
+    Tests that labeled rows are saved once the interval passed.
+    """
+    monotonic = mocker.patch("csv_labeler.autosave.time.monotonic", return_value=0.0)
+    df = pd.read_csv(csv_file, sep=";")
+    df["category"] = df["category"].astype(object)
+    with Autosaver(csv_file, ";", "category", df["category"], 60, 0) as autosave:
+        df.iat[0, 2] = "Car"
+        autosave.row_labeled(df["category"])
+        monotonic.return_value = 61.0
+        autosave.row_labeled(df["category"], 0)
+    assert autosave.saves == 1
+    assert read_labels(csv_file)[:2] == ["Car", "Food"]
+
+
+def test_discard_restores_file(csv_file: Path):
+    """
+    Tests that discarding restores the csv file byte for byte.
+    """
+    df = pd.read_csv(csv_file, sep=";")
+    df["category"] = df["category"].astype(object)
+    autosave = Autosaver(csv_file, ";", "category", df["category"], 0, 1)
+    df.iat[0, 2] = "Car"
+    df.iat[1, 2] = "Fun"
+    autosave.row_labeled(df["category"])
+    autosave.close()
+    assert read_labels(csv_file)[:2] == ["Car", "Fun"]
+
+    autosave.discard()
+    assert csv_file.read_bytes() == SOURCE.encode("utf-8")
+
+
+def test_failed_autosave_is_logged(mocker: MockerFixture, csv_file: Path):
+    """
+    Tests that a failing autosave does not stop the session.
+    """
+    mocker.patch(
+        "csv_labeler.autosave.pruned.write_labels", side_effect=OSError("disk full")
+    )
+    warning = mocker.patch("csv_labeler.autosave.logger.warning")
+    df = pd.read_csv(csv_file, sep=";")
+    with Autosaver(csv_file, ";", "category", df["category"], 0, 1) as autosave:
+        autosave.row_labeled(df["category"])
+    assert autosave.saves == 0
+    warning.assert_called_once()
+
+
+@Parametrization.parameters("mode", "answers")
+@Parametrization.case("query", "off", ['/payee~"uber"', "car", "food"])
+@Parametrization.case("group", "exact", ["car", "y", "food"])
+def test_group_and_query_labels_are_counted(
+    mocker: MockerFixture, mode: str, answers: list
+):
+    """
+    Tests that rows labeled by a group or a query count towards the row interval.
+    """
+    settings = make_settings(grouping={"mode": mode}, suggestions={"enabled": "False"})
+    df = pd.DataFrame(
+        {"payee": ["Uber", "Uber", "Rewe", "Uber"], "category": [None] * 4}
+    )
+    autosave = mocker.Mock(spec=Autosaver)
+    mocker.patch("csv_labeler.main.clear_console")
+    mocker.patch("builtins.input", side_effect=answers)
+    main.label_dataframe(df, False, settings, autosave=autosave)
+    assert df["category"].tolist() == ["Car", "Car", "Food", "Car"]
+    assert [x.args[1] for x in autosave.row_labeled.call_args_list] == [3, 1]
+
+
+def test_interrupted_save_keeps_file(mocker: MockerFixture, csv_file: Path):
+    """
+    Tests that a save that fails while writing leaves the csv file untouched and
+    removes the temporary file.
+    """
+    mocker.patch.object(pd.DataFrame, "to_csv", side_effect=KeyboardInterrupt)
+    with pytest.raises(KeyboardInterrupt):
+        cache.write_csv(pd.DataFrame({"a": [1]}), csv_file, ";", enabled=False)
+    assert csv_file.read_bytes() == SOURCE.encode("utf-8")
+    assert list(csv_file.parent.iterdir()) == [csv_file]
@@ -0,0 +1,77 @@
+"""
+ Copyright 2021 Robin Maasjosthusmann. All rights reserved.
+ Use of this source code is governed by a BSD-style
+ license that can be found in the LICENSE file.
+"""
+
+from pathlib import Path
+
+import pandas as pd
+import pytest
+from parametrization import Parametrization
+
+from csv_labeler import batch_apply
+
+
+@pytest.fixture(name="mapping")
+def fixture_mapping(tmp_path: Path) -> pd.Series:
+    """Mapping with a duplicated key (the last label wins) and an empty label."""
+    mapping_file = tmp_path / "labels.csv"
+    mapping_file.write_text(
+        "key,label\n007,Car\n42,Food\n13,\n007,Freetime\n", encoding="utf-8"
+    )
+    return batch_apply.load_mapping(mapping_file)
+
+
+def test_load_mapping(mapping: pd.Series, tmp_path: Path):
+    """
+    Tests that csv and json mappings are read with string keys.
+    """
+    assert mapping.to_dict() == {"007": "Freetime", "42": "Food"}
+    json_file = tmp_path / "labels.json"
+    json_file.write_text('{"1": "Car"}', encoding="utf-8")
+    assert batch_apply.load_mapping(json_file).to_dict() == {"1": "Car"}
+
+
+@Parametrization.parameters("keep_label", "chunksize", "expected_result")
+@Parametrization.case("keep_labels", True, 0, ["Freetime", "Shopping", "Food", ""])
+@Parametrization.case("overwrite", False, 0, ["Freetime", "Food", "Food", ""])
+@Parametrization.case("chunks", True, 2, ["Freetime", "Shopping", "Food", ""])
+def test_apply_mapping_to_csv(
+    tmp_path: Path,
+    mapping: pd.Series,
+    keep_label: bool,
+    chunksize: int,
+    expected_result: list,
+):
+    """
+    Tests that the labels are joined on the key column and written once.
+    """
+    csv_file = tmp_path / "export.csv"
+    csv_file.write_text(
+        "key;payee;category\n007;Uber;\n42;Rewe;Shopping\n42;Rewe;\n99;Shell;\n",
+        encoding="utf-8",
+    )
+    output_file = tmp_path / "labeled.csv"
+    labeled = batch_apply.apply_mapping_to_csv(
+        csv_file, mapping, "key", "category", keep_label, ";", chunksize, output_file
+    )
+    result = pd.read_csv(output_file, sep=";", dtype=str, keep_default_na=False)
+    assert result["category"].tolist() == expected_result
+    assert result["key"].tolist() == ["007", "42", "42", "99"]
+    assert labeled == (2 if keep_label else 3)
+
+
+def test_cli_replaces_csv_file(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    """
+    Tests the command line entry point, the csv file is replaced by default.
+    """
+    monkeypatch.chdir(Path(__file__).parent.parent)
+    csv_file = tmp_path / "export.csv"
+    csv_file.write_text("iban;category\nDE1;\nDE2;\n", encoding="utf-8")
+    mapping_file = tmp_path / "labels.json"
+    mapping_file.write_text('{"DE2": "Car"}', encoding="utf-8")
+    batch_apply.main([str(csv_file), str(mapping_file), "--key-column", "iban"])
+    assert csv_file.read_text(encoding="utf-8") == "iban;category\nDE1;\nDE2;Car\n"
+    with pytest.raises(SystemExit):
+        batch_apply.main([str(csv_file), str(mapping_file), "--key-column", "iban2"])
@@ -0,0 +1,55 @@
+"""
+ Copyright 2021 Robin Maasjosthusmann. All rights reserved.
+ Use of this source code is governed by a BSD-style
+ license that can be found in the LICENSE file.
+"""
+
+from pathlib import Path
+
+import pandas as pd
+
+from benchmarks import suite
+from benchmarks.synthetic import generate_csv
+
+
+def test_generator_is_seeded(tmp_path: Path):
+    """
+    Tests that the same seed creates the same file.
+    """
+    first = generate_csv(tmp_path / "a.csv", rows=20, keyword_count=12, seed=7)
+    second = generate_csv(tmp_path / "b.csv", rows=20, keyword_count=12, seed=7)
+    assert first.path.read_text() == second.path.read_text()
+    assert len(first.keywords) == 12
+    df = pd.read_csv(first.path, sep=";")
+    assert list(df.columns) == first.columns
+    assert len(df) == 20
+
+
+def test_suite_writes_all_results():
+    """
+    Smoke test of the suite with a tiny file.
+    """
+    args = suite.parse_args(["--rows", "30", "--repeat", "1", "--sample", "5"])
+    results = suite.run_suite(args)
+    assert set(results["results"]) == {
+        "startup",
+        "csv_load",
+        "render",
+        "highlight_keywords",
+        "highlighter",
+        "tab_completion",
+        "suggest",
+        "label_assignment",
+        "save",
+    }
+    assert suite.compare(results, results)[1].endswith("1.00")
+
+
+def test_startup_does_not_import_heavy_dependencies():
+    """
+    Tests that nothing heavy is imported before the first prompt. The time budget is
+    generous (slow CI machines), the imported modules are the actual guard.
+    """
+    probe = suite.startup_probe()
+    assert probe["modules"] == []
+    assert probe["seconds"] < 1.0
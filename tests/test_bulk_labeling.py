@@ -0,0 +1,76 @@
+"""
+ Copyright 2021 Robin Maasjosthusmann. All rights reserved.
+ Use of this source code is governed by a BSD-style
+ license that can be found in the LICENSE file.
+"""
+
+import numpy as np
+import pandas as pd
+from pytest_mock import MockerFixture
+
+from csv_labeler import main
+from csv_labeler.settings import Settings
+
+from .conftest import make_settings
+
+
+def test_query_command_labels_matching_rows(mocker: MockerFixture):
+    """
+    Tests that the query command labels all matching unlabeled rows (including the
+    current one) and removes them from the work queue.
+    """
+    settings = make_settings(
+        csv={"relevant_columns": '["payee", "amount"]'},
+        grouping={"mode": "off"},
+        suggestions={"enabled": "False"},
+    )
+    df = pd.DataFrame(
+        data={
+            "payee": ["Uber BV", "Rewe", "UBER Eats", "Uber", "Shell"],
+            "amount": [-10, -20, -150, -5, -600],
+            "category": [None, None, None, "Food", None],
+        }
+    )
+    mocker.patch("csv_labeler.main.clear_console")
+    user_input = mocker.patch(
+        "builtins.input",
+        side_effect=['/payee~"uber" & amount>-200', "car", "food", "/amount<", "2"],
+    )
+    main.label_dataframe(df, True, settings)
+    assert df["category"].tolist() == ["Car", "Food", "Car", "Food", "Car"]
+    assert user_input.call_count == 5
+
+
+def test_bulk_label_abort(mocker: MockerFixture, settings: Settings, capsys):
+    """
+    Tests that nothing is labeled if no row matches or the user aborts.
+    """
+    df = pd.DataFrame(data={"payee": ["Uber", "Rewe"], "category": [None, None]})
+    candidates = np.array([0, 1])
+    mocker.patch("builtins.input", return_value="")
+    labeled, label = main.bulk_label(df, "payee~shell", candidates, 1, settings.labels)
+    assert capsys.readouterr().out == "No unlabeled rows match the query\n"
+    labeled, label = main.bulk_label(df, "payee~uber", candidates, 1, settings.labels)
+    assert (len(labeled), label) == (0, None)
+    assert df["category"].isna().all()
+
+
+def test_bulk_label_only_uses_the_query_columns(mocker: MockerFixture):
+    """
+    Tests that only the columns named by the query (and the candidate rows) are
+    evaluated, text of other columns never matches.
+    """
+    df = pd.DataFrame(
+        data={
+            "payee": ["Rewe", "Uber", "Shell", "Uber"],
+            "memo": ["uber voucher", "trip", "uber fuel", "trip"],
+            "category": [None, None, None, None],
+        }
+    )
+    evaluate = mocker.spy(main.label_query, "evaluate")
+    mocker.patch("builtins.input", return_value="car")
+    labeled, label = main.bulk_label(df, "PAYEE~uber", np.array([0, 1, 2]), 2, ["Car"])
+    assert (labeled.tolist(), label) == ([1], "Car")
+    assert evaluate.call_args.args[1].columns.tolist() == ["payee"]
+    assert len(evaluate.call_args.args[1]) == 3
+    assert df["category"].tolist() == [None, "Car", None, None]
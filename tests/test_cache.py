@@ -0,0 +1,107 @@
+"""
+ Copyright 2021 Robin Maasjosthusmann. All rights reserved.
+ Use of this source code is governed by a BSD-style
+ license that can be found in the LICENSE file.
+"""
+
+import os
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+from parametrization import Parametrization
+from pytest_mock import MockerFixture
+
+from csv_labeler import cache
+
+
+@pytest.fixture(name="csv_file")
+def fixture_csv_file(tmp_path: Path) -> Path:
+    """Small export without labels."""
+    csv_file = tmp_path / "export.csv"
+    csv_file.write_text("payee;amount;category\nUber;-1,5;\nRewe;-20;\n")
+    return csv_file
+
+
+def test_sidecar_is_used_for_unchanged_file(mocker: MockerFixture, csv_file: Path):
+    """
+    Tests that the second read is served from the sidecar, also if only the mtime
+    changed.
+    """
+    expected = cache.read_csv_cached(csv_file, ";")
+    assert all(path.exists() for path in cache.sidecar_paths(csv_file).values())
+
+    read_csv = mocker.spy(pd, "read_csv")
+    pd.testing.assert_frame_equal(cache.read_csv_cached(csv_file, ";"), expected)
+    stat = csv_file.stat()
+    os.utime(csv_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+    pd.testing.assert_frame_equal(cache.read_csv_cached(csv_file, ";"), expected)
+    assert read_csv.call_count == 0
+
+
+@Parametrization.parameters("sep")
+@Parametrization.case("changed_content", ";")
+@Parametrization.case("changed_separator", ",")
+def test_sidecar_is_invalidated(mocker: MockerFixture, csv_file: Path, sep: str):
+    """
+    Tests that the csv file is parsed again if its content (same size, new mtime) or
+    the separator changed.
+    """
+    cache.read_csv_cached(csv_file, ";")
+    if sep == ";":
+        csv_file.write_text(csv_file.read_text().replace("Uber", "Ubex"))
+        stat = csv_file.stat()
+        os.utime(csv_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+    read_csv = mocker.spy(pd, "read_csv")
+    df = cache.read_csv_cached(csv_file, sep)
+    assert read_csv.call_count == 1
+    if sep == ";":
+        assert df["payee"].tolist() == ["Ubex", "Rewe"]
+
+
+def test_write_csv_keeps_sidecar_in_sync(mocker: MockerFixture, csv_file: Path):
+    """
+    Tests that saving the labels updates the sidecar.
+    """
+    df = cache.read_csv_cached(csv_file, ";")
+    df["category"] = ["Car", "Food"]
+    cache.write_csv(df, csv_file, ";")
+    read_csv = mocker.spy(pd, "read_csv")
+    assert cache.read_csv_cached(csv_file, ";")["category"].tolist() == ["Car", "Food"]
+    assert read_csv.call_count == 0
+
+
+def test_disabled_cache(csv_file: Path):
+    """
+    Tests that no sidecar is written if the cache is disabled.
+    """
+    cache.read_csv_cached(csv_file, ";", enabled=False)
+    cache.write_csv(pd.DataFrame({"a": [1]}), csv_file, ";", enabled=False)
+    assert not any(path.exists() for path in cache.sidecar_paths(csv_file).values())
+
+
+def test_sidecar_round_trip(csv_file: Path):
+    """
+    Tests that the sidecar restores text with missing values, numbers and unicode.
+    """
+    csv_file.write_text("payee;amount;category\nCafé Ü;-1.5;Food\n;3;\nRewe;;Car\n")
+    expected = cache.read_csv_cached(csv_file, ";")
+    assert cache.load_sidecar(csv_file, ";") is not None
+    pd.testing.assert_frame_equal(cache.load_sidecar(csv_file, ";"), expected)
+
+
+def test_sidecar_is_never_unpickled(mocker: MockerFixture, csv_file: Path):
+    """
+    Tests that a sidecar containing pickled objects is not loaded (a file inside of a
+    shared folder must not be able to run code), the csv file is parsed instead.
+    """
+    if cache.feather is not None:
+        pytest.skip("pyarrow sidecars are written as feather files")
+    cache.read_csv_cached(csv_file, ";")
+    data_path = cache.sidecar_paths(csv_file)["data"]
+    with open(data_path, "wb") as file:
+        np.savez(file, layout=np.array(["pickled"], dtype=object))
+    load = mocker.spy(np, "load")
+    assert cache.load_sidecar(csv_file, ";") is None
+    assert load.call_args.kwargs["allow_pickle"] is False
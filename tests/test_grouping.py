@@ -0,0 +1,93 @@
+"""
+ Copyright 2021 Robin Maasjosthusmann. All rights reserved.
+ Use of this source code is governed by a BSD-style
+ license that can be found in the LICENSE file.
+"""
+
+import pandas as pd
+import pytest
+from parametrization import Parametrization
+from pytest_mock import MockerFixture
+
+from csv_labeler import main
+from csv_labeler.grouping import group_rows
+from csv_labeler.suggest import LabelSuggester
+
+from .conftest import make_settings
+
+
+@pytest.fixture(name="recurring")
+def fixture_recurring() -> pd.DataFrame:
+    """Recurring transactions with different dates and reference numbers."""
+    return pd.DataFrame(
+        data={
+            "payee": [
+                "Netflix 01.02.2021",
+                "NETFLIX  01.03.2021",
+                "Spotify Premium Abo Ref 123",
+                "Spotify Premium Abo Ref. 9",
+                None,
+                None,
+            ],
+            "category": [None] * 6,
+        }
+    )
+
+
+def test_exact_groups(recurring: pd.DataFrame):
+    """
+    Tests that case, whitespace and digits are ignored and empty rows are never
+    grouped.
+    """
+    groups = group_rows(recurring, ["payee"], "exact")
+    assert groups.members(0).tolist() == [0, 1]
+    assert groups.members(2).tolist() == [2]
+    assert groups.members(4).tolist() == [4]
+    assert len(set(groups.group_ids.tolist())) == 5
+
+
+def test_near_duplicate_groups(recurring: pd.DataFrame):
+    """
+    Tests that similar texts are joined in the near-duplicate mode.
+    """
+    groups = group_rows(recurring, ["payee"], "near", threshold=0.6)
+    assert groups.members(0).tolist() == [0, 1]
+    assert groups.members(3).tolist() == [2, 3]
+    assert groups.members(5).tolist() == [5]
+
+
+def test_invalid_mode():
+    """
+    Tests that unknown grouping modes are rejected.
+    """
+    with pytest.raises(ValueError):
+        make_settings(grouping={"mode": "fuzzy"})
+
+
+@Parametrization.parameters("apply_to_group")
+@Parametrization.case("apply", True)
+@Parametrization.case("decline", False)
+def test_label_dataframe_applies_group_label(
+    mocker: MockerFixture,
+    recurring: pd.DataFrame,
+    apply_to_group: bool,
+):
+    """
+    Tests that the label of a row is applied to its group if the user confirms it and
+    every labeled row (also the ones of the group) is learned by the suggester.
+    """
+    mocker.patch("csv_labeler.main.clear_console")
+    answers = ["freetime", "y" if apply_to_group else "n"] + ["car"] * 5
+    user_input = mocker.patch("builtins.input", side_effect=answers)
+    settings = make_settings(
+        classification={"keywords": "[]", "labels": '["Freetime", "Car"]'},
+        grouping={"mode": "exact"},
+    )
+    suggester = LabelSuggester(settings.labels)
+    main.label_dataframe(recurring, False, settings, suggester=suggester)
+    assert suggester.row_counts.sum() == len(recurring)
+    assert recurring["category"].tolist()[:2] == [
+        "Freetime",
+        "Freetime" if apply_to_group else "Car",
+    ]
+    assert user_input.call_count == (6 if apply_to_group else 7)
@@ -0,0 +1,76 @@
+"""
+ Copyright 2021 Robin Maasjosthusmann. All rights reserved.
+ Use of this source code is governed by a BSD-style
+ license that can be found in the LICENSE file.
+"""
+
+from pathlib import Path
+
+import pandas as pd
+from pytest_mock import MockerFixture
+
+from csv_labeler import main
+from csv_labeler.journal import LabelJournal
+from csv_labeler.settings import Settings
+
+
+def test_replay_last_entry_wins(tmp_path: Path):
+    """
+    Later entries of the same row overwrite earlier ones and an incomplete last line
+    (e.g. after a crash) is ignored.
+    """
+    journal = LabelJournal(tmp_path / "export.csv.journal", fsync_every=2)
+    journal.append(0, "Food")
+    journal.append(2, "Car")
+    journal.append(0, "Shopping")
+    journal.close()
+    with open(journal.path, "a", encoding="utf-8") as file:
+        file.write("3\tFre")
+
+    assert LabelJournal(journal.path).replay() == {0: "Shopping", 2: "Car"}
+
+
+def test_append_after_torn_tail(tmp_path: Path):
+    """
+    Tests that an entry appended after a crash in the middle of a line starts on a
+    new line instead of continuing the torn one.
+    """
+    journal = LabelJournal(tmp_path / "export.csv.journal")
+    journal.append(0, "Food")
+    journal.close()
+    with open(journal.path, "a", encoding="utf-8") as file:
+        file.write("3")
+
+    resumed = LabelJournal(journal.path)
+    assert resumed.replay() == {0: "Food"}
+    resumed.append(4, "Car")
+    resumed.close()
+    assert LabelJournal(journal.path).replay() == {0: "Food", 4: "Car"}
+
+    # Also without a replay before the append
+    with open(journal.path, "a", encoding="utf-8") as file:
+        file.write("5\tShop")
+    appender = LabelJournal(journal.path)
+    appender.append(6, "Food")
+    appender.close()
+    assert LabelJournal(journal.path).replay() == {0: "Food", 4: "Car", 6: "Food"}
+
+
+def test_resume_session(tmp_path: Path, mocker: MockerFixture, settings: Settings):
+    """
+    Rows from the journal are restored and skipped, the remaining rows are labeled
+    and appended to the journal.
+    """
+    journal = LabelJournal(tmp_path / "export.csv.journal")
+    journal.append(0, "Car")
+    journal.close()
+    journal.replay()
+
+    df = pd.DataFrame(data={"payee": ["Shell", "Rewe"], "category": [None, None]})
+    mocker.patch("csv_labeler.main.clear_console")
+    mocker.patch("builtins.input", side_effect=["food"])
+    main.label_dataframe(df, False, settings, journal)
+    journal.close()
+
+    assert df["category"].tolist() == ["Car", "Food"]
+    assert LabelJournal(journal.path).replay() == {0: "Car", 1: "Food"}
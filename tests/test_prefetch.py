@@ -0,0 +1,87 @@
+"""
+ Copyright 2021 Robin Maasjosthusmann. All rights reserved.
+ Use of this source code is governed by a BSD-style
+ license that can be found in the LICENSE file.
+"""
+
+import threading
+import time
+
+from csv_labeler.prefetch import Prefetcher
+from csv_labeler.tasks import TaskRunner
+from csv_labeler.work_queue import WorkQueue
+
+
+def wait_for(condition, timeout: float = 2.0) -> bool:
+    """Polls the condition until it is true or the timeout is reached."""
+    end = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > end:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+def test_upcoming_rows_are_rendered_in_background():
+    """
+    The next rows are rendered by the background tasks, up to the configured depth.
+    """
+    rendered = {}
+
+    def render(position: int) -> list:
+        rendered[position] = threading.current_thread().name
+        return [f"row {position}"]
+
+    queue = WorkQueue([0, 2, 4, 6, 8])
+    with Prefetcher(render, queue, depth=2) as prefetcher:
+        iterator = iter(queue)
+        assert wait_for(lambda: set(rendered) == {0, 2})
+        assert next(iterator) == 0
+        assert prefetcher.get(0) == ["row 0"]
+        assert wait_for(lambda: 4 in rendered)
+
+    assert all(x.startswith("csv_labeler-prefetch") for x in rendered.values())
+    assert 6 not in rendered
+
+
+def test_render_synchronously_without_prefetching():
+    """
+    With a depth of 0 no tasks are started and rows are rendered on demand.
+    """
+    queue = WorkQueue([0, 1])
+    prefetcher = Prefetcher(lambda position: [str(position)], queue, depth=0)
+    prefetcher.start()
+    assert prefetcher.get(1) == ["1"]
+    prefetcher.stop()
+
+
+def test_jobs_run_on_the_passed_runner():
+    """
+    Tests that the frames are rendered by the runner of the session (behind its other
+    jobs, e.g. autosaves) and frames of discarded rows are canceled. The worker is
+    blocked until the discarded frames are canceled, so none of them may run.
+    """
+    rendered = []
+
+    def render(position: int) -> list:
+        rendered.append(position)
+        return [str(position)]
+
+    queue = WorkQueue([0, 1, 2, 3])
+    with TaskRunner("session") as tasks:
+        # Blocks the worker, the frames wait behind this job
+        gate = threading.Event()
+        tasks.run_blocking(gate.wait, 5)
+        with Prefetcher(render, queue, 2, tasks) as prefetcher:
+            iterator = iter(queue)
+            assert next(iterator) == 0
+            # Not rendered yet, the frame is rendered synchronously
+            assert prefetcher.get(0) == ["0"]
+            queue.discard([1])
+            assert next(iterator) == 2
+            assert prefetcher.get(2) == ["2"]
+            gate.set()
+            tasks.wait_blocking()
+            assert next(iterator) == 3
+            assert prefetcher.get(3) == ["3"]
+    assert rendered == [0, 2, 3]
@@ -0,0 +1,78 @@
+"""
+ Copyright 2021 Robin Maasjosthusmann. All rights reserved.
+ Use of this source code is governed by a BSD-style
+ license that can be found in the LICENSE file.
+"""
+
+import pstats
+from pathlib import Path
+
+import pandas as pd
+from pytest_mock import MockerFixture
+
+from csv_labeler import main
+from csv_labeler.profiling import StageTimer
+from csv_labeler.settings import Settings
+
+
+def test_disabled_timer_records_nothing():
+    """
+    Tests that a disabled timer does not record any stage.
+    """
+    timer = StageTimer()
+    with timer.stage("render"):
+        pass
+    timer.row_done()
+    assert not timer.timings
+    assert timer.rows == 0
+
+
+def test_summary_separates_think_time(mocker: MockerFixture):
+    """
+    Tests the percentiles per stage and that completion time is machine time even
+    though it runs inside of the input stage.
+    """
+    timer = StageTimer()
+    timer.start()
+    timer.timings["input"].extend([1.0, 3.0])
+    timer.timings["completion"].append(0.5)
+    timer.rows = 2
+    mocker.patch(
+        "csv_labeler.profiling.time.perf_counter", return_value=timer._started + 6
+    )
+    lines = timer.summary()
+    assert lines[2].split()[:5] == ["input", "2", "2000.00", "2900.00", "3000.00"]
+    assert lines[-1] == (
+        "2 rows in 6.0 s (20.0 rows/min), machine time 2.50 s, think time 3.50 s"
+    )
+
+
+def test_session_profile(mocker: MockerFixture, settings: Settings, tmp_path: Path):
+    """
+    Tests that the stages of the labeling loop are recorded and the cProfile
+    statistics are written.
+    """
+    timer = StageTimer()
+    mocker.patch("csv_labeler.main.TIMER", timer)
+    mocker.patch("csv_labeler.main.clear_console")
+    mocker.patch("builtins.input", side_effect=["food", "car"])
+    profile_file = tmp_path / "session.prof"
+    timer.start(profile=True)
+    df = pd.DataFrame(data={"payee": ["Rewe", "Shell"], "category": [None, None]})
+    main.label_dataframe(df, False, settings)
+    timer.stop(profile_file)
+
+    assert timer.rows == 2
+    assert {"render", "draw", "input", "label"} <= set(timer.timings)
+    assert len(timer.timings["input"]) == 2
+    assert pstats.Stats(str(profile_file)).total_calls > 0
+    assert not timer.enabled
+
+
+def test_profile_flags():
+    """
+    Tests the command line flags of the profiling.
+    """
+    assert not main.parse_args([]).profile
+    args = main.parse_args(["--profile-output", "session.prof"])
+    assert args.profile_output == "session.prof"
@@ -0,0 +1,141 @@
+"""
+ Copyright 2021 Robin Maasjosthusmann. All rights reserved.
+ Use of this source code is governed by a BSD-style
+ license that can be found in the LICENSE file.
+"""
+
+from pathlib import Path
+
+import pandas as pd
+from pytest_mock import MockerFixture
+
+from csv_labeler import main, streaming
+from csv_labeler.progress import LabelProgress, format_duration
+
+from .conftest import make_settings
+
+SETTINGS = {"grouping": {"mode": "off"}, "suggestions": {"enabled": "False"}}
+
+
+def test_counters_are_updated_per_decision():
+    """
+    Tests that the seeded counters follow new labels, relabeled rows and groups.
+    """
+    progress = LabelProgress(pd.Series(["Food", None, "Car", None, None]), 4)
+    assert (progress.total, progress.labeled, progress.unlabeled) == (5, 2, 3)
+    assert progress.counts == {"Food": 1, "Car": 1}
+    progress.record("Car", [None])
+    progress.record("Food", ["Car"])
+    progress.record("Food", [None, None])
+    progress.record("Car", [])
+    assert (progress.labeled, progress.unlabeled, progress.pending) == (5, 0, 0)
+    assert progress.counts == {"Food": 4, "Car": 1}
+    assert LabelProgress(["Food", None], 1).counts == {"Food": 1}
+
+
+def test_speed_and_eta_use_a_moving_average(mocker: MockerFixture):
+    """
+    Tests that only the last {window} decisions are used for the speed and the ETA.
+    """
+    clock = mocker.patch("csv_labeler.progress.time.monotonic", return_value=0.0)
+    progress = LabelProgress([None] * 100, 100, window=2)
+    assert progress.rows_per_minute() is None
+    assert progress.format_lines() == [
+        "Labeled 0/100 (0%), 100 left | - rows/min | ETA -"
+    ]
+    # A long break, it fades out of the window
+    for now, rows in ((600.0, 1), (610.0, 1), (620.0, 2)):
+        clock.return_value = now
+        progress.record("Food", [None] * rows)
+    assert progress.rows_per_minute() == 9.0
+    assert progress.eta() == 96 * 60 / 9
+    assert progress.format_lines() == [
+        "Labeled 4/100 (4%), 96 left | 9.0 rows/min | ETA 10m 40s",
+        "Food: 4",
+    ]
+
+
+def test_run_progress_is_updated_per_chunk():
+    """
+    Tests that a progress seeded from counts follows labels set by the journal or the
+    rules of a chunk, the rows leave the pending rows.
+    """
+    progress = LabelProgress.from_counts(10, {"Food": 2}, 8)
+    assert (progress.total, progress.labeled, progress.pending) == (10, 2, 8)
+    progress.update(pd.Series([None, "Food", None]), ["Car", "Car", None], 1)
+    assert progress.counts == {"Food": 1, "Car": 2}
+    assert (progress.labeled, progress.unlabeled, progress.pending) == (3, 7, 7)
+
+
+def test_files_are_added_to_the_progress():
+    """
+    Tests that the rows of the next file extend the total, the counts and the pending
+    rows.
+    """
+    progress = LabelProgress(pd.Series(["Food", None]), 1)
+    progress.record("Car", [None])
+    progress.add(pd.Series([None, "Car", None]), 2)
+    assert (progress.total, progress.labeled, progress.pending) == (5, 3, 2)
+    assert progress.counts == {"Food": 1, "Car": 2}
+
+
+def test_format_duration():
+    """
+    Tests the compact durations of the ETA.
+    """
+    assert format_duration(44.6) == "45s"
+    assert format_duration(384) == "6m 24s"
+    assert format_duration(3900) == "1h 05m"
+
+
+def test_progress_is_shown_with_the_menu(mocker: MockerFixture, capsys):
+    """
+    Tests that the menu shows the progress of the DataFrame while labeling.
+    """
+    settings = make_settings(grouping={"mode": "off"}, suggestions={"enabled": "False"})
+    df = pd.DataFrame({"payee": ["Uber", "Rewe", "Shell"], "category": [None] * 3})
+    mocker.patch("csv_labeler.main.clear_console")
+    mocker.patch("builtins.input", side_effect=["car", "food", "car"])
+    main.label_dataframe(df, False, settings)
+    output = capsys.readouterr().out
+    assert "Labeled 0/3 (0%), 3 left | - rows/min | ETA -" in output
+    assert "Labeled 2/3 (67%), 1 left" in output
+    assert "Car: 1, Food: 1" in output
+
+
+def test_progress_spans_all_chunks(mocker: MockerFixture, tmp_path: Path, capsys):
+    """
+    Tests that the streaming mode shows the progress of the whole file.
+    """
+    csv_file = tmp_path / "export.csv"
+    csv_file.write_text("payee;category\nUber;\nRewe;Food\nShell;\nAral;\nBP;\n")
+    mocker.patch("csv_labeler.main.clear_console")
+    mocker.patch("builtins.input", side_effect=["y", "car", "food", "car", "car"])
+    main.label_csv_file(make_settings(csv={"chunksize": "2"}, **SETTINGS), csv_file)
+    output = capsys.readouterr().out
+    assert "Labeled 1/5 (20%), 4 left" in output
+    assert "Labeled 4/5 (80%), 1 left" in output
+    assert "Food: 2, Car: 2" in output
+
+
+def test_progress_spans_all_files(mocker: MockerFixture, tmp_path: Path, capsys):
+    """
+    Tests that a session shows the progress of all files.
+    """
+    paths = []
+    for month, payee in (("01", "Uber"), ("02", "Rewe"), ("03", "Shell")):
+        path = tmp_path / f"2021-{month}.csv"
+        path.write_text(f"payee;category\n{payee};\n", encoding="utf-8")
+        paths.append(path)
+    settings = make_settings(session={"workers": "0"}, **SETTINGS)
+    mocker.patch("csv_labeler.main.clear_console")
+    mocker.patch("builtins.input", side_effect=["car", "food", "car"])
+    count_labels = mocker.spy(streaming, "count_labels")
+    main.label_session(paths, settings)
+    output = capsys.readouterr().out
+    # The loaded DataFrames are counted, the files are not parsed a second time
+    assert not count_labels.called
+    # The files are added to the progress when they are handed over
+    assert "Labeled 0/1 (0%), 1 left" in output
+    assert "Labeled 1/2 (50%), 1 left" in output
+    assert "Labeled 2/3 (67%), 1 left" in output
@@ -0,0 +1,160 @@
+"""
+ Copyright 2021 Robin Maasjosthusmann. All rights reserved.
+ Use of this source code is governed by a BSD-style
+ license that can be found in the LICENSE file.
+"""
+
+from pathlib import Path
+
+import pandas as pd
+import pytest
+from parametrization import Parametrization
+
+from csv_labeler import pruned
+
+# Quoted fields with separators, quotes and line breaks, CRLF endings, a blank line,
+# a BOM and no line ending at the end of the file
+SOURCE = (
+    "\ufeffdate;payee;memo;amount;category;iban\r\n"
+    '01.01.2021;Uber;"Trip; ""airport""";-12,50;;DE01\r\n'
+    '02.01.2021;Rewe;"multi\r\nline memo";-20;Food;DE02\r\n'
+    "\r\n"
+    '03.01.2021;"Uber";ride;-7;"";DE01\r\n'
+    "04.01.2021;Shell;fuel;-50;;DE03"
+)
+
+
+@pytest.fixture(name="csv_file")
+def fixture_csv_file(tmp_path: Path) -> Path:
+    """Export with all the special cases of SOURCE."""
+    csv_file = tmp_path / "export.csv"
+    csv_file.write_bytes(SOURCE.encode("utf-8"))
+    return csv_file
+
+
+def test_read_pruned(csv_file: Path):
+    """
+    Tests that only the relevant and the label column are parsed, with compact dtypes.
+    """
+    df = pruned.read_pruned(csv_file, ";", ["PAYEE", "amount"], "category")
+    assert df.columns.tolist() == ["payee", "amount", "category"]
+    assert df["payee"].tolist() == ["Uber", "Rewe", "Uber", "Shell"]
+    assert isinstance(df["category"].dtype, pd.CategoricalDtype)
+    assert df["category"].tolist()[1] == "Food"
+
+
+def test_read_pruned_missing_label_column(csv_file: Path):
+    """
+    Tests that a missing label column is reported.
+    """
+    with pytest.raises(ValueError):
+        pruned.read_pruned(csv_file, ";", ["payee"], "label")
+
+
+def test_compact_dtypes():
+    """
+    Tests that integers are downcast, floats are kept and only repetitive text becomes
+    categorical.
+    """
+    df = pruned.compact_dtypes(
+        pd.DataFrame(
+            {
+                "count": [1, 2, 3, 4],
+                "amount": [-1.1, 2.2, 3.3, 4.4],
+                "payee": ["a", "a", "a", "b"],
+                "memo": ["w", "x", "y", "z"],
+            }
+        )
+    )
+    assert df["count"].dtype == "int8"
+    assert df["amount"].dtype == "float64"
+    assert isinstance(df["payee"].dtype, pd.CategoricalDtype)
+    assert not isinstance(df["memo"].dtype, pd.CategoricalDtype)
+
+
+def test_unchanged_labels_keep_file(csv_file: Path):
+    """
+    Tests that writing the labels that were read does not change a single byte.
+    """
+    df = pruned.read_pruned(csv_file, ";", ["payee"], "category")
+    pruned.write_labels(csv_file, ";", "category", df["category"])
+    assert csv_file.read_bytes() == SOURCE.encode("utf-8")
+
+
+def test_write_labels_only_changes_label_fields(csv_file: Path):
+    """
+    Tests that only the changed label fields are replaced (quoted if necessary),
+    everything else stays byte for byte.
+    """
+    df = pruned.read_pruned(csv_file, ";", ["payee"], "category")
+    df["category"] = df["category"].astype(object)
+    df.iat[0, 1] = "Car"
+    df.iat[2, 1] = 'Fun; "quoted"'
+    pruned.write_labels(csv_file, ";", "category", df["category"])
+
+    expected = (
+        SOURCE.replace(";-12,50;;", ";-12,50;Car;")
+        .replace(';-7;"";', ';-7;"Fun; ""quoted""";')
+        .encode("utf-8")
+    )
+    assert csv_file.read_bytes() == expected
+    assert pd.read_csv(csv_file, sep=";")["category"].tolist()[:3] == [
+        "Car",
+        "Food",
+        'Fun; "quoted"',
+    ]
+
+
+def test_write_labels_with_quotes_inside_of_fields(tmp_path: Path):
+    """
+    Tests that a quote inside of an unquoted field (12" Pizza) is plain text and does
+    not swallow the following records.
+    """
+    csv_file = tmp_path / "export.csv"
+    csv_file.write_text('payee;category\n12" Pizza Place;\nRewe;\nShell;\n')
+    pruned.write_labels(csv_file, ";", "category", ["Food", "Food", "Car"])
+    assert csv_file.read_text() == (
+        'payee;category\n12" Pizza Place;Food\nRewe;Food\nShell;Car\n'
+    )
+    assert pd.read_csv(csv_file, sep=";")["category"].tolist() == ["Food", "Food", "Car"]
+
+
+def test_write_labels_row_mismatch(csv_file: Path):
+    """
+    Tests that labels that do not match the rows of the file leave it untouched.
+    """
+    with pytest.raises(ValueError):
+        pruned.write_labels(csv_file, ";", "category", ["Car"] * 5)
+    with pytest.raises(ValueError):
+        pruned.write_labels(csv_file, ";", "category", ["Car"] * 3)
+    assert csv_file.read_bytes() == SOURCE.encode("utf-8")
+    assert list(csv_file.parent.iterdir()) == [csv_file]
+
+
+@Parametrization.parameters("body", "expected")
+@Parametrization.case("plain", "a;b;c", ["a", "b", "c"])
+@Parametrization.case("quoted_separator", '"a;b";c', ['"a;b"', "c"])
+@Parametrization.case("escaped_quotes", 'a;"b ""c"";d";', ["a", '"b ""c"";d"', ""])
+@Parametrization.case(
+    "quote_inside_of_field",
+    '12" Pizza Place;"a;b";x"y;z',
+    ['12" Pizza Place', '"a;b"', 'x"y', "z"],
+)
+def test_split_fields(body: str, expected: list):
+    """
+    Tests that separators inside of quoted fields are ignored and quotes are kept.
+    """
+    assert pruned.split_fields(body, ";") == expected
+
+
+def test_iter_records():
+    """
+    Tests that quoted line breaks are joined to one record.
+    """
+    lines = ['a;"b\n', 'c";d\n', '12" Pizza Place;\n', '"x ""\n', '";y\n', "e;f"]
+    assert list(pruned.iter_records(lines, ";")) == [
+        'a;"b\nc";d\n',
+        '12" Pizza Place;\n',
+        '"x ""\n";y\n',
+        "e;f",
+    ]
@@ -0,0 +1,56 @@
+"""
+ Copyright 2021 Robin Maasjosthusmann. All rights reserved.
+ Use of this source code is governed by a BSD-style
+ license that can be found in the LICENSE file.
+"""
+
+import pandas as pd
+
+from csv_labeler.rendering import RenderPlan
+from csv_labeler.settings import Settings
+from tests.conftest import make_settings
+
+
+def test_plan_only_contains_relevant_columns():
+    """
+    The plan keeps the schema order of the relevant columns and ignores all others.
+    """
+    columns = [f"col_{i}" for i in range(200)] + ["Memo", "category", "payee"]
+    settings = make_settings(csv={"relevant_columns": '["payee", "memo"]'})
+    plan = RenderPlan(columns, settings)
+
+    assert plan.positions == (200, 202)
+    assert plan.names == ("Memo", "payee")
+    assert plan.name_column_width == len("payee")
+    assert plan.value_column_width == 80 - len("payee")
+
+
+def test_all_columns_without_relevant_columns():
+    """
+    Without relevant columns all columns except of the label column are rendered.
+    """
+    settings = make_settings(csv={"relevant_columns": "[]"})
+    plan = RenderPlan(["date", "payee", "category"], settings)
+
+    assert plan.names == ("date", "payee")
+
+
+def test_render_row(settings: Settings):
+    """
+    Text is cleaned up, highlighted and wrapped, missing values are printed as None.
+    """
+    df = pd.DataFrame(
+        data={
+            "payee": ["Uber  BV\\n" + "x" * 90, None],
+            "category": [None, None],
+        }
+    )
+    plan = RenderPlan(tuple(df.columns), settings)
+    columns = plan.column_values(df)
+
+    lines = plan.render_position(columns, 0)
+    assert lines == plan.render_row(df.iloc[0])
+    assert lines[0].startswith("payee:    \x1b[30m\x1b[43mUber\x1b[0m BVn")
+    assert len(lines) == 2
+    assert lines[1].strip() == "x" * (90 - len(lines[0].split("BVn")[1].strip()))
+    assert plan.render_position(columns, 1) == ["payee:    None" + " " * 71]
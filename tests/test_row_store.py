@@ -0,0 +1,54 @@
+"""
+ Copyright 2021 Robin Maasjosthusmann. All rights reserved.
+ Use of this source code is governed by a BSD-style
+ license that can be found in the LICENSE file.
+"""
+
+from pathlib import Path
+
+import pandas as pd
+
+from csv_labeler.row_store import DataFrameRows, TableRows
+from csv_labeler.small_file import SmallTable
+
+
+def test_dataframe_rows_store_labels_in_the_label_column():
+    """
+    Labels set through the store are written into the DataFrame, the journal keys are
+    the index labels.
+    """
+    df = pd.DataFrame(
+        {"payee": ["Uber", "Rewe", "Shell"], "category": [None, "Food", None]},
+        index=[10, 11, 12],
+    )
+    df["category"] = df["category"].astype(object)
+    rows = DataFrameRows(df, "category")
+    rows.set(2, "Car")
+
+    assert df["category"].tolist()[1:] == ["Food", "Car"]
+    assert rows.get(1) == "Food"
+    assert rows.key(2) == 12
+    assert rows.labeled_positions().tolist() == [1, 2]
+    assert rows.dataframe() is df
+
+
+def test_table_rows_sync_the_dataframe(tmp_path: Path):
+    """
+    The DataFrame of a small file shows the labels of the store, labels written into
+    the DataFrame are copied back with pull.
+    """
+    csv_filepath = tmp_path / "small.csv"
+    csv_filepath.write_text("payee;category\nUber;\nRewe;Food\nShell;\n")
+    table = SmallTable.read(csv_filepath, ";")
+    labels = table.column("category")
+    rows = TableRows(table, labels, "category")
+    rows.set(0, "Car")
+
+    df = rows.dataframe()
+    assert df["category"].tolist() == ["Car", "Food", None]
+    df.iat[2, 1] = "Car"
+    rows.pull([2])
+
+    assert labels == ["Car", "Food", "Car"]
+    assert rows.key(2) == 2
+    assert rows.labeled_positions().tolist() == [0, 1, 2]
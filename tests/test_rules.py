@@ -0,0 +1,154 @@
+"""
+ Copyright 2021 Robin Maasjosthusmann. All rights reserved.
+ Use of this source code is governed by a BSD-style
+ license that can be found in the LICENSE file.
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+from parametrization import Parametrization
+
+from csv_labeler import main
+from csv_labeler.query import QueryError, evaluate, parse_query
+from csv_labeler.rules import RuleReport, apply_rules
+
+from .conftest import make_settings
+
+
+@pytest.fixture(name="transactions")
+def fixture_transactions() -> pd.DataFrame:
+    """Small bank export with a decimal comma in the amount column."""
+    return pd.DataFrame(
+        data={
+            "payee": ["Netflix Intl.", "Uber BV", "REWE Markt", None, "NETFLIX"],
+            "memo": ["Abo", "Trip", "Restaurant Lunch", "Cafe", "Abo"],
+            "amount": ["-12,99", "-25,50", "-8,10", "100,00", "-12,99"],
+            "category": [None, None, None, None, "Shopping"],
+        }
+    )
+
+
+@Parametrization.parameters("query", "expected_result")
+@Parametrization.case("contains", 'payee~"netflix"', [0, 4])
+@Parametrization.case("not_contains", 'payee!~"netflix"', [1, 2])
+@Parametrization.case("equal_text", "Memo==abo", [0, 4])
+@Parametrization.case("decimal_comma", "amount<-10", [0, 1, 4])
+@Parametrization.case("combined", 'amount<0 & memo~"restaurant|cafe"', [2])
+@Parametrization.case("quoted_ampersand", 'payee~"A & B"', [])
+@Parametrization.case("missing_is_not_nan", 'payee~"nan|none"', [])
+def test_evaluate(transactions: pd.DataFrame, query: str, expected_result: list):
+    """
+    Tests that the conditions are evaluated for all rows at once.
+    """
+    mask = evaluate(parse_query(query), transactions)
+    assert np.flatnonzero(mask).tolist() == expected_result
+
+
+def test_missing_values_do_not_match_text(transactions: pd.DataFrame):
+    """
+    Tests that missing values of a numeric column (e.g. an empty label column) are not
+    matched as the text "nan".
+    """
+    transactions["category"] = np.nan
+    transactions["amount"] = [-12.99, np.nan, -8.1, 100.0, -12.99]
+    assert not evaluate(parse_query('category~"nan"'), transactions).any()
+    mask = evaluate(parse_query('amount~"nan|12"'), transactions)
+    assert np.flatnonzero(mask).tolist() == [0, 4]
+
+
+def test_missing_values_match_no_operator():
+    """
+    Tests that a missing cell matches neither a condition nor its negation.
+    """
+    df = pd.DataFrame({"payee": ["Uber", None, "Rewe"]})
+    for query in ('payee~"uber"', 'payee!~"uber"', "payee==uber", "payee!=uber"):
+        assert not evaluate(parse_query(query), df)[1]
+    assert evaluate(parse_query('payee!~"uber"'), df).tolist() == [False, False, True]
+
+
+@Parametrization.parameters("query")
+@Parametrization.case("empty", " & ")
+@Parametrization.case("no_operator", "payee Netflix")
+@Parametrization.case("text_comparison", "amount<abc")
+@Parametrization.case("invalid_regex", 'payee~"("')
+def test_invalid_query(query: str):
+    """
+    Tests that invalid queries are rejected while parsing.
+    """
+    with pytest.raises(QueryError):
+        parse_query(query)
+
+
+def test_unknown_column(transactions: pd.DataFrame):
+    """
+    Tests that unknown columns are reported.
+    """
+    with pytest.raises(QueryError):
+        evaluate(parse_query("iban==1"), transactions)
+
+
+def test_apply_rules_first_match_wins(transactions: pd.DataFrame):
+    """
+    Tests that only queued rows are labeled and the first matching rule wins.
+    """
+    settings = make_settings(
+        **{
+            "rule:netflix": {"label": "Freetime", "query": 'payee~"netflix"'},
+            "rule:expenses": {"label": "Food", "query": "amount<0"},
+        }
+    )
+    report = RuleReport()
+    labeled = apply_rules(
+        transactions, settings.rules, "category", np.array([0, 1, 2, 3]), report
+    )
+    assert sorted(labeled.tolist()) == [0, 1, 2]
+    assert transactions["category"].fillna("").tolist() == [
+        "Freetime",
+        "Food",
+        "Food",
+        "",
+        "Shopping",
+    ]
+    assert report.hits == {"netflix": 1, "expenses": 2}
+    assert report.candidates == 4
+
+
+def test_invalid_rule():
+    """
+    Tests that invalid rules are reported while reading the config.
+    """
+    with pytest.raises(ValueError):
+        make_settings(**{"rule:broken": {"label": "Food", "query": "amount<"}})
+    with pytest.raises(ValueError):
+        make_settings(**{"rule:no_label": {"query": "amount<0"}})
+
+
+def test_rules_file(tmp_path, transactions: pd.DataFrame):
+    """
+    Tests that rules are read from the additional rules file.
+    """
+    rules_file = tmp_path / "rules.ini"
+    rules_file.write_text('[rule:uber]\nlabel = Car\nquery = payee~"uber"\n')
+    settings = make_settings(rules={"file": str(rules_file)})
+    assert [rule.name for rule in settings.rules] == ["uber"]
+
+
+def test_label_dataframe_skips_rule_rows(mocker, transactions: pd.DataFrame):
+    """
+    Tests that rows labeled by a rule are not passed to the interactive loop.
+    """
+    settings = make_settings(
+        **{"rule:netflix": {"label": "Freetime", "query": 'payee~"netflix"'}}
+    )
+    mocker.patch("csv_labeler.main.clear_console")
+    user_input = mocker.patch("builtins.input", return_value="Car")
+    main.label_dataframe(transactions, True, settings)
+    assert transactions["category"].tolist() == [
+        "Freetime",
+        "Car",
+        "Car",
+        "Car",
+        "Shopping",
+    ]
+    assert user_input.call_count == 3
@@ -0,0 +1,101 @@
+"""
+ Copyright 2021 Robin Maasjosthusmann. All rights reserved.
+ Use of this source code is governed by a BSD-style
+ license that can be found in the LICENSE file.
+"""
+
+import io
+
+from pytest import MonkeyPatch
+from pytest_mock import MockerFixture
+
+from csv_labeler import main
+from csv_labeler.screen import CLEAR_SCREEN, CURSOR_HOME, Screen
+
+
+class FakeTerminal(io.StringIO):
+    """StringIO that pretends to be a terminal and counts the flushes."""
+
+    flushes = 0
+
+    def isatty(self) -> bool:
+        return True
+
+    def flush(self) -> None:
+        self.flushes += 1
+
+
+def test_plain_output_without_terminal():
+    """
+    Without a terminal the frame is written as plain lines, clear is a no-op.
+    """
+    stream = io.StringIO()
+    screen = Screen(stream)
+    screen.clear()
+    screen.draw(["a", "b"])
+    assert stream.getvalue() == "a\nb\n"
+
+
+def test_only_changed_lines_are_redrawn(monkeypatch: MonkeyPatch):
+    """
+    The first frame is drawn completely, the next one only redraws changed lines and
+    clears everything below the frame. Every frame is written with one flush.
+    """
+    monkeypatch.setenv("LINES", "40")
+    monkeypatch.setenv("COLUMNS", "80")
+    stream = FakeTerminal()
+    screen = Screen(stream)
+
+    screen.draw(["payee: Uber", "amount: 12", "menu"])
+    assert stream.getvalue() == "\x1b[H\x1b[2J\x1b[3Jpayee: Uber\namount: 12\nmenu\n"
+    assert stream.flushes == 1
+
+    stream.seek(0)
+    stream.truncate()
+    screen.draw(["payee: Rewe", "amount: 12", "menu"])
+    assert stream.getvalue() == "\x1b[1;1Hpayee: Rewe\x1b[K\x1b[4;1H\x1b[J"
+    assert stream.flushes == 2
+
+
+def test_full_redraw_if_frame_does_not_fit(monkeypatch: MonkeyPatch):
+    """
+    If the frame scrolls the terminal, the line positions are unknown and the next
+    frame is drawn completely.
+    """
+    monkeypatch.setenv("LINES", "8")
+    monkeypatch.setenv("COLUMNS", "80")
+    stream = FakeTerminal()
+    screen = Screen(stream)
+    frame = [str(i) for i in range(5)]
+    screen.draw(frame)
+    stream.seek(0)
+    stream.truncate()
+    screen.draw(frame)
+    assert stream.getvalue().startswith("\x1b[H\x1b[2J")
+
+
+def test_messages_below_the_frame_force_a_redraw(
+    monkeypatch: MonkeyPatch, mocker: MockerFixture
+):
+    """
+    Invalid inputs print below the frame and can scroll the terminal, so the next
+    frame is drawn completely instead of at the old line positions.
+    """
+    monkeypatch.setenv("LINES", "40")
+    monkeypatch.setenv("COLUMNS", "80")
+    mocker.patch("builtins.print")
+    stream = FakeTerminal()
+    monkeypatch.setattr(main, "SCREEN", Screen(stream))
+    mocker.patch("builtins.input", side_effect=["1"])
+    main.get_classification(["Food", "Car"], header=["payee: Uber"])
+    stream.seek(0)
+    stream.truncate()
+    main.SCREEN.draw(["payee: Rewe"])
+    assert not stream.getvalue().startswith(CURSOR_HOME + CLEAR_SCREEN)
+
+    mocker.patch("builtins.input", side_effect=["x"] * 10 + ["1"])
+    main.get_classification(["Food", "Car"], header=["payee: Uber"])
+    stream.seek(0)
+    stream.truncate()
+    main.SCREEN.draw(["payee: Rewe"])
+    assert stream.getvalue().startswith(CURSOR_HOME + CLEAR_SCREEN)
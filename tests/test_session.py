@@ -0,0 +1,120 @@
+"""
+ Copyright 2021 Robin Maasjosthusmann. All rights reserved.
+ Use of this source code is governed by a BSD-style
+ license that can be found in the LICENSE file.
+"""
+
+import time
+from pathlib import Path
+from typing import List
+
+import pytest
+from parametrization import Parametrization
+from pytest_mock import MockerFixture
+
+from csv_labeler import main
+from csv_labeler.session import FilePreloader, expand_paths
+
+from .conftest import make_settings
+
+
+@pytest.fixture(name="exports")
+def fixture_exports(tmp_path: Path) -> List[Path]:
+    """Three monthly exports and a file that is not a csv file."""
+    paths = []
+    for month, payee in (("01", "Uber BV"), ("02", "Uber"), ("03", "Rewe")):
+        path = tmp_path / f"2021-{month}.csv"
+        path.write_text(f"payee;category\n{payee};\n", encoding="utf-8")
+        paths.append(path)
+    (tmp_path / "notes.txt").write_text("", encoding="utf-8")
+    return paths
+
+
+def test_expand_paths(exports: List[Path]):
+    """
+    Tests that directories, globs and single files are expanded in sorted order.
+    """
+    directory = exports[0].parent
+    assert expand_paths(directory) == exports
+    assert expand_paths(directory / "2021-0[23].csv") == exports[1:]
+    assert expand_paths(exports[0]) == exports[:1]
+    assert expand_paths(directory / "*.xlsx") == []
+
+
+@Parametrization.parameters("workers")
+@Parametrization.case("in_process", 0)
+@Parametrization.case("worker_processes", 2)
+def test_preloader_keeps_order(exports: List[Path], workers: int):
+    """
+    Tests that the files are yielded in order with and without worker processes.
+    """
+    with FilePreloader(exports, ";", workers=workers, preload=1) as files:
+        loaded = [(path, df["payee"].tolist()) for path, df in files]
+    assert loaded == [
+        (exports[0], ["Uber BV"]),
+        (exports[1], ["Uber"]),
+        (exports[2], ["Rewe"]),
+    ]
+
+
+def test_session_carries_suggestions_over(mocker: MockerFixture, exports: List[Path]):
+    """
+    Tests that every file is saved and the suggestion model learned from the
+    previous files (Enter accepts the suggestion in the second file).
+    """
+    settings = make_settings(session={"workers": "0"}, journal={"enabled": "False"})
+    mocker.patch("csv_labeler.main.clear_console")
+    mocker.patch("builtins.input", side_effect=["car", "", "food"])
+    main.label_session(exports, settings)
+    assert [path.read_text(encoding="utf-8") for path in exports] == [
+        "payee;category\nUber BV;Car\n",
+        "payee;category\nUber;Car\n",
+        "payee;category\nRewe;Food\n",
+    ]
+
+
+def test_session_cancel_stops_after_current_file(
+    mocker: MockerFixture, exports: List[Path]
+):
+    """
+    Tests that a canceled session saves the current file and skips the rest.
+    """
+    settings = make_settings(session={"workers": "0"}, journal={"enabled": "False"})
+    mocker.patch("csv_labeler.main.clear_console")
+    mocker.patch("builtins.input", side_effect=["car", "q", "y"])
+    main.label_session(exports, settings)
+    assert exports[0].read_text(encoding="utf-8") == "payee;category\nUber BV;Car\n"
+    assert exports[2].read_text(encoding="utf-8") == "payee;category\nRewe;\n"
+
+
+def test_session_autosaves_current_file(mocker: MockerFixture, tmp_path: Path):
+    """
+    Tests that the current file of a session is autosaved and the autosave is undone
+    if the user does not want to save the canceled file.
+    """
+    export = tmp_path / "2021-01.csv"
+    export.write_text("payee;category\nUber;\nRewe;\n", encoding="utf-8")
+    settings = make_settings(
+        session={"workers": "0"},
+        journal={"enabled": "False"},
+        autosave={"enabled": "True", "rows": "1", "interval": "0"},
+    )
+    write_labels = mocker.spy(main.pruned, "write_labels")
+    replies = iter(["car", "q", "n"])
+
+    def reply(*args) -> str:
+        answer = next(replies)
+        if answer == "q":
+            # The autosave of the first row has to start before the session is
+            # canceled, pending jobs are canceled
+            end = time.monotonic() + 2
+            while not write_labels.call_count and time.monotonic() < end:
+                time.sleep(0.01)
+        return answer
+
+    mocker.patch("csv_labeler.main.clear_console")
+    mocker.patch("builtins.input", side_effect=reply)
+    main.label_session([export], settings)
+    # Autosave of the first row and the restore of the original labels
+    assert write_labels.call_count == 2
+    assert export.read_text(encoding="utf-8") == "payee;category\nUber;\nRewe;\n"
@@ -0,0 +1,54 @@
+"""
+ Copyright 2021 Robin Maasjosthusmann. All rights reserved.
+ Use of this source code is governed by a BSD-style
+ license that can be found in the LICENSE file.
+"""
+
+import pytest
+from parametrization import Parametrization
+
+from csv_labeler.settings import Settings
+from tests.conftest import make_settings
+
+
+def test_settings_are_parsed(settings: Settings):
+    """
+    Lists are parsed once and the colors are resolved to colorama codes.
+    """
+    assert settings.relevant_columns == ("payee",)
+    assert settings.relevant_columns_casefold == frozenset({"payee"})
+    assert settings.labels == ("Food", "Car")
+    assert settings.line_length == 80
+    assert settings.highlight_foreground == "\x1b[30m"
+    assert settings.highlighter.highlight("Uber") == "\x1b[30m\x1b[43mUber\x1b[0m"
+    assert not settings.testmode
+
+
+def test_settings_are_immutable(settings: Settings):
+    """
+    Settings can not be changed after loading.
+    """
+    with pytest.raises(AttributeError, match="Settings are immutable"):
+        settings.line_length = 100  # type: ignore
+
+
+@Parametrization.parameters("sections", "expected_message")
+@Parametrization.case(
+    "invalid_list", {"classification": {"labels": "Food, Car"}}, "Invalid list"
+)
+@Parametrization.case(
+    "no_string_list", {"csv": {"relevant_columns": "[1, 2]"}}, "list of strings"
+)
+@Parametrization.case(
+    "invalid_color", {"highlighting": {"foreground": "SPARKLING"}}, "color"
+)
+@Parametrization.case(
+    "invalid_line_length", {"general": {"line_length": "0"}}, "greater than 0"
+)
+@Parametrization.case("no_labels", {"classification": {"labels": "[]"}}, "label")
+def test_invalid_settings(sections: dict, expected_message: str):
+    """
+    Invalid values are reported with a ValueError.
+    """
+    with pytest.raises(ValueError, match=expected_message):
+        make_settings(**sections)
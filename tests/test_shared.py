@@ -0,0 +1,127 @@
+"""
+ Copyright 2021 Robin Maasjosthusmann. All rights reserved.
+ Use of this source code is governed by a BSD-style
+ license that can be found in the LICENSE file.
+"""
+
+from pathlib import Path
+
+import pandas as pd
+import pytest
+from pytest_mock import MockerFixture
+
+from csv_labeler import main, shared
+from csv_labeler.main import label_shared_file
+from tests.conftest import make_settings
+
+SOURCE = "payee;category\nUber;\nRewe;Food\nShell;\nNetflix;\nAral;\n"
+
+
+@pytest.fixture(name="csv_file")
+def fixture_csv_file(tmp_path: Path) -> Path:
+    """Export with one existing label."""
+    csv_file = tmp_path / "export.csv"
+    csv_file.write_text(SOURCE)
+    return csv_file
+
+
+def open_queue(db_path: Path, worker: str, **kwargs) -> shared.SharedQueue:
+    """Opens the session with rows 0 to 4, row 1 is labeled by a rule."""
+    queue = shared.SharedQueue(db_path, worker, **kwargs)
+    queue.initialize("export.csv", 5, [0, 1, 2, 3, 4], {1: "Food"})
+    return queue
+
+
+def test_leases_are_exclusive(tmp_path: Path):
+    """
+    Tests that two labelers never lease the same rows.
+    """
+    first = open_queue(tmp_path / "team.db", "a", batch_size=2)
+    second = open_queue(tmp_path / "team.db", "b", batch_size=2)
+    assert first.lease() == [0, 2]
+    assert second.lease() == [3, 4]
+    assert first.lease() == []
+    assert first.commit(0, "Car")
+    assert second.progress() == (2, 5)
+    first.close()
+    second.close()
+
+
+def test_expired_and_released_leases(mocker: MockerFixture, tmp_path: Path):
+    """
+    Tests that rows of a vanished labeler are leased again once the lease expired,
+    released rows immediately. The first label of a row wins.
+    """
+    now = mocker.patch("csv_labeler.shared.time.time", return_value=1000.0)
+    first = open_queue(tmp_path / "team.db", "a", lease_seconds=60, batch_size=4)
+    second = open_queue(tmp_path / "team.db", "b", lease_seconds=60, batch_size=4)
+    assert first.lease() == [0, 2, 3, 4]
+    now.return_value = 1030.0
+    assert first.commit(0, "Car")
+    # The commit renewed the leases of the remaining rows
+    now.return_value = 1070.0
+    assert second.lease() == []
+    now.return_value = 1100.0
+    assert second.lease() == [2, 3, 4]
+    assert second.commit(2, "Fun")
+    assert not first.commit(2, "Car")
+
+    second.release()
+    assert first.lease() == [3, 4]
+    first.close()
+    second.close()
+
+
+def test_session_of_other_file(tmp_path: Path):
+    """
+    Tests that a database can not be used for another csv file.
+    """
+    open_queue(tmp_path / "team.db", "a").close()
+    queue = shared.SharedQueue(tmp_path / "team.db", "b")
+    with pytest.raises(ValueError):
+        queue.initialize("other.csv", 5, [0], {})
+    queue.close()
+
+
+def test_shared_file_and_export(mocker: MockerFixture, csv_file: Path):
+    """
+    Tests that two labelers split the file and the export merges their labels without
+    touching the rest of the file.
+    """
+    mocker.patch("csv_labeler.main.clear_console")
+    settings = make_settings(
+        development={"testmode": "True", "skip_labels": "True"},
+        shared={"batch_size": "2"},
+        suggestions={"enabled": "False"},
+        **{"rule:aral": {"label": "Car", "query": 'payee~"aral"'}},
+    )
+    db_path = csv_file.with_name("team.db")
+
+    # The first labeler labels one row and quits, the lease is released
+    mocker.patch("builtins.input", side_effect=["Car", "q"])
+    label_shared_file(settings, csv_file, db_path)
+    mocker.patch("builtins.input", side_effect=["Food", "Car"])
+    label_shared_file(settings, csv_file, db_path)
+    assert csv_file.read_text() == SOURCE
+
+    label_shared_file(settings, csv_file, db_path, export=True)
+    assert pd.read_csv(csv_file, sep=";")["category"].tolist() == [
+        "Car",
+        "Food",
+        "Food",
+        "Car",
+        "Car",
+    ]
+
+
+def test_shared_source_in_home_directory(
+    monkeypatch: pytest.MonkeyPatch, csv_file: Path
+):
+    """
+    Tests that --shared accepts a csv file given relative to the home directory.
+    """
+    monkeypatch.setenv("HOME", str(csv_file.parent))
+    args = main.parse_args([f"~/{csv_file.name}", "--shared", "~/team.db"])
+    assert args.shared == "~/team.db"
+    with pytest.raises(SystemExit):
+        main.parse_args(["~/missing.csv", "--shared", "~/team.db"])
@@ -0,0 +1,187 @@
+"""
+ Copyright 2021 Robin Maasjosthusmann. All rights reserved.
+ Use of this source code is governed by a BSD-style
+ license that can be found in the LICENSE file.
+"""
+
+import subprocess
+import sys
+from pathlib import Path
+
+import pandas as pd
+import pytest
+from pytest_mock import MockerFixture
+
+from csv_labeler import main
+from csv_labeler.journal import LabelJournal
+from csv_labeler.settings import load_settings
+from csv_labeler.small_file import SmallTable, is_small_file
+
+from .conftest import make_settings
+
+# BOM, quoted separator, CRLF endings, a blank line and a missing value marker
+SOURCE = (
+    "\ufeffpayee;memo;amount;category\r\n"
+    'Uber BV;"ride; airport";-10;\r\n'
+    "Rewe;groceries;-20;Food\r\n"
+    "\r\n"
+    "UBER Eats;NA;-150;\r\n"
+    "Shell;fuel;-600;\r\n"
+)
+
+
+# Labels the csv file (argv[1]) in a fresh interpreter
+LABEL_SCRIPT = """
+import builtins, sys
+from pathlib import Path
+from csv_labeler import main
+from tests.conftest import make_settings
+answers = iter(["y", "car", "food", "car"])
+builtins.input = lambda prompt="": next(answers)
+main.clear_console = lambda: None
+settings = make_settings(csv={"small_file_bytes": "4096"}, grouping={"mode": "off"})
+main.label_csv_file(settings, Path(sys.argv[1]))
+print("pandas" in sys.modules)
+"""
+
+
+@pytest.fixture(name="csv_file")
+def fixture_csv_file(tmp_path: Path) -> Path:
+    """Small export with the special cases of SOURCE."""
+    csv_file = tmp_path / "export.csv"
+    csv_file.write_bytes(SOURCE.encode("utf-8"))
+    return csv_file
+
+
+def test_read_small_table(csv_file: Path):
+    """
+    Tests that the rows are at the same positions as in the DataFrame of pandas and
+    missing values are None.
+    """
+    table = SmallTable.read(csv_file, ";")
+    df = pd.read_csv(csv_file, sep=";")
+    assert table.columns == df.columns.tolist()
+    assert len(table) == len(df)
+    assert table.column("payee") == df["payee"].tolist()
+    assert table.column("memo") == ["ride; airport", "groceries", None, "fuel"]
+    assert table.column("category") == [None, "Food", None, None]
+    assert table.column_values([0, 2])[1] == ["-10", "-20", "-150", "-600"]
+    with pytest.raises(ValueError):
+        table.column("iban")
+    assert is_small_file(csv_file, 1024)
+    assert not is_small_file(csv_file, 10)
+    assert not is_small_file(csv_file, 0)
+
+
+def test_label_small_file(mocker: MockerFixture, csv_file: Path):
+    """
+    Tests that a small file is labeled without pandas (a query still works) and only
+    the label fields are rewritten.
+    """
+    settings = make_settings(
+        csv={"relevant_columns": '["payee", "amount"]', "small_file_bytes": "4096"},
+        grouping={"mode": "off"},
+        journal={"enabled": "False"},
+        autosave={"enabled": "False"},
+    )
+    read_csv_cached = mocker.patch("csv_labeler.cache.read_csv_cached")
+    mocker.patch("csv_labeler.main.clear_console")
+    mocker.patch(
+        "builtins.input",
+        side_effect=["y", '/payee~"uber" & amount>-200', "car", "food"],
+    )
+    main.label_csv_file(settings, csv_file)
+    read_csv_cached.assert_not_called()
+    assert csv_file.read_bytes().decode("utf-8") == (
+        "\ufeffpayee;memo;amount;category\r\n"
+        'Uber BV;"ride; airport";-10;Car\r\n'
+        "Rewe;groceries;-20;Food\r\n"
+        "\r\n"
+        "UBER Eats;NA;-150;Car\r\n"
+        "Shell;fuel;-600;Food\r\n"
+    )
+
+
+def test_default_settings_use_the_small_file_path(
+    mocker: MockerFixture, csv_file: Path
+):
+    """
+    Tests that the shipped config.ini labels a small file with the csv module backend.
+    """
+    settings = load_settings(Path(__file__).resolve().parents[1] / "config.ini")
+    read_csv_cached = mocker.patch("csv_labeler.cache.read_csv_cached")
+    label_table = mocker.spy(main, "label_table")
+    mocker.patch("csv_labeler.main.clear_console")
+    mocker.patch("builtins.input", side_effect=["y", "car", "food", "car"])
+    main.label_csv_file(settings, csv_file)
+    read_csv_cached.assert_not_called()
+    assert label_table.call_count == 1
+    labels = pd.read_csv(csv_file, sep=";")["category"].tolist()
+    assert labels == ["Car", "Food", "Food", "Car"]
+    assert not LabelJournal.path_for(csv_file).exists()
+
+
+def test_small_file_with_rules_and_grouping(mocker: MockerFixture, tmp_path: Path):
+    """
+    Tests that rules and grouping work for small files (the file is parsed with pandas
+    for them).
+    """
+    csv_file = tmp_path / "export.csv"
+    csv_file.write_text("payee;category\nUber;\nRewe;\nUBER;\nShell;\nuber;\n")
+    settings = make_settings(
+        csv={"relevant_columns": '["payee"]', "small_file_bytes": "4096"},
+        grouping={"mode": "exact"},
+        suggestions={"enabled": "False"},
+        autosave={"enabled": "False"},
+        **{"rule:shell": {"label": "Car", "query": 'payee~"shell"'}},
+    )
+    read_csv_cached = mocker.patch("csv_labeler.cache.read_csv_cached")
+    mocker.patch("csv_labeler.main.clear_console")
+    user_input = mocker.patch("builtins.input", side_effect=["car", "y", "food"])
+    main.label_csv_file(settings, csv_file)
+    read_csv_cached.assert_not_called()
+    assert user_input.call_count == 3
+    assert csv_file.read_text() == (
+        "payee;category\nUber;Car\nRewe;Food\nUBER;Car\nShell;Car\nuber;Car\n"
+    )
+
+
+def test_small_file_resumes_journal(mocker: MockerFixture, csv_file: Path):
+    """
+    Tests that labels of an unfinished session are applied by position and the
+    canceled session is saved.
+    """
+    settings = make_settings(
+        csv={"small_file_bytes": "4096"},
+        grouping={"mode": "off"},
+        autosave={"enabled": "False"},
+        suggestions={"enabled": "False"},
+    )
+    journal_file = LabelJournal.path_for(csv_file)
+    journal_file.write_text("3\tCar\t2021-01-01T00:00:00\n", encoding="utf-8")
+    mocker.patch("csv_labeler.main.clear_console")
+    mocker.patch("builtins.input", side_effect=["y", "n", "food", "q", "y"])
+    main.label_csv_file(settings, csv_file)
+    labels = pd.read_csv(csv_file, sep=";")["category"].fillna("-").tolist()
+    assert labels == ["Food", "Food", "-", "Car"]
+    assert not journal_file.exists()
+
+
+def test_small_file_does_not_import_pandas(csv_file: Path):
+    """
+    Tests that labeling and saving a small file never imports pandas.
+    """
+    result = subprocess.run(
+        [sys.executable, "-c", LABEL_SCRIPT, str(csv_file)],
+        capture_output=True,
+        check=True,
+        cwd=Path(__file__).resolve().parents[1],
+        text=True,
+    )
+    assert result.stdout.splitlines()[-1] == "False"
+    assert pd.read_csv(csv_file, sep=";")["category"].tolist() == [
+        "Car",
+        "Food",
+        "Food",
+        "Car",
+    ]
@@ -0,0 +1,123 @@
+"""
+ Copyright 2021 Robin Maasjosthusmann. All rights reserved.
+ Use of this source code is governed by a BSD-style
+ license that can be found in the LICENSE file.
+"""
+
+import threading
+from pathlib import Path
+
+import pandas as pd
+import pytest
+from parametrization import Parametrization
+from pytest_mock import MockerFixture
+
+from csv_labeler import main, streaming
+from csv_labeler.settings import Settings
+from tests.conftest import make_settings
+
+
+@pytest.fixture(name="settings")
+def fixture_settings() -> Settings:
+    """Settings with a small chunksize, so the test file is split into several chunks."""
+    return make_settings(csv={"chunksize": "2"})
+
+
+@pytest.fixture(name="csv_file")
+def fixture_csv_file(tmp_path: Path) -> Path:
+    """Csv file with five rows, the second one is already labeled."""
+    csv_file = tmp_path / "export.csv"
+    csv_file.write_text(
+        "payee;category\nUber;\nRewe;Food\nShell;\nNetflix;\nAral;\n", encoding="utf-8"
+    )
+    return csv_file
+
+
+def test_detect_labels_in_chunks(csv_file: Path):
+    """Existing labels are found, even if they are not inside the first chunk."""
+    assert streaming.detect_labels_in_chunks(csv_file, ";", "category", 1)
+
+
+@Parametrization.parameters("chunksize")
+@Parametrization.case("whole_column", 0)
+@Parametrization.case("chunks", 2)
+def test_count_labels(csv_file: Path, chunksize: int):
+    """The rows and the rows per label are counted with and without chunks."""
+    assert streaming.count_labels(csv_file, ";", "category", chunksize) == (
+        5,
+        {"Food": 1},
+    )
+
+
+@Parametrization.parameters("progress_window", "counted")
+@Parametrization.case("progress", "20", True)
+@Parametrization.case("no_progress", "0", False)
+def test_labels_are_only_counted_for_the_progress(
+    mocker: MockerFixture, csv_file: Path, progress_window: str, counted: bool
+):
+    """
+    The label column is only counted if the progress is shown, otherwise the scan for
+    existing labels stops at the first label.
+    """
+    mocker.patch("csv_labeler.main.clear_console")
+    mocker.patch("builtins.input", side_effect=["y", "1", "car", "2", "food"])
+    count_labels = mocker.spy(streaming, "count_labels")
+    detect_labels = mocker.spy(streaming, "detect_labels_in_chunks")
+    settings = make_settings(
+        csv={"chunksize": "2"},
+        general={"progress_window": progress_window},
+        journal={"enabled": "false"},
+    )
+    main.label_csv_file(settings, csv_file)
+
+    assert count_labels.called is counted
+    assert detect_labels.called is not counted
+    result = pd.read_csv(csv_file, sep=";")
+    assert result["category"].tolist() == ["Food", "Food", "Car", "Car", "Food"]
+
+
+def test_label_csv_in_chunks(mocker: MockerFixture, settings: Settings, csv_file: Path):
+    """All chunks are labeled and written back, existing labels are kept."""
+    mocker.patch("csv_labeler.main.clear_console")
+    mocker.patch("builtins.input", side_effect=["1", "car", "2", "food"])
+    main.label_csv_in_chunks(csv_file, True, settings)
+
+    result = pd.read_csv(csv_file, sep=";")
+    assert result["category"].tolist() == ["Food", "Food", "Car", "Car", "Food"]
+    assert list(csv_file.parent.iterdir()) == [csv_file]
+
+
+def test_label_csv_in_chunks_cancel(mocker: MockerFixture, settings: Settings, csv_file: Path):
+    """After a cancel the remaining rows are written back unchanged."""
+    mocker.patch("csv_labeler.main.clear_console")
+    mocker.patch("builtins.input", side_effect=["2", "q", "y"])
+    main.label_csv_in_chunks(csv_file, True, settings)
+
+    result = pd.read_csv(csv_file, sep=";")
+    assert result["payee"].tolist() == ["Uber", "Rewe", "Shell", "Netflix", "Aral"]
+    assert result["category"].tolist()[:2] == ["Car", "Food"]
+    assert result["category"].iloc[2:].isnull().all()
+
+
+def test_failed_chunk_write_keeps_file(
+    mocker: MockerFixture, settings: Settings, csv_file: Path
+):
+    """
+    Chunks are written by the background tasks, a failed write still stops the
+    session and leaves the csv file untouched.
+    """
+    source = csv_file.read_bytes()
+    threads = []
+
+    def fail(*args) -> None:
+        threads.append(threading.current_thread().name)
+        raise OSError("disk full")
+
+    mocker.patch.object(streaming.ChunkWriter, "write", side_effect=fail)
+    mocker.patch("csv_labeler.main.clear_console")
+    mocker.patch("builtins.input", side_effect=["1", "car", "2", "food"])
+    with pytest.raises(OSError):
+        main.label_csv_in_chunks(csv_file, True, settings)
+    assert threads[0].startswith("csv_labeler-tasks")
+    assert csv_file.read_bytes() == source
+    assert list(csv_file.parent.iterdir()) == [csv_file]
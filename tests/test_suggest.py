@@ -0,0 +1,70 @@
+"""
+ Copyright 2021 Robin Maasjosthusmann. All rights reserved.
+ Use of this source code is governed by a BSD-style
+ license that can be found in the LICENSE file.
+"""
+
+import numpy as np
+import pandas as pd
+
+from csv_labeler import main
+from csv_labeler.suggest import LabelSuggester
+
+
+def test_suggest_learned_label():
+    """
+    Tests that the label of similar rows is suggested and unknown labels are ignored.
+    """
+    suggester = LabelSuggester(["Food", "Car", "Freetime"])
+    assert suggester.suggest(suggester.tokenize(["Uber BV"])) is None
+    suggester.learn_rows(
+        [["Uber BV trip"], ["REWE Markt"], ["Netflix Intl"], ["Uber"]],
+        ["Car", "Food", "Freetime", "Umbuchung"],
+    )
+    assert suggester.suggest(suggester.tokenize(["UBER BV"])) == "Car"
+    assert suggester.suggest(suggester.tokenize(["rewe"])) == "Food"
+    assert suggester.row_counts.sum() == 3
+
+
+def test_model_is_sparse():
+    """
+    Tests that the model only stores learned tokens, hundreds of labels do not
+    allocate a dense matrix over the hash space.
+    """
+    labels = [f"Label {i}" for i in range(300)]
+    suggester = LabelSuggester(labels)
+    assert suggester.token_counts.size == 0
+    rows = [[f"payee {i} memo {i % 7}", i] for i in range(600)]
+    suggester.learn_rows(rows, (labels[i % 300] for i in range(600)))
+    vocabulary = np.unique(np.concatenate([suggester.tokenize(x) for x in rows]))
+    assert suggester.token_counts.shape == (len(vocabulary), 300)
+    assert suggester.token_counts.sum() == suggester.token_totals.sum()
+    tokens = suggester.tokenize(["payee 42 memo 0", 42])
+    assert suggester.suggest(tokens) == "Label 42"
+
+
+def test_enter_accepts_suggestion(mocker, settings):
+    """
+    Tests that the suggester is seeded with existing labels and an empty input
+    accepts the suggestion.
+    """
+    df = pd.DataFrame(
+        data={
+            "payee": ["Uber BV", "REWE", "Uber", "REWE Markt"],
+            "category": ["Car", "Food", None, None],
+        }
+    )
+    mocker.patch("csv_labeler.main.clear_console")
+    mocker.patch("builtins.input", return_value="")
+    main.label_dataframe(df, True, settings)
+    assert df["category"].tolist() == ["Car", "Food", "Car", "Food"]
+
+
+def test_menu_shows_suggestion():
+    """
+    Tests that the suggestion is shown below the categories.
+    """
+    assert main.format_category_menu(["Food"], "Food")[-1] == (
+        "Suggestion: Food (press Enter to accept)"
+    )
+    assert "Suggestion" not in "".join(main.format_category_menu(["Food"]))
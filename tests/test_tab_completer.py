@@ -0,0 +1,69 @@
+"""
+ Copyright 2021 Robin Maasjosthusmann. All rights reserved.
+ Use of this source code is governed by a BSD-style
+ license that can be found in the LICENSE file.
+"""
+
+import os
+
+from pytest_mock import MockerFixture
+
+from csv_labeler import tab_completer
+
+
+def test_list_completer_is_built_once(mocker: MockerFixture):
+    """
+    The AutoComplete index is built once per label list and the search runs once per
+    prefix, even if readline asks for several states and completers.
+    """
+    tab_completer.build_list_completer.cache_clear()
+    search = mocker.spy(tab_completer.fast_autocomplete.AutoComplete, "search")
+    autocomplete = mocker.spy(tab_completer.fast_autocomplete, "AutoComplete")
+    mocker.patch("readline.get_line_buffer", return_value="sho")
+    labels = ["Shopping", "Shoes", "Food"]
+
+    results = []
+    for _ in range(3):
+        completer = tab_completer.TabCompleter()
+        completer.create_list_completer(labels)
+        for state in range(5):
+            results.append(completer.list_completer("sho", state))
+
+    assert autocomplete.call_count == 1
+    assert search.call_count == 1
+    assert sorted(filter(None, results[:5])) == ["Shoes", "Shopping"]
+    assert results[:5] == results[5:10] == results[10:]
+
+
+def test_list_completer_empty_line(mocker: MockerFixture):
+    """
+    Without any input all labels are offered.
+    """
+    mocker.patch("readline.get_line_buffer", return_value="")
+    completer = tab_completer.TabCompleter()
+    completer.create_list_completer(["Shopping", "Food"])
+
+    assert completer.list_completer("", 0) == "Shopping "
+    assert completer.list_completer("", 1) == "Food "
+    assert completer.list_completer("", 2) is None
+
+
+def test_path_completer(tmp_path, monkeypatch):
+    """
+    The directory listing is cached until the directory changes and "~" is expanded.
+    """
+    (tmp_path / "export_01.csv").write_text("", encoding="utf-8")
+    (tmp_path / "export_02.csv").write_text("", encoding="utf-8")
+    (tmp_path / ".hidden.csv").write_text("", encoding="utf-8")
+    monkeypatch.setenv("HOME", str(tmp_path))
+    completer = tab_completer.TabCompleter()
+
+    assert completer.path_completer("~/exp", 0) == str(tmp_path / "export_01.csv")
+    assert completer.path_completer("~/exp", 1) == str(tmp_path / "export_02.csv")
+    assert completer.path_completer("~/exp", 2) is None
+
+    (tmp_path / "export_03.csv").write_text("", encoding="utf-8")
+    os.utime(tmp_path, ns=(0, os.stat(tmp_path).st_mtime_ns + 1))
+    assert completer.path_completer(f"{tmp_path}/export_0", 2) == str(
+        tmp_path / "export_03.csv"
+    )
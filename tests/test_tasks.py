@@ -0,0 +1,87 @@
+"""
+ Copyright 2021 Robin Maasjosthusmann. All rights reserved.
+ Use of this source code is governed by a BSD-style
+ license that can be found in the LICENSE file.
+"""
+
+import asyncio
+import threading
+
+import pytest
+
+from csv_labeler.tasks import TaskRunner
+
+
+def test_tasks_run_in_background():
+    """
+    Tests that coroutines and blocking jobs run outside of the calling thread and
+    blocking jobs keep their order.
+    """
+    calls = []
+
+    async def job() -> str:
+        await asyncio.sleep(0)
+        return threading.current_thread().name
+
+    with TaskRunner() as tasks:
+        assert tasks.submit(job()).result(timeout=5) == "csv_labeler-tasks"
+        for value in range(5):
+            tasks.run_blocking(calls.append, value)
+        tasks.wait_blocking()
+        assert calls == [0, 1, 2, 3, 4]
+
+
+def test_pending_jobs_are_canceled_on_keyboard_interrupt():
+    """
+    Tests that leaving the runner with a KeyboardInterrupt finishes the running job
+    and skips the pending ones.
+    """
+    started = threading.Event()
+    release = threading.Event()
+    calls = []
+
+    def blocking_job(value: int) -> None:
+        started.set()
+        release.wait(timeout=5)
+        calls.append(value)
+
+    with pytest.raises(KeyboardInterrupt):
+        with TaskRunner() as tasks:
+            tasks.run_blocking(blocking_job, 1)
+            pending = tasks.run_blocking(blocking_job, 2)
+            started.wait(timeout=5)
+            threading.Timer(0.1, release.set).start()
+            raise KeyboardInterrupt
+    assert calls == [1]
+    assert pending.cancelled()
+
+
+def test_canceled_job_is_skipped():
+    """
+    Tests that a job canceled while it waits behind a running job never runs, even if
+    it already reached the executor.
+    """
+    gate = threading.Event()
+    calls = []
+    with TaskRunner() as tasks:
+        tasks.run_blocking(gate.wait, 5)
+        futures = [tasks.run_blocking(calls.append, value) for value in range(20)]
+        for future in futures[::2]:
+            future.cancel()
+        gate.set()
+        tasks.wait_blocking()
+    assert calls == list(range(1, 20, 2))
+
+
+def test_close_waits_for_pending_jobs():
+    """
+    Tests that a regular close runs all scheduled jobs.
+    """
+    calls = []
+    tasks = TaskRunner()
+    for value in range(3):
+        tasks.run_blocking(calls.append, value)
+    tasks.close()
+    tasks.close()
+    assert calls == [0, 1, 2]
+    tasks.cancel_all()
@@ -24,10 +24,7 @@ def test_one_matching_keywords():
     Test for exactly one matching keyword
     """
     sentence = "This is my test sentence with a keyword"
-    expected_sentence = (
-        "This\x1b[0m is\x1b[0m my\x1b[0m test\x1b[0m sentence"
-        " \x1b[30m\x1b[43mwith\x1b[0m a\x1b[0m keyword"
-    )
+    expected_sentence = "This is my test sentence \x1b[30m\x1b[43mwith\x1b[0m a keyword"
     highlighted_sentence = highlight_keywords(sentence, ["with"])
     assert expected_sentence == highlighted_sentence
 
@@ -38,7 +35,7 @@ def test_multiple_matching_keywords():
     """
     sentence = "This is my test sentence with multiple keywords"
     expected_sentence = (
-        "This\x1b[0m is \x1b[30m\x1b[43mmy\x1b[0m test"
+        "This is \x1b[30m\x1b[43mmy\x1b[0m test"
         " \x1b[30m\x1b[43msentence\x1b[0m with \x1b[30m\x1b[43mmultiple\x1b[0m"
         " keywords"
     )
@@ -52,8 +49,7 @@ def test_matching_keyword_start_sentence():
     """
     sentence = "This is my test sentence with multiple keywords"
     expected_sentence = (
-        "\x1b[30m\x1b[43mThis\x1b[0m is\x1b[0m my\x1b[0m test\x1b[0m sentence\x1b[0m"
-        " with\x1b[0m multiple\x1b[0m keywords"
+        "\x1b[30m\x1b[43mThis\x1b[0m is my test sentence with multiple keywords"
     )
     highlighted_sentence = highlight_keywords(sentence, ["This"])
     assert expected_sentence == highlighted_sentence
@@ -65,8 +61,29 @@ def test_matching_keyword_end_sentence():
     """
     sentence = "This is my test sentence with multiple keywords"
     expected_sentence = (
-        "This\x1b[0m is\x1b[0m my\x1b[0m test\x1b[0m sentence\x1b[0m with\x1b[0m"
-        " multiple \x1b[30m\x1b[43mkeywords\x1b[0m"
+        "This is my test sentence with multiple \x1b[30m\x1b[43mkeywords\x1b[0m"
     )
     highlighted_sentence = highlight_keywords(sentence, ["keywords"])
     assert expected_sentence == highlighted_sentence
+
+
+def test_matching_phrase():
+    """
+    Test for a keyword that consists of multiple words, the longest match wins
+    """
+    sentence = "Payment amazon  marketplace EU"
+    expected_sentence = "Payment \x1b[30m\x1b[43mamazon  marketplace\x1b[0m EU"
+    highlighted_sentence = highlight_keywords(
+        sentence, ["Amazon", "Amazon Marketplace"]
+    )
+    assert expected_sentence == highlighted_sentence
+
+
+def test_no_substring_matches():
+    """
+    Test that keywords are only matched as whole words
+    """
+    sentence = "Ubering to the Uber-Station"
+    expected_sentence = "Ubering to the \x1b[30m\x1b[43mUber\x1b[0m-Station"
+    highlighted_sentence = highlight_keywords(sentence, ["uber"])
+    assert expected_sentence == highlighted_sentence
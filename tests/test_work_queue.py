@@ -0,0 +1,48 @@
+"""
+ Copyright 2021 Robin Maasjosthusmann. All rights reserved.
+ Use of this source code is governed by a BSD-style
+ license that can be found in the LICENSE file.
+"""
+
+import pandas as pd
+from parametrization import Parametrization
+
+from csv_labeler.work_queue import WorkQueue
+
+
+@Parametrization.parameters("keep_label", "exclude", "expected_result")
+@Parametrization.case("keep_labels", True, None, [0, 2, 4])
+@Parametrization.case("relabel_all", False, None, [0, 1, 2, 3, 4])
+@Parametrization.case("exclude_journal_rows", True, [2], [0, 4])
+def test_from_dataframe(keep_label: bool, exclude: list, expected_result: list):
+    """
+    Tests that only unlabeled rows are queued if existing labels are kept.
+    """
+    df = pd.DataFrame(data={"labels": [None, "Food", None, "Car", None]})
+    queue = WorkQueue.from_dataframe(df, "labels", keep_label, exclude)
+    assert list(queue) == expected_result
+
+
+def test_discard_while_iterating():
+    """
+    Discarded positions are skipped and not counted as remaining.
+    """
+    queue = WorkQueue([1, 3, 5, 7, 9])
+    iterator = iter(queue)
+    assert next(iterator) == 1
+    queue.discard([5, 9, 42])
+    assert len(queue) == 2
+    assert queue.peek(5) == [3, 7]
+    assert list(iterator) == [3, 7]
+    assert len(queue) == 0
+
+
+def test_remaining():
+    """
+    Remaining returns all pending positions after the cursor.
+    """
+    queue = WorkQueue([1, 3, 5, 7])
+    iterator = iter(queue)
+    next(iterator)
+    queue.discard([5])
+    assert queue.remaining().tolist() == [3, 7]